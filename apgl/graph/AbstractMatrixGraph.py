@@ -7,6 +7,8 @@ import os.path
 import tempfile 
 import base64 
 import shutil 
+import json 
+import pickle 
 #Fix for Python3 renaming of Queue 
 try: 
     import Queue 
@@ -16,15 +18,26 @@ except ImportError:
 import apgl
 from apgl.util.Util import Util
 from apgl.util.Parameter import Parameter
+from apgl.util.SparseGraphUtils import SparseGraphUtils
+from apgl.util.MatrixCache import MatrixCache
 from apgl.graph.AbstractSingleGraph import AbstractSingleGraph
 from apgl.graph.VertexList import VertexList
 from apgl.graph.GeneralVertexList import GeneralVertexList
 from apgl.graph.DictGraph import DictGraph
+from apgl.graph.DistanceAggregator import DistanceAggregator
 
 class AbstractMatrixGraph(AbstractSingleGraph):
     """
     An abstract graph object with single edges between vertices. The edge labels
-    are stored in a weight matrix, and vertices are stored in a VertexList 
+    are stored in a weight matrix, and vertices are stored in a VertexList. 
+    
+    Matrices derived from the weight matrix, such as the adjacency matrix, degree 
+    sequences and Laplacians, are stored in a least recently used cache of at 
+    most matrixCacheBytes bytes (see getMatrixCache). Each method which modifies 
+    the weight matrix increments version, which invalidates the cache. Code which 
+    modifies W in place directly should call modified() afterwards. Cached 
+    matrices share read-only array data between calls, so they must be copied 
+    before being modified. 
     """
 
     def getWeightMatrix(self):
@@ -35,6 +48,16 @@ class AbstractMatrixGraph(AbstractSingleGraph):
         """
         Util.abstract()
 
+    def getSparseWeightMatrix(self):
+        """
+        Returns the weight matrix as a scipy.sparse matrix. Subclasses with a
+        sparse representation override this to avoid forming the dense matrix.
+
+        :returns: A scipy.sparse weight matrix.
+        """
+        return scipy.sparse.csr_matrix(self.getWeightMatrix())
+
+    @MatrixCache.cached
     def laplacianMatrix(self, outDegree=True):
         """
         Return the Laplacian matrix of this graph, which is defined as L_{ii} = deg(i)
@@ -55,6 +78,7 @@ class AbstractMatrixGraph(AbstractSingleGraph):
 
         return -A + D
 
+    @MatrixCache.cached
     def laplacianWeightMatrix(self, outDegree=True):
         """
         Return the Laplacian matrix of this graph, L = D - W, where D is the degree
@@ -75,6 +99,7 @@ class AbstractMatrixGraph(AbstractSingleGraph):
 
         return D - W
 
+    @MatrixCache.cached
     def normalisedLaplacianSym(self, outDegree=True):
         """
         Compute the normalised symmetric laplacian matrix using L = I - D^-1/2 W D^-1/2,
@@ -97,6 +122,7 @@ class AbstractMatrixGraph(AbstractSingleGraph):
         L = numpy.eye(self.getNumVertices()) - numpy.dot(D2, numpy.dot(W, D2))
         return L
 
+    @MatrixCache.cached
     def normalisedLaplacianRw(self, outDegree=True):
         """
         Compute the normalised random walk laplacian matrix with L = I - D^-1 W in
@@ -183,12 +209,15 @@ class AbstractMatrixGraph(AbstractSingleGraph):
         self.W[vertexIndex1, vertexIndex2] = edge
         if self.undirected:
             self.W[vertexIndex2, vertexIndex1] = edge
+        self.modified()
 
     def addEdges(self, edgeIndexArray, edgeValues=[]):
         """
         Takes a numpy array of edge index pairs, and edge values and adds them
         to this graph. The array is 2 dimensional such that each row is a pair
-        of edge indices.
+        of edge indices. If an edge appears more than once then the last value
+        is used. The edges are written to the weight matrix using a single 
+        vectorised assignment (see SparseGraphUtils.edgeEntries). 
 
         :param edgeIndexArray: The array of edge indices with each being a pair of indices.
         :type edgeIndexArray: :class:`numpy.ndarray`
@@ -196,22 +225,11 @@ class AbstractMatrixGraph(AbstractSingleGraph):
         :param edgeValues: The list of edge values
         :type edgeValues: :class:`list`
         """
-        if (edgeIndexArray < 0).any() or (edgeIndexArray >= self.vList.getNumVertices()).any():
-            raise ValueError("Invalid indices for edges.")
-
-        if edgeValues == []: 
-            edgeValues = numpy.ones(edgeIndexArray.shape[0])
-        elif (edgeValues == 0).any():
-            raise ValueError("Invalid entry, found zero edge value(s): " + str(numpy.nonzero(edgeValues==0)[0]))
-
-        if self.undirected:
-            for i in range(edgeIndexArray.shape[0]):
-                self.W[int(edgeIndexArray[i, 0]), int(edgeIndexArray[i, 1])] = edgeValues[i]
-                self.W[int(edgeIndexArray[i, 1]), int(edgeIndexArray[i, 0])] = edgeValues[i]
-        else:
-            for i in range(edgeIndexArray.shape[0]):
-                self.W[int(edgeIndexArray[i, 0]), int(edgeIndexArray[i, 1])] = edgeValues[i]
-
+        rows, cols, values = SparseGraphUtils.edgeEntries(edgeIndexArray, edgeValues, self.vList.getNumVertices(), self.undirected)
+        
+        if rows.shape[0] != 0:
+            self.W[rows, cols] = values
+        self.modified()
 
     def getEdge(self, vertexIndex1, vertexIndex2):
         """
@@ -265,6 +283,7 @@ class AbstractMatrixGraph(AbstractSingleGraph):
         self.W[vertexIndex1, vertexIndex2] = 0
         if self.undirected:
             self.W[vertexIndex2, vertexIndex1] = 0
+        self.modified()
 
     def isUndirected(self):
         """
@@ -278,6 +297,31 @@ class AbstractMatrixGraph(AbstractSingleGraph):
         Removes all edges from this graph. 
         """
         self.W = self.W*0
+        self.modified()
+
+    def modified(self):
+        """
+        Record that the weight matrix has changed by incrementing version, which
+        invalidates the cached derived matrices. 
+        """
+        self.version += 1
+
+        if self.matrixCache is not None:
+            self.matrixCache.clear()
+
+    def getMatrixCache(self):
+        """
+        Returns the cache of matrices derived from the weight matrix, which is
+        created on first use with a budget of matrixCacheBytes bytes. The hits and 
+        misses attributes of the cache count lookups, and its budget can be 
+        changed using setMaxBytes. 
+
+        :returns: The :class:`apgl.util.MatrixCache` of this graph.
+        """
+        if self.matrixCache is None:
+            self.matrixCache = MatrixCache(self.matrixCacheBytes)
+
+        return self.matrixCache
 
     def __str__(self):
         output = str(self.__class__.__name__) + ": "
@@ -294,7 +338,8 @@ class AbstractMatrixGraph(AbstractSingleGraph):
         """
         Finds the diameter of a graph i.e. the longest shortest path. If useWeights
         is True then the weights in the adjacency matrix are used if P is not
-        provided. 
+        provided. If P is not provided the paths are found one chunk of sources
+        at a time (see DistanceAggregator) so the full path matrix is never stored.
 
         :param useWeights: Whether to use edge weights to compute a diameter. 
         :type useWeights: :class:`bool`
@@ -305,17 +350,15 @@ class AbstractMatrixGraph(AbstractSingleGraph):
         :returns:  The diameter of this graph. 
         """
         Parameter.checkBoolean(useWeights)
-        if P!=None and (type(P) != numpy.ndarray or P.shape != (self.getNumVertices(), self.getNumVertices())):
-            logging.debug("P.shape = " + P.shape + " W.shape = " + str(self.W.shape))
+        if P is not None and (type(P) != numpy.ndarray or P.shape != (self.getNumVertices(), self.getNumVertices())):
+            logging.debug("P.shape = " + str(P.shape) + " W.shape = " + str(self.W.shape))
             raise ValueError("P must be array of same size as weight matrix of graph")
         
         if self.getNumEdges() == 0: 
             return 0 
 
-        if P == None:
-            P = self.floydWarshall(useWeights)
-        else:
-            P = P.copy()
+        if P is None:
+            return DistanceAggregator(self, useWeights).diameter()
 
         if useWeights == False:
             return int(numpy.max(P[P!=float('inf')]))
@@ -327,7 +370,8 @@ class AbstractMatrixGraph(AbstractSingleGraph):
         The effective diameter is the minimum d such that for a fraction q of
         reachable node pairs, the path length is at most d. This is more rubust
         than the standard diameter method. One can optionally pass in a matrix
-        P whose ijth entry is the shortest path from i to j. 
+        P whose ijth entry is the shortest path from i to j, otherwise a histogram
+        of path lengths is computed without storing the path matrix. 
 
         :param q: The fraction of node pairs to consider.
         :type q: :class:`float`
@@ -338,30 +382,29 @@ class AbstractMatrixGraph(AbstractSingleGraph):
         :returns:  The effective diameter of this graph. 
         """
         Parameter.checkFloat(q, 0.0, 1.0)
-        if P!=None and (type(P) != numpy.ndarray or P.shape != (self.getNumVertices(), self.getNumVertices())):
+        if P is not None and (type(P) != numpy.ndarray or P.shape != (self.getNumVertices(), self.getNumVertices())):
             raise ValueError("P must be array of same size as weight matrix of graph")
 
         if self.getNumEdges() == 0:
             return 0
 
+        if P is None:
+            return DistanceAggregator(self, False).effectiveDiameter(q)
+
         #Paths from a vertex to itself are ignored 
-        if P == None:
-            P = self.floydWarshall(False)
-        else:
-            P = P.copy()
-        
+        P = P.copy()
         P[numpy.diag_indices(P.shape[0])] = float('inf')
 
         paths = numpy.sort(P[P!=float('inf')])
         
         if paths.shape[0] != 0:
-            ind = numpy.floor((paths.shape[0]-1)*q)
+            ind = int(numpy.floor((paths.shape[0]-1)*q))
             return int(paths[ind])
         else:
             return 0.0 
         
 
-    def floydWarshall(self, useWeights=True):
+    def floydWarshall(self, useWeights=True, dtype=numpy.float64):
         """
         Use the Floyd-Warshall algorithm to find the shortest path between all pairs
         of vertices. If useWeights is true, then the weights are used to compute the
@@ -369,56 +412,42 @@ class AbstractMatrixGraph(AbstractSingleGraph):
         vertex to itself is always zero. Returns a matrix whose ij th entry is the
         shortest path between vertices i and j. This algorithm scales as O(n^3)
         with the number of vertices n, and is not recommended for very large graphs.
+        The path matrix is updated in place in cache sized blocks (see
+        Util.blockedClosure).
 
         :param useWeights: Whether to use the edge weight to compute path cost. 
         :type useWeights: :class:`bool`
 
+        :param dtype: The floating point type of the path matrix e.g. numpy.float32 to halve memory usage.
+
         :returns:  A matrix of shortest paths between all vertices. 
         """
-        numVertices = self.vList.getNumVertices()
-        
-        if useWeights:
-            P = self.getWeightMatrix().copy()
-        else:
-            P = self.adjacencyMatrix().copy()
-
-        P = P.astype(numpy.float64)
-        P[P==0] = float('inf')
-        
-        j = numpy.ones(numVertices, numpy.int)
-
-        if self.undirected:
-            #p = P[numpy.triu_indices(P.shape[0])]
+        W = self.getWeightMatrix()
 
-            for k in range(0, numVertices):
-                #Q = numpy.outer(P[:, k], j)
-                Q = numpy.repeat(numpy.array([P[:, k]]), P.shape[0], 0)
-                P2 = Q + Q.T
-                P = numpy.minimum(P, P2)
+        if useWeights:
+            P = numpy.array(W, dtype)
+            P[P==0] = numpy.inf
         else:
-            for k in range(0, numVertices):
-                P2 = numpy.outer(P[:, k], j) + numpy.outer(j, P[k, :])
-                P = numpy.minimum(P, P2)
+            P = numpy.ones(W.shape, dtype)
+            P[W==0] = numpy.inf
 
+        Util.blockedClosure(P, numpy.add, numpy.minimum)
         P[numpy.diag_indices(P.shape[0])] = 0 
 
         return P
 
-    def maxProductPaths(self):
+    def maxProductPaths(self, dtype=numpy.float64):
         """
         Find the maximum product paths between all pairs of vertices using
-        a modified version of the Floyd-Warshall algorithm.
+        a modified version of the Floyd-Warshall algorithm. The result is only
+        well defined if all edge weights are at most 1.
+
+        :param dtype: The floating point type of the path matrix e.g. numpy.float32 to halve memory usage.
 
         :returns: A matrix P whose ijth entry corresponds to the maximal product of edge weights between them.
         """
-        numVertices = self.vList.getNumVertices()
-        P = self.getWeightMatrix().copy()
-        stepSize = min(100, numVertices-1)
-
-        for k in range(0, numVertices):
-            Util.printIteration(k, stepSize, numVertices)
-            P2 = numpy.outer(P[:, k], P[k, :])
-            P = numpy.maximum(P, P2)
+        P = numpy.array(self.getWeightMatrix(), dtype)
+        Util.blockedClosure(P, numpy.multiply, numpy.maximum)
 
         return P
 
@@ -428,7 +457,8 @@ class AbstractMatrixGraph(AbstractSingleGraph):
         undirected graph by 1/(1/2 n(n+1)) \sum_{i<=j} d_ij where d_ij is the
         shortest path length between i and j. Note that if i and j are not connected
         we assume a path length of 0. If the graph is directed then the geodesic
-        distance is 1/(n^2) sum_{i, j} d_ij.
+        distance is 1/(n^2) sum_{i, j} d_ij. If P is not provided the weighted 
+        paths are summed one chunk of sources at a time (see DistanceAggregator). 
 
         :param P: An optional nxn matrix whose ijth entry is the shortest path from i to j.
         :type P: :class:`ndarray`
@@ -438,19 +468,25 @@ class AbstractMatrixGraph(AbstractSingleGraph):
 
         :returns:  The mean geodesic distance of this graph.
         """
-        if P!=None and (type(P) != numpy.ndarray or P.shape != (self.getNumVertices(), self.getNumVertices())):
+        if P is not None and (type(P) != numpy.ndarray or P.shape != (self.getNumVertices(), self.getNumVertices())):
             raise ValueError("P must be array of same size as weight matrix of graph")
-        if vertexInds!=None:
+        if vertexInds is not None:
             Parameter.checkList(vertexInds, Parameter.checkInt, [0, self.getNumVertices()])
-        if self.getNumVertices() == 0 or (vertexInds != None and len(vertexInds)==0):
+        if self.getNumVertices() == 0 or (vertexInds is not None and len(vertexInds)==0):
             return 0
         
-        if P == None:
-            P = self.floydWarshall(True)
+        if P is None:
+            labels = None 
+            if vertexInds is not None:
+                labels = numpy.zeros(self.getNumVertices(), numpy.int64)
+                labels[numpy.unique(vertexInds)] = 1
+
+            aggregator = DistanceAggregator(self, True, labels)
+            return aggregator.geodesicDistance(None if vertexInds is None else 1)
         else:
             P = P.copy()
 
-        if vertexInds != None:
+        if vertexInds is not None:
             P = P[vertexInds, :][:, vertexInds]
 
         n = P.shape[0]
@@ -469,7 +505,8 @@ class AbstractMatrixGraph(AbstractSingleGraph):
         denoted by the inverse of 1/(1/2 n(n+1)) \sum_{i<=j} d_ij^-1 where d_ij is the
         shortest path length between i and j for an undirected graph. The distance from a
         node to itself is infinite. For a directed graph, the inverse distance is
-        1/n^2 sum_{i,j} d_ij^-1.
+        1/n^2 sum_{i,j} d_ij^-1. If P is not provided the weighted paths are
+        summed one chunk of sources at a time (see DistanceAggregator). 
 
         :param P: An optional nxn matrix whose ijth entry is the shortest path from i to j.
         :type P: :class:`ndarray`
@@ -479,19 +516,25 @@ class AbstractMatrixGraph(AbstractSingleGraph):
 
         :returns:  The mean harmonic geodesic distance of this graph. 
         """
-        if P!=None and (type(P) != numpy.ndarray or P.shape != (self.getNumVertices(), self.getNumVertices())):
+        if P is not None and (type(P) != numpy.ndarray or P.shape != (self.getNumVertices(), self.getNumVertices())):
             raise ValueError("P must be array of same size as weight matrix of graph")
-        if vertexInds!=None:
+        if vertexInds is not None:
             Parameter.checkList(vertexInds, Parameter.checkInt, [0, self.getNumVertices()])
-        if self.getNumVertices() == 0 or (vertexInds != None and len(vertexInds)==0):
+        if self.getNumVertices() == 0 or (vertexInds is not None and len(vertexInds)==0):
             return 0
 
-        if P == None:
-            P = self.floydWarshall(True)
+        if P is None:
+            labels = None 
+            if vertexInds is not None:
+                labels = numpy.zeros(self.getNumVertices(), numpy.int64)
+                labels[numpy.unique(vertexInds)] = 1
+
+            aggregator = DistanceAggregator(self, True, labels)
+            return aggregator.harmonicGeodesicDistance(None if vertexInds is None else 1)
         else:
             P = P.copy()
 
-        if vertexInds != None:
+        if vertexInds is not None:
             P = P[vertexInds, :][:, vertexInds]
 
         n = P.shape[0]
@@ -509,6 +552,7 @@ class AbstractMatrixGraph(AbstractSingleGraph):
         #Means that all vertices are disconnected 
         return float('inf')
 
+    @MatrixCache.cached
     def adjacencyMatrix(self):
         """
         Return the adjacency matrix in numpy.ndarray format. Warning: should not be used
@@ -551,60 +595,54 @@ class AbstractMatrixGraph(AbstractSingleGraph):
 
     def save(self, filename):
         """
-        Save the graph object to the corresponding filename under the .zip extension. The
-        adjacency matrix is stored in matrix market format and the AbstractVertexList
-        decides how to store the vertex labels. 
+        Save the graph object to the corresponding filename under the .npz extension.
+        The file is a numpy archive written directly to the target path, containing
+        the canonical CSR arrays of the weight matrix (see getCsrArrays), the
+        vertices and a JSON header. The vertices of a VertexList are stored as an
+        array, and other vertex lists are pickled. 
 
         :param filename: The name of the file to save.
         :type filename: :class:`str`
 
-        :returns: The name of the saved zip file.
+        :returns: The name of the saved npz file.
         """
         Parameter.checkClass(filename, str)
-        import zipfile
-        
-        (path, filename) = os.path.split(filename)
-        if path == "":
-            path = "./"        
-        
-        tempPath = tempfile.mkdtemp()
+        filename += self._npzExt
 
-        originalPath = os.getcwd()
-        try:
-            os.chdir(tempPath)
-
-            self.saveMatrix(self.W, self._wFilename)
-            vListFilename = self.vList.save(self._verticesFilename)
-
-            metaDict = {}
-            metaDict["version"] = apgl.__version__
-            metaDict["undirected"] = self.undirected
-            metaDict["vListType"] = self.vList.__class__.__name__
-            Util.savePickle(metaDict, self._metaFilename)
+        indptr, indices, data = self.getCsrArrays()
+        arrays = {"indptr": indptr, "indices": indices}
+        if data is not None:
+            arrays["data"] = data
 
-            myzip = zipfile.ZipFile(filename + '.zip', 'w')
-            myzip.write(self._wFilename)
-            myzip.write(vListFilename)
-            myzip.write(self._metaFilename)
-            myzip.close()
-
-            os.remove(self._wFilename)
-            os.remove(vListFilename)
-            os.remove(self._metaFilename)
-            
-            shutil.move(filename + ".zip", path + "/" + filename + '.zip')
+        if type(self.vList) == VertexList:
+            arrays["vertices"] = self.vList.getVertices()
+        else:
+            arrays["vertexList"] = numpy.frombuffer(pickle.dumps(self.vList, pickle.HIGHEST_PROTOCOL), numpy.uint8)
+
+        header = {}
+        header["format"] = self._npzFormat
+        header["version"] = apgl.__version__
+        header["graphType"] = self.__class__.__name__
+        header["numVertices"] = self.getNumVertices()
+        header["undirected"] = self.undirected
+        header["vListType"] = self.vList.__class__.__name__
+        arrays["header"] = numpy.array(json.dumps(header))
+
+        outFile = open(filename, "wb")
+        try:
+            numpy.savez(outFile, **arrays)
         finally:
-            os.chdir(originalPath)
-            
-        os.rmdir(tempPath)
-            
-        return path + "/" + filename + '.zip'
+            outFile.close()
+
+        return filename
 
     @classmethod
     def load(cls, filename):
         """
-        Load the graph object from the corresponding file. Data is loaded in a zip
-        format as created using save().
+        Load the graph object from the corresponding file, created using save().
+        If there is no filename.npz then a legacy zip file filename.zip containing
+        the weight matrix in matrix market format is read. The weight matrix is 
+        built directly in the native format of the graph. 
 
         :param filename: The name of the file to load.
         :type filename: :class:`str`
@@ -612,45 +650,231 @@ class AbstractMatrixGraph(AbstractSingleGraph):
         :returns: A graph corresponding to the one saved in filename.
         """
         Parameter.checkClass(filename, str)
-        import zipfile 
 
-        (path, filename) = os.path.split(filename)
-        if path == "":
-            path = "./"
-        
-        tempPath = tempfile.mkdtemp()
-        originalPath = os.getcwd()
-        
+        if not os.path.exists(filename + cls._npzExt) and os.path.exists(filename + ".zip"):
+            return cls.__loadZip(filename)
+
+        arrays = numpy.load(filename + cls._npzExt, allow_pickle=False)
         try:
-            os.chdir(path)
+            header = json.loads(str(arrays["header"]))
+
+            if header.get("format") != cls._npzFormat:
+                raise ValueError("Not a graph saved using save: " + filename + cls._npzExt)
+
+            if header["vListType"] == "VertexList":
+                V = arrays["vertices"]
+                vList = VertexList(V.shape[0], 0)
+                vList.V = V
+            else:
+                vList = pickle.loads(arrays["vertexList"].tobytes())
+
+            indptr = arrays["indptr"]
+            indices = arrays["indices"]
+            data = arrays["data"] if "data" in arrays.files else None
+        finally:
+            arrays.close()
+
+        numVertices = header["numVertices"]
+        if vList.getNumVertices() != numVertices or indptr.shape[0] != numVertices+1 or indptr[-1] != indices.shape[0]:
+            raise ValueError("Inconsistent graph arrays in " + filename + cls._npzExt)
+
+        graph = cls(vList, header["undirected"])
+        graph.setCsrArrays(indptr, indices, data, False)
+
+        return graph
+
+    @classmethod
+    def __loadZip(cls, filename):
+        """
+        Load a graph from a legacy zip file, which is extracted into a temporary
+        directory without changing the working directory. 
+        """
+        import zipfile
+
+        tempPath = tempfile.mkdtemp()
 
+        try:
             myzip = zipfile.ZipFile(filename + '.zip', 'r')
             myzip.extractall(tempPath)
             myzip.close()
 
-            os.chdir(tempPath)
+            (path, filename) = os.path.split(filename)
 
             #Deal with legacy files 
             try:
-                W = cls.loadMatrix(cls._wFilename)
-                metaDict = Util.loadPickle(cls._metaFilename)
-                vList = globals()[metaDict["vListType"]].load(cls._verticesFilename)
+                W = cls.loadMatrix(os.path.join(tempPath, cls._wFilename))
+                metaDict = Util.loadPickle(os.path.join(tempPath, cls._metaFilename))
+                vList = globals()[metaDict["vListType"]].load(os.path.join(tempPath, cls._verticesFilename))
                 undirected = metaDict["undirected"]
 
             except IOError:
-                W = cls.loadMatrix(filename + cls._matExt)
-                vList = VertexList.load(filename)
-                undirected = Util.loadPickle(filename + cls._boolExt)
+                W = cls.loadMatrix(os.path.join(tempPath, filename + cls._matExt))
+                vList = VertexList.load(os.path.join(tempPath, filename))
+                undirected = Util.loadPickle(os.path.join(tempPath, filename + cls._boolExt))
+        finally:
+            shutil.rmtree(tempPath)
 
-            graph = cls(vList, undirected)
+        graph = cls(vList, undirected)
+
+        if scipy.sparse.issparse(W):
+            W = scipy.sparse.csr_matrix(W)
+            W.sum_duplicates()
+            W.eliminate_zeros()
+            graph.setCsrArrays(W.indptr, W.indices, W.data, False)
+        else:
             graph.W = W
 
-            for tempFile in myzip.namelist():
-                os.remove(tempFile)
-        finally:
-            os.chdir(originalPath)
+        return graph
+
+    def getCsrArrays(self):
+        """
+        Returns the arrays of the weight matrix in canonical compressed sparse
+        row (CSR) format, in which the column indices of each row are sorted and
+        unique and there are no explicit zeros. 
+
+        :returns: The indptr, indices and data arrays, where data may be None if all edge weights are 1.
+        """
+        W = scipy.sparse.csr_matrix(self.getSparseWeightMatrix())
 
-        os.rmdir(tempPath)
+        if not W.has_canonical_format or (W.data == 0).any():
+            W = W.copy()
+            W.sum_duplicates()
+            W.eliminate_zeros()
+
+        return W.indptr, W.indices, W.data
+
+    def setCsrArrays(self, indptr, indices, data=None, check=True):
+        """
+        Set the weight matrix of this graph from the arrays of a canonical CSR
+        matrix (see getCsrArrays). Sparse graphs use the arrays without copying
+        them, so for example they can be memory mapped. If check is False then
+        the arrays are trusted, so that nothing is read until it is used. 
+
+        :param indptr: An array of numVertices+1 row offsets into indices.
+        :type indptr: :class:`numpy.ndarray`
+
+        :param indices: An array of the column index of each edge.
+        :type indices: :class:`numpy.ndarray`
+
+        :param data: An array of the weight of each edge, or None for unit weights.
+        :type data: :class:`numpy.ndarray`
+
+        :param check: Whether to check the arrays and the symmetry of an undirected graph.
+        :type check: :class:`bool`
+        """
+        Parameter.checkBoolean(check)
+
+        if data is None:
+            data = numpy.ones(indices.shape[0], self.W.dtype)
+
+        W = scipy.sparse.csr_matrix((data, indices, indptr), shape=self.W.shape, copy=False)
+
+        if check:
+            W.check_format(full_check=True)
+            self.setWeightMatrix(W if scipy.sparse.issparse(self.W) else W.toarray())
+        elif isinstance(self.W, numpy.ndarray):
+            self.W = W.toarray()
+        elif type(self.W) == type(W):
+            self.W = W
+        elif scipy.sparse.issparse(self.W):
+            self.W = type(self.W)(W)
+        else:
+            self.setWeightMatrix(W.toarray())
+
+        self.modified()
+
+    def saveArrays(self, dirname):
+        """
+        Save the graph to a directory of raw .npy files which can be memory mapped
+        by loadArrays: the CSR arrays indptr.npy, indices.npy and data.npy (which
+        is omitted for unit weights, see getCsrArrays) and the vertices, along
+        with a JSON header header.json which is written last. The vertices of a 
+        VertexList are stored in vertices.npy, and other vertex lists use their
+        save method. 
+
+        :param dirname: The name of the directory, which is created if necessary.
+        :type dirname: :class:`str`
+
+        :returns: The name of the directory.
+        """
+        Parameter.checkClass(dirname, str)
+        if not os.path.exists(dirname):
+            os.makedirs(dirname)
+
+        indptr, indices, data = self.getCsrArrays()
+        numpy.save(os.path.join(dirname, "indptr.npy"), indptr)
+        numpy.save(os.path.join(dirname, "indices.npy"), indices)
+        if data is not None:
+            numpy.save(os.path.join(dirname, "data.npy"), data)
+
+        if type(self.vList) == VertexList:
+            verticesFilename = "vertices.npy"
+            numpy.save(os.path.join(dirname, verticesFilename), self.vList.getVertices())
+        else:
+            verticesFilename = os.path.basename(self.vList.save(os.path.join(dirname, "vertices")))
+
+        header = {}
+        header["format"] = self._arraysFormat
+        header["version"] = apgl.__version__
+        header["graphType"] = self.__class__.__name__
+        header["numVertices"] = self.getNumVertices()
+        header["numEntries"] = int(indices.shape[0])
+        header["undirected"] = self.undirected
+        header["unitWeights"] = data is None
+        header["dtype"] = str(data.dtype) if data is not None else None
+        header["vListType"] = self.vList.__class__.__name__
+        header["vertices"] = verticesFilename
+
+        headerFile = open(os.path.join(dirname, self._headerFilename), "w")
+        json.dump(header, headerFile, indent=2)
+        headerFile.close()
+
+        return dirname
+
+    @classmethod
+    def loadArrays(cls, dirname, mmapMode="r"):
+        """
+        Load a graph saved using saveArrays. The arrays are opened using
+        numpy.load with the given mmap_mode, and are not read until they are
+        used, so graphs larger than memory can be opened immediately. With the
+        default mode "r" the arrays are read-only; use "c" for copy-on-write or 
+        None to read them into memory. Sparse graphs keep the memory mapped CSR
+        arrays, so for example neighbours only pages in the rows it touches. 
+
+        :param dirname: The name of the directory.
+        :type dirname: :class:`str`
+
+        :param mmapMode: The mmap_mode of numpy.load: "r", "r+", "c" or None.
+
+        :returns: A graph corresponding to the one saved in dirname.
+        """
+        Parameter.checkClass(dirname, str)
+        headerFile = open(os.path.join(dirname, cls._headerFilename), "r")
+        header = json.load(headerFile)
+        headerFile.close()
+
+        if header.get("format") != cls._arraysFormat:
+            raise ValueError("Not a graph saved using saveArrays: " + dirname)
+
+        if header["vListType"] == "VertexList":
+            V = numpy.load(os.path.join(dirname, header["vertices"]), mmap_mode=mmapMode)
+            vList = VertexList(V.shape[0], 0)
+            vList.V = V
+        else:
+            vList = globals()[header["vListType"]].load(os.path.join(dirname, "vertices"))
+
+        indptr = numpy.load(os.path.join(dirname, "indptr.npy"), mmap_mode=mmapMode)
+        indices = numpy.load(os.path.join(dirname, "indices.npy"), mmap_mode=mmapMode)
+        data = None
+        if not header["unitWeights"]:
+            data = numpy.load(os.path.join(dirname, "data.npy"), mmap_mode=mmapMode)
+
+        numVertices = header["numVertices"]
+        if vList.getNumVertices() != numVertices or indptr.shape[0] != numVertices+1 or indices.shape[0] != header["numEntries"] or indptr[-1] != indices.shape[0]:
+            raise ValueError("Inconsistent graph arrays in " + dirname)
+
+        graph = cls(vList, header["undirected"])
+        graph.setCsrArrays(indptr, indices, data, False)
 
         return graph
 
@@ -688,6 +912,7 @@ class AbstractMatrixGraph(AbstractSingleGraph):
 
 
         self.W = W 
+        self.modified()
 
     def outDegreeSequence(self):
         """
@@ -708,7 +933,7 @@ class AbstractMatrixGraph(AbstractSingleGraph):
         if not self.isUndirected():
             raise ValueError("degreeSequence is only for undirected graphs")
 
-        degSequence = self.outDegreeSequence()
+        degSequence = self.outDegreeSequence().copy()
 
         #A very slow method of adding diagonal entries
         for i in range(self.getNumVertices()):
@@ -769,7 +994,9 @@ class AbstractMatrixGraph(AbstractSingleGraph):
         """
         Returns an array such that the ith element is the number of pairs of
         vertices reachable within i hops. This includes self pairs, and all
-        other pairs are counted twice in the undirected case otherwise once.
+        other pairs are counted twice in the undirected case otherwise once. If 
+        P is not provided a histogram of hop counts is computed one chunk of 
+        sources at a time (see DistanceAggregator). 
 
         :param P: An optional nxn matrix whose ijth entry is the shortest unweighted path from i to j.
         :type P: :class:`ndarray`
@@ -779,14 +1006,12 @@ class AbstractMatrixGraph(AbstractSingleGraph):
         if self.getNumVertices() == 0:
             return numpy.array([])
 
-        if P!=None and (type(P) != numpy.ndarray or P.shape != (self.getNumVertices(), self.getNumVertices())):
-            logging.debug("P.shape = " + P.shape + " W.shape = " + str(self.W.shape))
+        if P is not None and (type(P) != numpy.ndarray or P.shape != (self.getNumVertices(), self.getNumVertices())):
+            logging.debug("P.shape = " + str(P.shape) + " W.shape = " + str(self.W.shape))
             raise ValueError("P must be array of same size as weight matrix of graph")
 
-        if P == None:
-            P = self.floydWarshall(False)
-        else:
-            P = P.copy()
+        if P is None:
+            return DistanceAggregator(self, False).hopCount()
 
         p = P.ravel()
         p = p[numpy.logical_not(numpy.isinf(p))]
@@ -798,88 +1023,170 @@ class AbstractMatrixGraph(AbstractSingleGraph):
     def triangleSequence(self):
         """
         Computes the number of triangles each vertex participates in using the
-        diagonal of the adjcancy matrix. In an undirected graph, a each triangle
+        diagonal of the cube of the adjacency matrix. In an undirected graph, a each triangle
         is counted twice (once for each direction). Note that self loops are not
-        used to form triangles.
+        used to form triangles. The counts are found by intersecting neighbour
+        lists of the sparse weight matrix (see SparseGraphUtils.triangleSequence).
 
         :returns: An array of triangle counts for each vertex. 
         """
+        return SparseGraphUtils.triangleSequence(self.getSparseWeightMatrix(), self.isUndirected())
 
-        A = self.adjacencyMatrix()
-        A[numpy.diag_indices(A.shape[0])] = 0 
-        A3 = numpy.linalg.matrix_power(A, 3)
-
-        return numpy.array(numpy.diag(A3), numpy.int)
-
-    def maxEigenvector(self):
+    def maxEigenvector(self, denseSize=500):
         """
         Returns the eigenvector of maximum eigenvalue of the adjacency matrix. The
         eigenvector is of unit length, and measures the centrality of the corresponding
         vertex. It is based on the principle that connections to high-scoring nodes
         contribute more to the score of the node in question than equal connections
-        to low-scoring nodes.
+        to low-scoring nodes. Graphs with more than denseSize vertices use ARPACK 
+        on the sparse weight matrix (see SparseGraphUtils.topEigenpairs), in which 
+        case the sign is chosen so that the entries have a non-negative sum. 
+
+        :param denseSize: The largest number of vertices for which the dense eigen-decomposition is used.
+        :type denseSize: :class:`int`
 
         :returns: The maximum eigenvector of the adjacency matrix. 
         """
-        
-        A = self.getWeightMatrix()
-        w, V = numpy.linalg.eig(A)
+        Parameter.checkInt(denseSize, 0, float("inf"))
+
+        if self.getNumVertices() <= denseSize:
+            A = self.getWeightMatrix()
+            w, V = numpy.linalg.eig(A)
+
+            i = numpy.argmax(w)
+            return V[:, i]
+
+        w, V = SparseGraphUtils.topEigenpairs(self.getSparseWeightMatrix(), 1, self.isUndirected(), denseSize)
+        v = V[:, 0]
 
-        i = numpy.argmax(w)
-        return V[:, i]
+        if numpy.sum(v.real) < 0:
+            v = -v
 
-    def betweenness(self):
+        return v
+
+    def betweenness(self, useWeights=False, numSamples=None, numProcesses=1):
         """
-        Return the betweenness of each vertex in the graph. The betweenness is
-        defined as the number of shortest paths passing through each vertex.
+        Return the betweenness of each vertex in the graph. The betweenness of v is
+        the sum over ordered pairs of distinct vertices s, t (both different to v)
+        of the fraction of shortest paths from s to t which pass through v, so
+        for undirected graphs each pair is counted in both directions. It is
+        computed using Brandes' algorithm over the sparse weight matrix (see
+        SparseGraphUtils.betweenness). Edge weights must be positive.
+
+        :param useWeights: Whether to use edge weights to compute path lengths.
+        :type useWeights: :class:`bool`
+
+        :param numSamples: If not None, estimate betweenness from this many randomly sampled source vertices.
+        :type numSamples: :class:`int`
+
+        :param numProcesses: The number of processes over which to split the source vertices.
+        :type numProcesses: :class:`int`
 
         :returns: A vector of betweenness values of the same length as the number of vertices in the graph.
         """
-        n = self.getNumVertices() 
-        P = self.adjacencyMatrix().copy()
-        P[P==0] = float('inf')
-        N = numpy.ones((n, n), numpy.int32)*-1
-        pathFreqs = numpy.zeros(n)
+        Parameter.checkBoolean(useWeights)
+        if numSamples is not None:
+            Parameter.checkInt(numSamples, 1, float('inf'))
+        Parameter.checkInt(numProcesses, 1, float('inf'))
 
-        for i in range(n):
-            for j in range(n):
-                for k in range(n):
-                    if P[j, i] + P[i, k] <= P[j, k]:
-                        P[j, k] = P[j,i]+P[i,k]
-                        N[j, k] = i
+        if self.getNumVertices() == 0:
+            return numpy.zeros(0)
 
-        #How do we store next values for multiple shortest paths?
-        N2 = N[N!=-1]
-        return numpy.bincount(N2.ravel())
+        return SparseGraphUtils.betweenness(self.getSparseWeightMatrix(), useWeights, numSamples, numProcesses)
 
     def clusteringCoefficient(self):
         """
         Find the global clustering coefficient of this graph as defined here
-        http://en.wikipedia.org/wiki/Clustering_coefficient
+        http://en.wikipedia.org/wiki/Clustering_coefficient, which is the same as
+        the transitivity. 
 
         :returns: The clustering coefficient of this graph. 
         """
-        A = self.adjacencyMatrix()
-        A2 = A.dot(A)
-        A3 = A2.dot(A)
+        return self.transitivity()
 
-        diagSumA2 = 0
+    def transitivity(self):
+        """
+        Find the transitivity of this graph, trace(A^3)/(sum(A^2) - trace(A^2)) for
+        the adjacency matrix A. For an undirected graph this is 3 times the number
+        of triangles divided by the number of connected triples of vertices. Self
+        loops are ignored. 
 
-        for i in range(0, A2.shape[0]):
-            diagSumA2 = diagSumA2 + A2[i, i]
+        :returns: The transitivity of this graph. 
+        """
+        return SparseGraphUtils.transitivity(self.getSparseWeightMatrix(), self.isUndirected())
 
-        numTriples = A2.sum()-diagSumA2
+    def localClusteringCoefficients(self):
+        """
+        Find the local clustering coefficient of each vertex in an undirected
+        graph, i.e. the number of edges between the neighbours of the vertex
+        divided by the number of pairs of neighbours. Vertices with fewer than 2 
+        neighbours have a coefficient of 0 and self loops are ignored. 
 
-        diagSumA3 = 0
+        :returns: An array of the local clustering coefficient of each vertex. 
+        """
+        if not self.isUndirected():
+            raise ValueError("Local clustering coefficients are only for undirected graphs")
 
-        for i in range(0, A3.shape[0]):
-            diagSumA3 = diagSumA3 + A3[i, i]
+        return SparseGraphUtils.localClustering(self.getSparseWeightMatrix())
 
-        if numTriples == 0:
-            return 0
-        else:
-            return diagSumA3/numTriples
+    def __wedgeEstimate(self, error, confidence):
+        """
+        Estimate the fraction of closed wedges of an undirected graph, returning
+        the estimate, the half-width of its confidence interval and the number
+        of wedges. 
+        """
+        Parameter.checkFloat(error, 0.0, 1.0)
+        Parameter.checkFloat(confidence, 0.0, 1.0)
+        if not self.isUndirected():
+            raise ValueError("Wedge sampling is only for undirected graphs")
+
+        numSamples = SparseGraphUtils.wedgeSampleSize(error, confidence)
+        numClosed, numWedges = SparseGraphUtils.sampleWedges(self.getSparseWeightMatrix(), numSamples)
+
+        if numWedges == 0:
+            return 0.0, 0.0, 0
+
+        return numClosed/float(numSamples), error, numWedges
+
+    def approximateTransitivity(self, error=0.01, confidence=0.95):
+        """
+        Estimate the transitivity (global clustering coefficient) of an undirected
+        graph by uniform wedge sampling, which takes time proportional to the
+        number of samples rather than the number of triangles. The number of
+        samples is chosen so that the estimate is within error of the
+        transitivity with probability at least confidence. 
+
+        :param error: The additive error of the estimate. 
+        :type error: :class:`float`
+
+        :param confidence: The probability that the transitivity lies in the returned interval.
+        :type confidence: :class:`float`
+
+        :returns: The estimated transitivity and the lower and upper ends of the confidence interval.
+        """
+        estimate, halfWidth, numWedges = self.__wedgeEstimate(error, confidence)
+        return estimate, max(estimate-halfWidth, 0.0), min(estimate+halfWidth, 1.0)
 
+    def approximateNumTriangles(self, error=0.01, confidence=0.95):
+        """
+        Estimate the number of triangles in an undirected graph as a third of the
+        number of wedges times the approximate transitivity (see approximateTransitivity).
+        The interval is scaled in the same way. 
+
+        :param error: The additive error of the estimated transitivity. 
+        :type error: :class:`float`
+
+        :param confidence: The probability that the number of triangles lies in the returned interval.
+        :type confidence: :class:`float`
+
+        :returns: The estimated number of triangles and the lower and upper ends of the confidence interval.
+        """
+        estimate, halfWidth, numWedges = self.__wedgeEstimate(error, confidence)
+        scale = numWedges/3.0
+
+        return estimate*scale, max(estimate-halfWidth, 0.0)*scale, min(estimate+halfWidth, 1.0)*scale
+
+    @MatrixCache.cached
     def adjacencyList(self, useWeights=True):
         """
         Returns an adjacency list representation L of the graph, in which L[i]
@@ -988,15 +1295,20 @@ class AbstractMatrixGraph(AbstractSingleGraph):
         """
         Use the repeated calls to Dijkstra'  algorithm to find the shortest path between all pairs
         of vertices.  If useWeights is true, then the weights are used to compute the
-        path, otherwise adjacencies are used. Note that the shortest path of a
-        vertex to itself is always zero. Returns a matrix whose ij th entry is the
-        shortest path between vertices i and j.
+        path, otherwise adjacencies are used, in which case a breadth first search
+        over the sparse weight matrix is used instead of Dijkstra's algorithm. Note
+        that the shortest path of a vertex to itself is always zero. Returns a matrix
+        whose ij th entry is the shortest path between vertices i and j.
 
         :param useWeights: Whether to use the edge weight to compute path cost.
         :type useWeights: :class:`bool`
 
         :returns:  A matrix of shortest paths between all vertices.
         """
+        if not useWeights:
+            if self.getNumVertices() == 0:
+                return numpy.zeros((0, 0))
+            return SparseGraphUtils.bfsDistances(self.getSparseWeightMatrix())
 
         neighbourLists = self.adjacencyList(useWeights)
         P = numpy.zeros((self.size, self.size))
@@ -1100,6 +1412,37 @@ class AbstractMatrixGraph(AbstractSingleGraph):
 
         return sortedTrees
 
+    def findComponentLabels(self, strong=False):
+        """
+        Label the connected components of this graph in time linear in the number
+        of vertices and edges. For directed graphs the components are either
+        weakly or strongly connected (the latter found with an iterative variant
+        of Tarjan's algorithm). Components are labelled in order of decreasing
+        size, so label 0 is the largest component.
+
+        :param strong: If True find strongly connected components of a directed graph, otherwise weakly connected ones.
+        :type strong: :class:`bool`
+
+        :returns: An array of component labels for each vertex and an array of component sizes.
+        """
+        Parameter.checkBoolean(strong)
+        connection = "strong" if strong and not self.isUndirected() else "weak"
+
+        return SparseGraphUtils.componentLabels(self.getSparseWeightMatrix(), connection)
+
+    def findConnectedComponents(self):
+        """
+        Finds a list of all connected components of the graph, in order of size
+        with the largest first, using findComponentLabels.
+
+        :returns: A list of lists of component indices.
+        """
+        if not self.isUndirected():
+            raise ValueError("Can only find components on undirected graphs")
+
+        labels, sizes = self.findComponentLabels()
+        return SparseGraphUtils.componentLists(labels, sizes)
+
     def toNetworkXGraph(self):
         """
         Convert this graph into a networkx Graph or DiGraph object, which requires
@@ -1209,7 +1552,7 @@ class AbstractMatrixGraph(AbstractSingleGraph):
         :returns: A new graph with the union of edges of the current one.
         """
         newGraph = self.add(graph)
-        newGraph.W = newGraph.nativeAdjacencyMatrix()
+        newGraph.W = newGraph.nativeAdjacencyMatrix().copy()
         return newGraph
 
     def intersect(self, graph):
@@ -1223,7 +1566,7 @@ class AbstractMatrixGraph(AbstractSingleGraph):
         :returns: A new graph with the intersection of edges of the current plus graph.
         """
         newGraph = self.multiply(graph)
-        newGraph.W = newGraph.nativeAdjacencyMatrix()
+        newGraph.W = newGraph.nativeAdjacencyMatrix().copy()
         return newGraph 
 
     @classmethod
@@ -1325,44 +1668,58 @@ class AbstractMatrixGraph(AbstractSingleGraph):
         self.addEdge(vertexIndex1, vertexIndex2, value)
 
     def __getstate__(self): 
-        tempFile = tempfile.NamedTemporaryFile(delete=False)
-        tempFile.close()
+        """
+        The state is a dictionary of the vertex list, the undirected flag and the
+        weight matrix, which is a dense array or the arrays of getCsrArrays. The 
+        arrays are not copied, so with pickle protocol 5 and a buffer_callback
+        they are sent out-of-band. 
+        """
+        state = {}
+        state["version"] = apgl.__version__
+        state["undirected"] = self.undirected
+        state["vList"] = self.vList
 
-        self.save(tempFile.name)
-        infile = open(tempFile.name + ".zip", "rb")
-        fileStr = infile.read()        
-        infile.close() 
-        
-        try: 
-            outputStr = base64.encodebytes(fileStr) 
-        except AttributeError: 
-            outputStr= base64.encodestring(fileStr)
-            
-        os.remove(tempFile.name)
-        os.remove(tempFile.name + ".zip")
-        
-        return outputStr 
-        
-    def __setstate__(self, pkle): 
-        tempFile = tempfile.NamedTemporaryFile(delete=False)
-        tempFile.close()
-        
-        try: 
-            zipstr = base64.decodebytes(pkle)
-        except AttributeError: 
-            zipstr = base64.decodestring(pkle)
-
-        outFile = open(tempFile.name + ".zip" , "wb")
-        outFile.write(zipstr) 
-        outFile.close() 
-
-        newGraph = self.load(tempFile.name)
-        self.W = newGraph.W 
-        self.undirected = newGraph.undirected 
-        self.vList = newGraph.vList
+        if isinstance(self.W, numpy.ndarray):
+            state["W"] = self.W
+        else:
+            W = self.getSparseWeightMatrix()
+            state["format"] = W.format
+            state["dtype"] = W.dtype
+            state["shape"] = W.shape
+            state["indptr"], state["indices"], state["data"] = self.getCsrArrays()
+
+        return state 
         
-        os.remove(tempFile.name)
-        os.remove(outFile.name)
+    def __setstate__(self, state): 
+        #Deal with legacy pickles of base64 encoded zip files 
+        if not isinstance(state, dict): 
+            try: 
+                zipstr = base64.decodebytes(state)
+            except AttributeError: 
+                zipstr = base64.decodestring(state)
+
+            tempPath = tempfile.mkdtemp()
+            try:
+                filename = os.path.join(tempPath, "graph")
+                outFile = open(filename + ".zip", "wb")
+                outFile.write(zipstr) 
+                outFile.close() 
+                newGraph = self.__loadZip(filename)
+            finally:
+                shutil.rmtree(tempPath)
+
+            state = {"undirected": newGraph.undirected, "vList": newGraph.vList, "W": newGraph.W}
+
+        self.undirected = state["undirected"]
+        self.vList = state["vList"]
+
+        if "W" in state: 
+            self.W = state["W"]
+        else:
+            self.W = scipy.sparse.csr_matrix(state["shape"], dtype=state["dtype"]).asformat(state["format"])
+            self.setCsrArrays(state["indptr"], state["indices"], state["data"], False)
+
+        self.modified()
 
     def toDictGraph(self): 
         """
@@ -1379,11 +1736,18 @@ class AbstractMatrixGraph(AbstractSingleGraph):
 
     vList = None
     undirected = None
+    version = 0
+    matrixCache = None
+    matrixCacheBytes = 2**28
     _wFilename = "weightMatrix.mtx"
     _metaFilename = "metaDict.dat"
     _verticesFilename = "vertices"
     _matExt = ".mtx"
     _boolExt = ".dir"
+    _headerFilename = "header.json"
+    _arraysFormat = "apgl.csr"
+    _npzExt = ".npz"
+    _npzFormat = "apgl.npz"
     
     vlist = property(getVertexList, doc="The vertex list")
     size = property(getNumVertices, doc="The number of vertices in the graph")
@@ -202,6 +202,53 @@ class AbstractSingleGraph(AbstractGraph):
 
         return sortedComponents
 
+    def findComponentLabels(self, strong=False):
+        """
+        Label the connected components of the graph in time linear in the number
+        of vertices and edges. For directed graphs the components are either
+        weakly or strongly connected. Labels are ordered by decreasing component
+        size and correspond to the vertices returned by getAllVertexIds.
+
+        :param strong: If True find strongly connected components of a directed graph, otherwise weakly connected ones.
+        :type strong: :class:`bool`
+
+        :returns: An array of component labels for each vertex and an array of component sizes.
+        """
+        Util.abstract()
+
+    def __componentLists(self, strong):
+        labels, sizes = self.findComponentLabels(strong)
+        vertexIds = self.getAllVertexIds()
+        inds = numpy.argsort(labels, kind="mergesort")
+
+        components = []
+        start = 0
+        for size in sizes:
+            components.append([vertexIds[i] for i in inds[start:start+size]])
+            start += size
+
+        return components
+
+    def findStronglyConnectedComponents(self):
+        """
+        Finds a list of all strongly connected components of the graph, in order
+        of size with the largest first. In an undirected graph these are the
+        connected components.
+
+        :returns: A list of lists of vertex ids.
+        """
+        return self.__componentLists(True)
+
+    def findWeaklyConnectedComponents(self):
+        """
+        Finds a list of all weakly connected components of the graph, i.e. the
+        connected components when edge directions are ignored, in order of size
+        with the largest first.
+
+        :returns: A list of lists of vertex ids.
+        """
+        return self.__componentLists(False)
+
 
     def __getitem__(self, vertexIndices):
         """
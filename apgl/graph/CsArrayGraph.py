@@ -6,6 +6,7 @@ from apgl.graph.AbstractMatrixGraph import AbstractMatrixGraph
 from apgl.graph.AbstractVertexList import AbstractVertexList
 from apgl.graph import GeneralVertexList  
 from apgl.util.Parameter import Parameter
+from apgl.util.MatrixCache import MatrixCache
 from apgl.util.SparseUtils import SparseUtils
 
 class CsArrayGraph(AbstractMatrixGraph):
@@ -53,6 +54,12 @@ class CsArrayGraph(AbstractMatrixGraph):
         """
         return self.W.toarray()
 
+    def getSparseWeightMatrix(self):
+        """
+        Return the weight matrix as a scipy.sparse csc_matrix.
+        """
+        return self.W.toScipyCsc()
+
     def neighbours(self, vertexIndex):
         """
         Return an array of the indices of the neighbours of the given vertex.
@@ -91,6 +98,7 @@ class CsArrayGraph(AbstractMatrixGraph):
         newGraph.W.compress()
         return newGraph
 
+    @MatrixCache.cached
     def outDegreeSequence(self):
         """
         Return a vector of the (out)degree for each vertex.
@@ -102,6 +110,7 @@ class CsArrayGraph(AbstractMatrixGraph):
 
         return degrees
 
+    @MatrixCache.cached
     def inDegreeSequence(self):
         """
         Return a vector of the (out)degree for each vertex.
@@ -284,12 +293,14 @@ class CsArrayGraph(AbstractMatrixGraph):
             W = W.todense()
 
         self.W = numpy.array(W)
+        self.modified()
 
     def removeAllEdges(self):
         """
         Removes all edges from this graph. 
         """
         self.W.setZero()
+        self.modified()
 
     def setWeightMatrixSparse(self, W):
         """
@@ -300,6 +311,7 @@ class CsArrayGraph(AbstractMatrixGraph):
         :param W:  The scipy sparse weight matrix to use. 
         """      
         self.W[W.nonzero()] = W.data
+        self.modified()
 
     def addVertices(self, n): 
         """
@@ -312,6 +324,7 @@ class CsArrayGraph(AbstractMatrixGraph):
         self.W = W2
         
         self.vList.addVertices(n)
+        self.modified()
 
     undirected = None
     vList = None
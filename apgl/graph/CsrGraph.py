@@ -0,0 +1,663 @@
+from apgl.graph.AbstractMatrixGraph import AbstractMatrixGraph
+from apgl.graph.AbstractVertexList import AbstractVertexList
+from apgl.graph.GeneralVertexList import GeneralVertexList
+from apgl.util.Parameter import Parameter
+from apgl.util.MatrixCache import MatrixCache
+from apgl.util.SparseGraphUtils import SparseGraphUtils
+import scipy.sparse as sparse
+import scipy.io
+import numpy
+
+class CsrGraph(AbstractMatrixGraph):
+    '''
+    A compact graph, which can be directed or undirected, stored as the raw
+    compressed sparse row (CSR) arrays of its weight matrix: indptr, indices and
+    an optional array of weights. The neighbours of vertex i are
+    indices[indptr[i]:indptr[i+1]], sorted in increasing order. The index arrays
+    use int32 unless there are too many vertices or edges, in which case int64 is
+    used (see SparseGraphUtils.indexDtype). If every edge has weight 1 then no
+    weight array is stored, so an unweighted graph uses 4 bytes per directed
+    edge. Weights are stored using dtype, e.g. numpy.float32, and with
+    numpy.bool_ all edges have unit weight.
+
+    Degrees, neighbours, edges and edge lookups work directly on the arrays. The
+    remaining methods use W, a read-only scipy.sparse.csr_matrix which shares
+    the arrays of the graph (note that scipy uses a common type for indices and
+    indptr). The arrays are never modified in place: edge changes are merged
+    into new arrays, which takes time proportional to the number of edges, so
+    edges should be added in bulk using addEdges or setArrays.
+    '''
+    def __init__(self, vertices, undirected=True, W=None, dtype=numpy.float64):
+        """
+        Create a CsrGraph with a given AbstractVertexList or number of vertices,
+        and specify whether it is directed. One can optionally pass in a numpy
+        array or sparse matrix W which is used as the weight matrix of the graph.
+
+        :param vertices: the initial set of vertices as a AbstractVertexList object, or an int to specify the number of vertices in which case vertices are stored in a GeneralVertexList.
+
+        :param undirected: a boolean variable to indicate if the graph is undirected.
+        :type undirected: :class:`boolean`
+
+        :param W: a square numpy array or sparse matrix of the same size as the number of vertices, or None to create an empty graph.
+
+        :param dtype: the data type of the edge weights, e.g. numpy.float32, or numpy.bool_ for an unweighted graph.
+        """
+        Parameter.checkBoolean(undirected)
+
+        if isinstance(vertices, AbstractVertexList):
+            self.vList = vertices
+        elif isinstance(vertices, int):
+            self.vList = GeneralVertexList(vertices)
+        else:
+            raise ValueError("Invalid vList parameter: " + str(vertices))
+
+        self.undirected = undirected
+        self.dtype = numpy.dtype(dtype)
+
+        if W is None:
+            self.removeAllEdges()
+        else:
+            self.setWeightMatrix(W)
+
+    def setArrays(self, indptr, indices, weights=None):
+        """
+        Set the edges of this graph from CSR arrays, such that the neighbours of
+        vertex i are indices[indptr[i]:indptr[i+1]] and the corresponding edge
+        values are the same slice of weights, or 1 if weights is None. The column
+        indices of each row must be sorted and unique, and the weights non-zero.
+        Arrays which already have the index types of this graph and dtype are
+        used without copying, so for example they can be memory mapped.
+
+        :param indptr: An array of numVertices+1 row offsets into indices.
+        :type indptr: :class:`numpy.ndarray`
+
+        :param indices: An array of the column index of each edge.
+        :type indices: :class:`numpy.ndarray`
+
+        :param weights: An array of the weight of each edge, or None for unit weights.
+        :type weights: :class:`numpy.ndarray`
+        """
+        numVertices = self.vList.getNumVertices()
+        indptr = numpy.asarray(indptr)
+        indices = numpy.asarray(indices)
+
+        if indptr.shape != (numVertices+1, ) or indptr[0] != 0 or (numpy.diff(indptr) < 0).any():
+            raise ValueError("indptr must be a non-decreasing array of length " + str(numVertices+1) + " starting at 0")
+        if indices.ndim != 1 or indices.shape[0] != indptr[-1]:
+            raise ValueError("indices must be an array of length indptr[-1]: " + str(indices.shape))
+        if indices.shape[0] != 0 and (indices.min() < 0 or indices.max() >= numVertices):
+            raise ValueError("Invalid column indices")
+
+        #Column indices must increase within each row, ignoring the starts of rows
+        increasing = numpy.diff(numpy.asarray(indices, numpy.int64)) > 0
+        rowStarts = indptr[1:-1]
+        increasing[rowStarts[numpy.logical_and(rowStarts > 0, rowStarts < indices.shape[0])]-1] = True
+        if not increasing.all():
+            raise ValueError("Column indices must be sorted and unique within each row")
+
+        if weights is not None:
+            weights = numpy.asarray(weights, self.dtype)
+            if weights.shape != indices.shape:
+                raise ValueError("weights must be an array of length indptr[-1]: " + str(weights.shape))
+            if (weights == 0).any():
+                raise ValueError("Cannot add a zero edge")
+
+        indptr = indptr.astype(SparseGraphUtils.indexDtype(indices.shape[0]), copy=False)
+        indices = indices.astype(SparseGraphUtils.indexDtype(numVertices), copy=False)
+
+        if self.undirected:
+            data = weights if weights is not None else numpy.ones(indices.shape[0], numpy.bool_)
+            W = sparse.csr_matrix((data, indices, indptr), shape=(numVertices, numVertices), copy=False)
+            if (W != W.T).nnz != 0:
+                raise ValueError("Weight matrix of undirected graph must be symmetric")
+
+        self.__setArrays(indptr, indices, weights)
+
+    def getCsrArrays(self):
+        """
+        Returns the arrays of this graph, without copying them.
+
+        :returns: The indptr, indices and weights arrays, where weights is None for unit weights.
+        """
+        return self.indptr, self.indices, self.weights
+
+    def setCsrArrays(self, indptr, indices, data=None, check=True):
+        """
+        Set the arrays of this graph (see setArrays). If check is False then
+        the arrays are used as they are, so that memory mapped arrays are not
+        read until they are used, and the dtype of the graph becomes that of
+        data.
+
+        :param indptr: An array of numVertices+1 row offsets into indices.
+        :type indptr: :class:`numpy.ndarray`
+
+        :param indices: An array of the column index of each edge.
+        :type indices: :class:`numpy.ndarray`
+
+        :param data: An array of the weight of each edge, or None for unit weights.
+        :type data: :class:`numpy.ndarray`
+
+        :param check: Whether to check the arrays and the symmetry of an undirected graph.
+        :type check: :class:`bool`
+        """
+        Parameter.checkBoolean(check)
+
+        if check:
+            self.setArrays(indptr, indices, data)
+            return
+
+        if data is not None:
+            self.dtype = data.dtype
+
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = data
+        self.__matrix = None
+        self.modified()
+
+    def __setArrays(self, indptr, indices, weights):
+        """
+        Set checked arrays, dropping the weights if they are all 1.
+        """
+        if weights is not None and (self.dtype == numpy.bool_ or (weights == 1).all()):
+            weights = None
+
+        self.indptr = indptr
+        self.indices = indices
+        self.weights = weights
+        self.__matrix = None
+        self.modified()
+
+    def __data(self):
+        """
+        The edge weights, using a read-only broadcast array for unit weights.
+        """
+        if self.weights is None:
+            return numpy.broadcast_to(self.dtype.type(1), self.indices.shape)
+        else:
+            return self.weights
+
+    def __rowIndices(self):
+        """
+        The row index of each entry of indices.
+        """
+        return numpy.repeat(numpy.arange(self.vList.getNumVertices(), dtype=self.indices.dtype), numpy.diff(self.indptr))
+
+    def __getW(self):
+        if self.__matrix is None:
+            shape = (self.vList.getNumVertices(), self.vList.getNumVertices())
+            self.__matrix = sparse.csr_matrix((self.__data(), self.indices, self.indptr), shape=shape, copy=False)
+            self.__matrix.has_sorted_indices = True
+
+        return self.__matrix
+
+    def __setW(self, W):
+        numVertices = self.vList.getNumVertices()
+        if W.shape != (numVertices, numVertices):
+            raise ValueError("Weight matrix has wrong shape : " + str(W.shape))
+
+        W = sparse.csr_matrix(W, copy=True)
+        W.sum_duplicates()
+        W = W.astype(self.dtype)
+        W.eliminate_zeros()
+
+        indptr = W.indptr.astype(SparseGraphUtils.indexDtype(W.nnz), copy=False)
+        indices = W.indices.astype(SparseGraphUtils.indexDtype(numVertices), copy=False)
+        self.__setArrays(indptr, indices, W.data)
+
+    def __mergeEntries(self, rows, cols, values):
+        """
+        Replace the given unique entries of the weight matrix, sorted by row and
+        then column, in which a value of zero removes the entry. Each entry is
+        found by a binary search of its row, then existing entries are deleted
+        and non-zero ones inserted in a single pass over the arrays.
+        """
+        numVertices = self.vList.getNumVertices()
+        rows = numpy.asarray(rows, numpy.int64)
+        cols = numpy.asarray(cols, numpy.int64)
+        values = numpy.asarray(values).astype(self.dtype)
+
+        positions = SparseGraphUtils.searchRows(self.indptr, self.indices, rows, cols)
+        if self.indices.shape[0] != 0:
+            found = numpy.logical_and(positions < self.indptr[rows+1], self.indices[numpy.minimum(positions, self.indices.shape[0]-1)] == cols)
+        else:
+            found = numpy.zeros(rows.shape[0], numpy.bool_)
+        nonZero = values != 0
+
+        #Found entries are deleted, so insertions move back by the deletions before them
+        keep = numpy.ones(self.indices.shape[0], numpy.bool_)
+        keep[positions[found]] = False
+        insertions = positions[nonZero] - numpy.searchsorted(positions[found], positions[nonZero])
+
+        indices = numpy.insert(self.indices[keep], insertions, cols[nonZero])
+
+        if self.weights is None and (values[nonZero] == 1).all():
+            weights = None
+        else:
+            weights = numpy.insert(self.__data()[keep], insertions, values[nonZero])
+
+        counts = numpy.bincount(rows[nonZero], minlength=numVertices) - numpy.bincount(rows[found], minlength=numVertices)
+        indptr = self.indptr + numpy.r_[0, numpy.cumsum(counts)]
+        indptr = indptr.astype(SparseGraphUtils.indexDtype(indices.shape[0]))
+        self.__setArrays(indptr, indices, weights)
+
+    def addEdge(self, vertexIndex1, vertexIndex2, edge=1):
+        """
+        Add a non-zero edge between two vertices. This creates new arrays, so use
+        addEdges to add many edges.
+
+        :param vertexIndex1: The index of the first vertex.
+        :type vertexIndex1: :class:`int`
+
+        :param vertexIndex2: The index of the second vertex.
+        :type vertexIndex2: :class:`int`
+
+        :param edge: The value of the edge.
+        :type edge: :class:`float`
+        """
+        Parameter.checkIndex(vertexIndex1, 0, self.vList.getNumVertices())
+        Parameter.checkIndex(vertexIndex2, 0, self.vList.getNumVertices())
+
+        if edge == 0 or edge == float('inf'):
+            raise ValueError("Cannot add a zero or infinite edge")
+
+        self.addEdges(numpy.array([[vertexIndex1, vertexIndex2]]), [edge])
+
+    def addEdges(self, edgeIndexArray, edgeValues=[]):
+        """
+        Takes a numpy array of edge index pairs, and edge values and adds them
+        to this graph. The array is 2 dimensional such that each row is a pair
+        of edge indices. If an edge appears more than once then the last value
+        is used. The edges are merged into the arrays in a single pass.
+
+        :param edgeIndexArray: The array of edge indices with each being a pair of indices.
+        :type edgeIndexArray: :class:`numpy.ndarray`
+
+        :param edgeValues: The list of edge values
+        :type edgeValues: :class:`list`
+        """
+        rows, cols, values = SparseGraphUtils.edgeEntries(edgeIndexArray, edgeValues, self.vList.getNumVertices(), self.undirected)
+
+        if rows.shape[0] != 0:
+            self.__mergeEntries(rows, cols, values)
+
+    def removeEdge(self, vertexIndex1, vertexIndex2):
+        """
+        Remove an edge between two vertices.
+
+        :param vertexIndex1: The index of the first vertex.
+        :type vertexIndex1: :class:`int`
+
+        :param vertexIndex2: The index of the second vertex.
+        :type vertexIndex2: :class:`int`
+        """
+        Parameter.checkIndex(vertexIndex1, 0, self.vList.getNumVertices())
+        Parameter.checkIndex(vertexIndex2, 0, self.vList.getNumVertices())
+
+        rows, cols = [vertexIndex1], [vertexIndex2]
+        if self.undirected:
+            rows, cols = [vertexIndex1, vertexIndex2], [vertexIndex2, vertexIndex1]
+
+        rows, cols, values = SparseGraphUtils.lastWrites(rows, cols, numpy.zeros(len(rows)), self.vList.getNumVertices())
+        self.__mergeEntries(rows, cols, values)
+
+    def removeAllEdges(self):
+        """
+        Removes all edges from this graph.
+        """
+        numVertices = self.vList.getNumVertices()
+        indptr = numpy.zeros(numVertices+1, SparseGraphUtils.indexDtype(0))
+        indices = numpy.zeros(0, SparseGraphUtils.indexDtype(numVertices))
+        self.__setArrays(indptr, indices, None)
+
+    def getEdge(self, vertexIndex1, vertexIndex2):
+        """
+        Get the value of an edge, or None if no edge exists, using a binary
+        search of the neighbours of vertexIndex1.
+
+        :param vertexIndex1: The index of the first vertex.
+        :type vertexIndex1: :class:`int`
+
+        :param vertexIndex2: The index of the second vertex.
+        :type vertexIndex2: :class:`int`
+
+        :returns:  The value of the edge between the given vertex indices.
+        """
+        Parameter.checkIndex(vertexIndex1, 0, self.vList.getNumVertices())
+        Parameter.checkIndex(vertexIndex2, 0, self.vList.getNumVertices())
+
+        start, end = self.indptr[vertexIndex1], self.indptr[vertexIndex1+1]
+        i = start + numpy.searchsorted(self.indices[start:end], vertexIndex2)
+
+        if i == end or self.indices[i] != vertexIndex2:
+            return None
+        elif self.weights is None:
+            return self.dtype.type(1)
+        else:
+            return self.weights[i]
+
+    def neighbours(self, vertexIndex):
+        """
+        Return an array of the indices of neighbours. In the case of a directed
+        graph it is an array of those vertices connected by an edge from the current
+        one.
+
+        :param vertexIndex: the index of a vertex.
+        :type vertexIndex: :class:`int`
+
+        :returns: A sorted array of the indices of all neigbours of the input vertex.
+        """
+        Parameter.checkIndex(vertexIndex, 0, self.vList.getNumVertices())
+        return self.indices[self.indptr[vertexIndex]:self.indptr[vertexIndex+1]].copy()
+
+    def neighbourOf(self, vertexIndex):
+        """
+        Return an array of the indices of vertices than have an edge going to the input
+        vertex. For a directed graph this is a scan over all edges.
+
+        :param vertexIndex: the index of a vertex.
+        :type vertexIndex: :class:`int`
+
+        :returns: A sorted array of the indices of all vertices with an edge towards the input vertex.
+        """
+        Parameter.checkIndex(vertexIndex, 0, self.vList.getNumVertices())
+
+        if self.undirected:
+            return self.neighbours(vertexIndex)
+
+        positions = numpy.flatnonzero(self.indices == vertexIndex)
+        return numpy.searchsorted(self.indptr, positions, side="right") - 1
+
+    def getNumEdges(self):
+        """
+        :returns: the total number of edges in this graph.
+        """
+        if self.undirected:
+            numSelfEdges = numpy.sum(self.indices == self.__rowIndices())
+            return int(self.indices.shape[0] + numSelfEdges)//2
+        else:
+            return self.indices.shape[0]
+
+    def getNumDirEdges(self):
+        """
+        :returns: the number of edges, taking this graph as a directed graph.
+        """
+        return self.indices.shape[0]
+
+    @MatrixCache.cached
+    def outDegreeSequence(self):
+        """
+        :returns: a vector of the (out)degree sequence for each vertex.
+        """
+        return numpy.diff(self.indptr)
+
+    @MatrixCache.cached
+    def inDegreeSequence(self):
+        """
+        :returns: a vector of the (in)degree sequence for each vertex.
+        """
+        degrees = numpy.bincount(self.indices, minlength=self.vList.getNumVertices())
+        return degrees.astype(self.indptr.dtype)
+
+    def getWeightMatrix(self):
+        """
+        Return the weight matrix in dense format. Warning: should not be used
+        unless sufficient memory is available to store the dense matrix.
+
+        :returns: A numpy.ndarray weight matrix.
+        """
+        return self.W.toarray()
+
+    def getSparseWeightMatrix(self):
+        """
+        Returns a read-only csr_matrix which shares the arrays of this graph.
+
+        :returns: A scipy.sparse weight matrix.
+        """
+        return self.W
+
+    def nativeAdjacencyMatrix(self):
+        """
+        :returns: the adjacency matrix as a read-only csr_matrix which shares the index arrays of this graph.
+        """
+        shape = (self.vList.getNumVertices(), self.vList.getNumVertices())
+        ones = numpy.broadcast_to(self.dtype.type(1), self.indices.shape)
+        return sparse.csr_matrix((ones, self.indices, self.indptr), shape=shape, copy=False)
+
+    @MatrixCache.cached
+    def laplacianMatrix(self, outDegree=True, sparse=False):
+        """
+        Return the Laplacian matrix of this graph, which is defined as L_{ii} = deg(i)
+        L_{ij} = -1 if an edge between i and j, otherwise L_{ij} = 0 . For a directed
+        graph one can specify whether to use the out-degree or in-degree.
+
+        :param outDegree: whether to use the out-degree for the computation of the degree matrix
+        :type outDegree: :class:`bool`
+
+        :param sparse: whether to return a sparse matrix or numpy array
+        :type sparse: :class:`bool`
+
+        :returns:  A laplacian adjacency matrix.
+        """
+        if outDegree:
+            degrees = self.outDegreeSequence()
+        else:
+            degrees = self.inDegreeSequence()
+
+        L = scipy.sparse.diags(numpy.array(degrees, numpy.float64), format="csr") - SparseGraphUtils.adjacencyPattern(self.W)
+
+        if sparse == True:
+            return L
+        else:
+            return L.toarray()
+
+    def weightMatrixType(self):
+        """
+        :returns: the type of the sparse matrix used to store edge weights.
+        """
+        return sparse.csr_matrix
+
+    def weightMatrixDType(self):
+        """
+        :returns: the dtype of the edge weights.
+        """
+        return self.dtype
+
+    def getAllDirEdges(self):
+        """
+        Returns the set of directed edges of the current graph as a matrix in which each
+        row corresponds to an edge. For an undirected graph, there is an edge from
+        v1 to v2 and from v2 to v1 if v2!=v1.
+
+        :returns: A matrix with 2 columns, and each row corresponding to an edge.
+        """
+        return numpy.c_[self.__rowIndices(), self.indices]
+
+    def setWeightMatrix(self, W):
+        """
+        Set the weight matrix of this graph. Requires as input an ndarray or
+        a scipy sparse matrix with the same dimensions as the current weight
+        matrix. Edges are represented by non-zero edges.
+
+        :param W: The weight matrix to use.
+        :type W: :class:`ndarray` or :class:`scipy.sparse` matrix
+        """
+        if W.shape != (self.vList.getNumVertices(), self.vList.getNumVertices()):
+            raise ValueError("Weight matrix has wrong shape : " + str(W.shape))
+
+        if self.undirected and type(W) == numpy.ndarray and (W != W.T).any():
+            raise ValueError("Weight matrix of undirected graph must be symmetric")
+
+        if self.undirected and sparse.issparse(W) and (W != W.T).nnz != 0:
+            raise ValueError("Weight matrix of undirected graph must be symmetric")
+
+        self.W = W
+
+    def setWeightMatrixSparse(self, W):
+        """
+        Set the weight matrix of this graph. Requires as input a scipy sparse matrix with the
+        same dimensions as the current weight matrix. Edges are represented by
+        non-zero edges.
+
+        :param W:  The weight matrix to use.
+        """
+        if not sparse.issparse(W):
+            raise ValueError("Input must be a sparse matrix, not " + str(type(W)))
+
+        self.setWeightMatrix(W)
+
+    def subgraph(self, vertexIndices):
+        """
+        Pass in a list or set of vertexIndices and returns the subgraph containing
+        those vertices only, and edges between them. The subgraph indices correspond
+        to the sorted input indices.
+
+        :param vertexIndices: the indices of the subgraph vertices.
+        :type vertexIndices: :class:`list`
+
+        :returns: A new CsrGraph containing only vertices and edges from vertexIndices
+        """
+        Parameter.checkList(vertexIndices, Parameter.checkIndex, (0, self.getNumVertices()))
+        vertexIndices = numpy.unique(numpy.array(vertexIndices, numpy.int64))
+        vList = self.vList.subList(vertexIndices.tolist())
+
+        subGraph = CsrGraph(vList, self.undirected, dtype=self.dtype)
+
+        if vertexIndices.shape[0] != 0:
+            subGraph.W = self.W[vertexIndices, :][:, vertexIndices]
+
+        return subGraph
+
+    def add(self, graph):
+        """
+        Add the edge weights of the input graph to the current one. Results in a
+        union of the edges.
+
+        :param graph: the input graph.
+        :type graph: :class:`apgl.graph.CsrGraph`
+
+        :returns: A new graph with same vertex list and addition of edge weights
+        """
+        Parameter.checkClass(graph, CsrGraph)
+        if graph.getNumVertices() != self.getNumVertices():
+            raise ValueError("Can only add edges from graph with same number of vertices")
+        if self.undirected != graph.undirected:
+            raise ValueError("Both graphs must be either undirected or directed")
+
+        newGraph = CsrGraph(self.vList, self.undirected, dtype=self.dtype)
+        newGraph.W = self.W + graph.W
+        return newGraph
+
+    def multiply(self, graph):
+        """
+        Multiply the edge weights of the input graph to the current one. Results in an
+        intersection of the edges.
+
+        :param graph: the input graph.
+        :type graph: :class:`apgl.graph.CsrGraph`
+
+        :returns: A new graph with edge weights which are multiples of the current and graph
+        """
+        Parameter.checkClass(graph, CsrGraph)
+        if graph.getNumVertices() != self.getNumVertices():
+            raise ValueError("Can only add edges from graph with same number of vertices")
+        if self.undirected != graph.undirected:
+            raise ValueError("Both graphs must be either undirected or directed")
+
+        newGraph = CsrGraph(self.vList, self.undirected, dtype=self.dtype)
+        newGraph.W = self.W.multiply(graph.W)
+        return newGraph
+
+    def setDiff(self, graph):
+        """
+        Find the edges in the current graph which are not present in the input
+        graph.
+
+        :param graph: the input graph.
+        :type graph: :class:`apgl.graph.CsrGraph`
+
+        :returns: A new graph with edges from the current graph and not in the input graph.
+        """
+        Parameter.checkClass(graph, CsrGraph)
+        if graph.getNumVertices() != self.getNumVertices():
+            raise ValueError("Can only add edges from graph with same number of vertices")
+        if self.undirected != graph.undirected:
+            raise ValueError("Both graphs must be either undirected or directed")
+
+        A1 = SparseGraphUtils.adjacencyPattern(self.W)
+        A2 = SparseGraphUtils.adjacencyPattern(graph.W)
+
+        newGraph = CsrGraph(self.vList, self.undirected, dtype=self.dtype)
+        newGraph.W = A1 - A1.multiply(A2)
+        return newGraph
+
+    def complement(self):
+        """
+        Returns a graph with identical vertices (same reference) to the current
+        one, but with the complement of the set of edges. Edges that do not exist
+        have weight 1. This makes a sparse graph dense.
+
+        :returns: A new graph with edges complmenting the current one.
+        """
+        numVertices = self.vList.getNumVertices()
+        A = numpy.ones((numVertices, numVertices), self.dtype)
+        A[self.__rowIndices(), self.indices] = 0
+
+        newGraph = CsrGraph(self.vList, self.undirected, dtype=self.dtype)
+        newGraph.W = A
+        return newGraph
+
+    def copy(self):
+        """
+        Returns a copy of this object, which also has a copy of the AbstractVertexList.
+        The arrays are shared, which is safe since they are never modified in place.
+        """
+        newGraph = CsrGraph(self.vList.copy(), self.undirected, dtype=self.dtype)
+        newGraph.__setArrays(self.indptr, self.indices, self.weights)
+        return newGraph
+
+    def addVertices(self, n):
+        """
+        Adds n vertices, without edges, to the end of the current graph.
+        """
+        Parameter.checkInt(n, 0, float('inf'))
+        self.vList.addVertices(n)
+
+        indptr = numpy.r_[self.indptr, numpy.repeat(self.indptr[-1], n)].astype(self.indptr.dtype)
+        indices = self.indices.astype(SparseGraphUtils.indexDtype(self.vList.getNumVertices()), copy=False)
+        self.__setArrays(indptr, indices, self.weights)
+
+    @staticmethod
+    def loadMatrix(filename):
+        W = scipy.io.mmread(filename)
+        return W.tocsr()
+
+    def saveMatrix(self, W, filename):
+        scipy.io.mmwrite(filename, W)
+
+    def __str__(self):
+        output = super(CsrGraph, self).__str__()
+        output += ", index storage " + str(self.indices.dtype)
+
+        if self.weights is None:
+            output += ", unit weights"
+        else:
+            output += ", weight storage " + str(self.weights.dtype)
+        return output
+
+    def __setstate__(self, state):
+        #The dtype of unit weights is not stored in an array
+        if isinstance(state, dict) and "dtype" in state:
+            self.dtype = numpy.dtype(state["dtype"])
+
+        super(CsrGraph, self).__setstate__(state)
+
+    #Class data
+    W = property(__getW, __setW, doc="A read-only csr_matrix sharing the arrays of the graph")
+    indptr = None
+    indices = None
+    weights = None
+    dtype = numpy.dtype(numpy.float64)
+    vList = None
+    undirected = None
+    __matrix = None
@@ -4,6 +4,7 @@ import numpy
 from apgl.graph.AbstractMatrixGraph import AbstractMatrixGraph
 from apgl.graph.AbstractVertexList import AbstractVertexList 
 from apgl.util.Parameter import Parameter
+from apgl.util.MatrixCache import MatrixCache
 from apgl.util.SparseUtils import SparseUtils
 from apgl.graph import GeneralVertexList 
 
@@ -103,6 +104,7 @@ class DenseGraph(AbstractMatrixGraph):
         newGraph.W = (self.W == 0).astype(self.W.dtype)
         return newGraph
 
+    @MatrixCache.cached
     def outDegreeSequence(self):
         """
         Return a vector of the (out)degree for each vertex.
@@ -114,6 +116,7 @@ class DenseGraph(AbstractMatrixGraph):
 
         return degrees
 
+    @MatrixCache.cached
     def inDegreeSequence(self):
         """
         Return a vector of the (out)degree for each vertex.
@@ -263,7 +266,7 @@ class DenseGraph(AbstractMatrixGraph):
     def loadMatrix(filename):
         M = scipy.io.mmread(filename)
         if scipy.sparse.issparse(M):
-            M = M.todense()
+            M = M.toarray()
         return M 
 
     def saveMatrix(self, W, filename):
@@ -291,6 +294,7 @@ class DenseGraph(AbstractMatrixGraph):
             W = W.todense()
 
         self.W = numpy.array(W)
+        self.modified()
 
     undirected = None
     vList = None
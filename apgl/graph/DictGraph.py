@@ -3,6 +3,7 @@ import numpy
 import heapq
 import scipy.sparse 
 from apgl.graph.AbstractSingleGraph import AbstractSingleGraph
+from apgl.util.SparseGraphUtils import SparseGraphUtils
 
 
 class DictGraph(AbstractSingleGraph):
@@ -572,6 +573,35 @@ class DictGraph(AbstractSingleGraph):
 
         return P 
 
+    def findComponentLabels(self, strong=False):
+        """
+        Label the connected components of this graph in time linear in the number
+        of vertices and edges. For directed graphs the components are either
+        weakly or strongly connected. Labels are ordered by decreasing component
+        size and correspond to the vertices returned by getAllVertexIds.
+
+        :param strong: If True find strongly connected components of a directed graph, otherwise weakly connected ones.
+        :type strong: :class:`bool`
+
+        :returns: An array of component labels for each vertex and an array of component sizes.
+        """
+        keyInds = {}
+        for i, vertexId in enumerate(self.vertices.keys()):
+            keyInds[vertexId] = i
+
+        rows = []
+        cols = []
+        for vertex1, adjacencies in self.adjacencies.items():
+            for vertex2 in adjacencies.keys():
+                rows.append(keyInds[vertex1])
+                cols.append(keyInds[vertex2])
+
+        numVertices = self.getNumVertices()
+        A = scipy.sparse.csr_matrix((numpy.ones(len(rows)), (rows, cols)), shape=(numVertices, numVertices))
+        connection = "strong" if strong and not self.undirected else "weak"
+
+        return SparseGraphUtils.componentLabels(A, connection)
+
     def toIGraph(self):
         """
         Convert this graph into a igraph Graph object, which requires igraph to be
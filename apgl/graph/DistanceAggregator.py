@@ -0,0 +1,240 @@
+"""
+Summaries of the all-pairs shortest path distances of a graph, computed in a
+single pass without storing the n x n distance matrix.
+"""
+import numpy
+from apgl.util.Parameter import Parameter
+from apgl.util.SparseGraphUtils import SparseGraphUtils
+
+
+class DistanceAggregator(object):
+    """
+    Runs a shortest path search from every vertex of a graph, a chunk of sources
+    at a time, and keeps only running reductions of the distances: the maximum,
+    a histogram of hop counts, the sums of distances and inverse distances from
+    each source, and sums of distances within groups of vertices. The diameter,
+    effective diameter, geodesic distances and hop counts are then read off
+    these reductions, so memory usage is linear in the number of vertices. The
+    results agree with the corresponding methods of AbstractMatrixGraph when
+    given the full path matrix.
+
+    If a relativeError is given then the unweighted reductions are instead
+    estimated from the approximate neighbourhood function computed by HyperANF
+    (see SparseGraphUtils.hyperAnf), which takes time roughly linear in the
+    number of edges times the diameter. In this case the label sums are only
+    valid for groups of vertices closed under reachability, such as the
+    connected components of an undirected graph.
+    """
+    def __init__(self, graph, useWeights=False, labels=None, chunkSize=None, relativeError=None):
+        """
+        Compute the distance reductions for a graph.
+
+        :param graph: The graph to summarise.
+        :type graph: :class:`apgl.graph.AbstractMatrixGraph`
+
+        :param useWeights: Whether to use edge weights (Dijkstra's algorithm) or adjacencies (breadth first search).
+        :type useWeights: :class:`bool`
+
+        :param labels: An optional array of non-negative integer group labels for each vertex, for example component indices, used to restrict the geodesic distances.
+        :type labels: :class:`numpy.ndarray`
+
+        :param chunkSize: The number of sources to search together, or None to choose automatically.
+        :type chunkSize: :class:`int`
+
+        :param relativeError: If not None, estimate the unweighted reductions using HyperANF with this relative standard error.
+        :type relativeError: :class:`float`
+        """
+        Parameter.checkBoolean(useWeights)
+        if relativeError is not None:
+            Parameter.checkFloat(relativeError, 0.0, 1.0)
+            if useWeights:
+                raise ValueError("HyperANF estimates are only available if useWeights=False")
+        numVertices = graph.getNumVertices()
+
+        if labels is not None:
+            labels = numpy.array(labels, numpy.int64)
+            if labels.shape != (numVertices,) or (labels < 0).any():
+                raise ValueError("labels must be a non-negative integer array with an entry per vertex")
+
+        self.numVertices = numVertices
+        self.undirected = graph.isUndirected()
+        self.useWeights = useWeights
+        self.numEdges = graph.getNumEdges()
+        self.labels = labels
+
+        self.maxDistance = 0
+        self.rowSums = numpy.zeros(numVertices)
+        self.rowInvSums = numpy.zeros(numVertices)
+        self.labelSums = None
+        self.labelInvSums = None
+        self.hopHistogram = numpy.zeros(0, numpy.int64)
+
+        if labels is not None:
+            self.labelSums = numpy.zeros(numpy.max(labels)+1 if numVertices != 0 else 0)
+            self.labelInvSums = numpy.zeros(self.labelSums.shape[0])
+
+        if numVertices == 0:
+            return
+
+        W = graph.getSparseWeightMatrix()
+
+        if relativeError is not None:
+            self.__approximate(W, relativeError)
+            return
+
+        for sources, D in SparseGraphUtils.distanceChunks(W, useWeights, None, chunkSize):
+            self.__update(sources, D)
+
+    def __update(self, sources, D):
+        finite = numpy.isfinite(D)
+        D[numpy.logical_not(finite)] = 0
+
+        self.maxDistance = max(self.maxDistance, numpy.max(D))
+        self.rowSums[sources] = numpy.sum(D, 1)
+
+        invD = numpy.zeros(D.shape)
+        numpy.divide(1, D, out=invD, where=D!=0)
+        self.rowInvSums[sources] = numpy.sum(invD, 1)
+
+        if self.labels is not None:
+            sameLabel = self.labels[sources][:, numpy.newaxis] == self.labels[numpy.newaxis, :]
+            sourceLabels = self.labels[sources]
+            self.labelSums += numpy.bincount(sourceLabels, numpy.sum(D*sameLabel, 1), self.labelSums.shape[0])
+            self.labelInvSums += numpy.bincount(sourceLabels, numpy.sum(invD*sameLabel, 1), self.labelSums.shape[0])
+
+        if not self.useWeights:
+            counts = numpy.bincount(numpy.array(D[finite], numpy.int64))
+            if counts.shape[0] > self.hopHistogram.shape[0]:
+                counts[0:self.hopHistogram.shape[0]] += self.hopHistogram
+                self.hopHistogram = counts
+            else:
+                self.hopHistogram[0:counts.shape[0]] += counts
+
+    def __approximate(self, W, relativeError):
+        """
+        Estimate the reductions from the ball sizes of each vertex at each hop.
+        """
+        self.hopHistogram = [float(self.numVertices)]
+        lastSizes = None
+
+        for t, sizes in enumerate(SparseGraphUtils.hyperAnf(W, relativeError)):
+            if t != 0:
+                counts = sizes - lastSizes
+                self.rowSums += t*counts
+                self.rowInvSums += counts/t
+                self.hopHistogram.append(numpy.sum(counts))
+                self.maxDistance = t
+            lastSizes = sizes
+
+        self.hopHistogram = numpy.array(self.hopHistogram)
+
+        if self.labels is not None:
+            self.labelSums = numpy.bincount(self.labels, self.rowSums, self.labelSums.shape[0])
+            self.labelInvSums = numpy.bincount(self.labels, self.rowInvSums, self.labelSums.shape[0])
+
+    def __labelSum(self, rowSums, labelSums, label):
+        """
+        Return the number of vertices and the sum over paths, either over all
+        vertices or those with the given label.
+        """
+        if label is None:
+            return self.numVertices, numpy.sum(rowSums)
+
+        if self.labels is None:
+            raise ValueError("Labels must be given in the constructor")
+
+        n = numpy.sum(self.labels == label)
+        distanceSum = labelSums[label] if label < labelSums.shape[0] else 0
+        return n, distanceSum
+
+    def __checkUnweighted(self):
+        if self.useWeights:
+            raise ValueError("Hop counts are only available if useWeights=False")
+
+    def diameter(self):
+        """
+        :returns: The longest finite shortest path (see AbstractMatrixGraph.diameter).
+        """
+        if self.numEdges == 0:
+            return 0
+
+        if self.useWeights:
+            return float(self.maxDistance)
+        else:
+            return int(self.maxDistance)
+
+    def effectiveDiameter(self, q):
+        """
+        The minimum d such that for a fraction q of reachable pairs of distinct
+        vertices the path length is at most d (see AbstractMatrixGraph.effectiveDiameter).
+
+        :param q: The fraction of node pairs to consider.
+        :type q: :class:`float`
+        """
+        Parameter.checkFloat(q, 0.0, 1.0)
+        self.__checkUnweighted()
+
+        if self.numEdges == 0:
+            return 0
+
+        #Remove the paths from each vertex to itself
+        counts = self.hopHistogram.copy()
+        counts[0] -= self.numVertices
+        cumCounts = numpy.cumsum(counts)
+
+        if cumCounts[-1] == 0:
+            return 0.0
+
+        ind = int(numpy.floor((cumCounts[-1]-1)*q))
+        return int(numpy.searchsorted(cumCounts, ind, side="right"))
+
+    def hopCount(self):
+        """
+        :returns: An array whose ith element is the number of pairs of vertices reachable within i hops (see AbstractMatrixGraph.hopCount).
+        """
+        self.__checkUnweighted()
+
+        if self.numVertices == 0:
+            return numpy.array([])
+
+        return numpy.cumsum(self.hopHistogram)
+
+    def geodesicDistance(self, label=None):
+        """
+        The mean geodesic distance (see AbstractMatrixGraph.geodesicDistance). If
+        label is specified then only paths between vertices with that label are
+        used, which corresponds to passing the vertices with that label as
+        vertexInds to AbstractMatrixGraph.geodesicDistance.
+
+        :param label: An optional group label as given in the constructor.
+        :type label: :class:`int`
+        """
+        n, distanceSum = self.__labelSum(self.rowSums, self.labelSums, label)
+
+        if n == 0:
+            return 0
+
+        if self.undirected:
+            return distanceSum/float(n*(n+1))
+        else:
+            return distanceSum/float(n**2)
+
+    def harmonicGeodesicDistance(self, label=None):
+        """
+        The harmonic mean geodesic distance (see AbstractMatrixGraph.harmonicGeodesicDistance).
+        If label is specified then only paths between vertices with that label are used.
+
+        :param label: An optional group label as given in the constructor.
+        :type label: :class:`int`
+        """
+        n, distanceSum = self.__labelSum(self.rowInvSums, self.labelInvSums, label)
+
+        if n == 0:
+            return 0
+
+        #For undirected graphs each path is counted twice in the sums
+        if distanceSum != 0:
+            return (n*(n+1))/distanceSum if self.undirected else n**2/distanceSum
+
+        #Means that all vertices are disconnected
+        return float('inf')
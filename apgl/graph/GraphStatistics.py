@@ -4,11 +4,19 @@ A class to compute a series of graph statistics over a sequence of subgraphs
 import gc 
 import numpy
 import logging 
+import multiprocessing
 from apgl.util.Util import Util
 from apgl.util.Parameter import Parameter 
+from apgl.util.SparseGraphUtils import SparseGraphUtils
 from apgl.graph.GraphUtils import GraphUtils
 from apgl.graph.AbstractSingleGraph import AbstractSingleGraph
 from apgl.graph.AbstractMatrixGraph import AbstractMatrixGraph
+from apgl.graph.SharedGraph import SharedGraph
+from apgl.graph.DistanceAggregator import DistanceAggregator
+from apgl.graph.IncrementalGraphStatistics import IncrementalGraphStatistics
+
+#The parent graph and statistics object of a worker process
+_workerState = {}
  
 
 class GraphStatistics(object):
@@ -41,13 +49,23 @@ class GraphStatistics(object):
 
         self.numTreesIndex = 25
         self.numNonSingletonTreesIndex = 26 
+        self.numStrongComponentsIndex = 27
+        self.maxStrongComponentSizeIndex = 28
 
-        self.numStats = 27
+        self.numStats = 29
         self.q = 0.9
         self.printStep = 5
         self.vectorPrintStep = 1
 
         self.useFloydWarshall = False 
+        #If True, distance statistics are estimated using HyperANF with relative error hyperAnfError
+        self.useHyperAnf = False
+        self.hyperAnfError = 0.05
+        #If True, statistics of nested subgraph sequences are updated incrementally
+        self.useIncremental = True
+        #The number of leading eigenvalues computed for graphs with more than denseEigenSize vertices
+        self.numEigenvalues = 20
+        self.denseEigenSize = 500
 
     def getNumStats(self):
         return self.numStats 
@@ -77,6 +95,8 @@ class GraphStatistics(object):
         s += "Mean tree depth: " + str(statsArray[self.meanTreeDepthIndex]) + "\n"
         s += "Num non-singleton components: " + str(statsArray[self.numNonSingletonComponentsIndex]) + "\n"
         s += "Num tri-or-more components: " + str(statsArray[self.numTriOrMoreComponentsIndex]) + "\n"
+        s += "Num strongly connected components: " + str(statsArray[self.numStrongComponentsIndex]) + "\n"
+        s += "Max strongly connected component size: " + str(statsArray[self.maxStrongComponentSizeIndex]) + "\n"
 
         return s 
 
@@ -97,83 +117,180 @@ class GraphStatistics(object):
         statsArray[self.numDirEdgesIndex] = graph.getNumDirEdges()
         statsArray[self.densityIndex] = graph.density()
 
+        #Components of directed graphs are weakly connected components
         if graph.isUndirected():
             subComponents = graph.findConnectedComponents()
-            statsArray[self.numComponentsIndex] = len(subComponents)
-            
-            nonSingletonSubComponents = [c for c in subComponents if len(c) > 1]
-            statsArray[self.numNonSingletonComponentsIndex] = len(nonSingletonSubComponents)
+        else:
+            subComponents = graph.findWeaklyConnectedComponents()
 
-            triOrMoreSubComponents = [c for c in subComponents if len(c) > 2]
-            statsArray[self.numTriOrMoreComponentsIndex] = len(triOrMoreSubComponents)
-            
-            #logging.debug("Studying max component")
-            if len(subComponents) != 0:
-                maxCompGraph = graph.subgraph(list(subComponents[0]))
-                statsArray[self.maxComponentSizeIndex] = len(subComponents[0])
+        statsArray[self.numComponentsIndex] = len(subComponents)
+        
+        nonSingletonSubComponents = [c for c in subComponents if len(c) > 1]
+        statsArray[self.numNonSingletonComponentsIndex] = len(nonSingletonSubComponents)
 
-                if len(subComponents) >= 2:
-                    statsArray[self.secondComponentSizeIndex] = len(subComponents[1])
+        triOrMoreSubComponents = [c for c in subComponents if len(c) > 2]
+        statsArray[self.numTriOrMoreComponentsIndex] = len(triOrMoreSubComponents)
+        
+        #logging.debug("Studying max component")
+        if len(subComponents) != 0:
+            maxCompGraph = graph.subgraph(list(subComponents[0]))
+            statsArray[self.maxComponentSizeIndex] = len(subComponents[0])
 
-                statsArray[self.maxComponentEdgesIndex] = maxCompGraph.getNumEdges()
-                statsArray[self.meanComponentSizeIndex] = sum([len(x) for x in subComponents])/float(statsArray[self.numComponentsIndex])
-                statsArray[self.maxCompMeanDegreeIndex] = numpy.mean(maxCompGraph.outDegreeSequence())
-            else:
-                statsArray[self.maxComponentSizeIndex] = 0
-                statsArray[self.maxComponentEdgesIndex] = 0 
-                statsArray[self.meanComponentSizeIndex] = 0
+            if len(subComponents) >= 2:
+                statsArray[self.secondComponentSizeIndex] = len(subComponents[1])
+
+            statsArray[self.maxComponentEdgesIndex] = maxCompGraph.getNumEdges()
+            statsArray[self.meanComponentSizeIndex] = sum([len(x) for x in subComponents])/float(statsArray[self.numComponentsIndex])
+            statsArray[self.maxCompMeanDegreeIndex] = numpy.mean(maxCompGraph.outDegreeSequence())
+        else:
+            statsArray[self.maxComponentSizeIndex] = 0
+            statsArray[self.maxComponentEdgesIndex] = 0 
+            statsArray[self.meanComponentSizeIndex] = 0
+
+            if graph.isUndirected():
                 statsArray[self.geodesicDistMaxCompIndex] = 0
 
+        if graph.isUndirected():
+            statsArray[self.numStrongComponentsIndex] = statsArray[self.numComponentsIndex]
+            statsArray[self.maxStrongComponentSizeIndex] = statsArray[self.maxComponentSizeIndex]
+        else:
+            strongComponentSizes = graph.findComponentLabels(True)[1]
+            statsArray[self.numStrongComponentsIndex] = strongComponentSizes.shape[0]
+            statsArray[self.maxStrongComponentSizeIndex] = strongComponentSizes[0] if strongComponentSizes.shape[0] != 0 else 0
+
         if graph.getNumVertices() != 0:
             statsArray[self.meanDegreeIndex] = numpy.mean(graph.outDegreeSequence())
         else:
             statsArray[self.meanDegreeIndex] = 0
             
+        maxComponent = subComponents[0] if graph.isUndirected() and len(subComponents) != 0 else None
+
         if slowStats:
-            if self.useFloydWarshall:
-                logging.debug("Running Floyd-Warshall")
-                P = graph.floydWarshall(False)
-            else:
-                logging.debug("Running Dijkstra's algorithm")
-                P = graph.findAllDistances(False)
+            self.__distanceStatistics(graph, statsArray, maxComponent)
+
+        if treeStats:
+            self.__treeStatistics(graph, statsArray)
+
+        return statsArray
+
+    def __distanceStatistics(self, graph, statsArray, maxComponent):
+        """
+        Fill in the statistics based on shortest paths and the power law exponent.
+        The geodesic distance of the largest component, given as a list of
+        vertex indices, is only found if maxComponent is not None.
+        """
+        if self.useFloydWarshall:
+            logging.debug("Running Floyd-Warshall")
+            P = graph.floydWarshall(False)
 
             statsArray[self.diameterIndex] = graph.diameter(P=P)
             statsArray[self.effectiveDiameterIndex] = graph.effectiveDiameter(self.q, P=P)
-            statsArray[self.powerLawIndex] = graph.fitPowerLaw()[0]
             statsArray[self.geodesicDistanceIndex] = graph.geodesicDistance(P=P)
             statsArray[self.harmonicGeoDistanceIndex] = graph.harmonicGeodesicDistance(P=P)
 
-            if graph.isUndirected() and len(subComponents) != 0:
-                statsArray[self.geodesicDistMaxCompIndex] = graph.geodesicDistance(P=P, vertexInds=list(subComponents[0]))
+            if maxComponent is not None:
+                statsArray[self.geodesicDistMaxCompIndex] = graph.geodesicDistance(P=P, vertexInds=list(maxComponent))
+        else:
+            if self.useHyperAnf:
+                logging.debug("Running HyperANF")
+                relativeError = self.hyperAnfError
+            else:
+                logging.debug("Running breadth first search")
+                relativeError = None
 
-        if treeStats:
-            logging.debug("Computing statistics on trees")
-            trees = graph.findTrees()
-            statsArray[self.numTreesIndex] = len(trees)
+            #Label the vertices of the largest component with 1 
+            labels = numpy.zeros(graph.getNumVertices(), numpy.int64)
+            if maxComponent is not None:
+                labels[list(maxComponent)] = 1
+
+            aggregator = DistanceAggregator(graph, False, labels, relativeError=relativeError)
+            statsArray[self.diameterIndex] = aggregator.diameter()
+            statsArray[self.effectiveDiameterIndex] = aggregator.effectiveDiameter(self.q)
+            statsArray[self.geodesicDistanceIndex] = aggregator.geodesicDistance()
+            statsArray[self.harmonicGeoDistanceIndex] = aggregator.harmonicGeodesicDistance()
+
+            if maxComponent is not None:
+                statsArray[self.geodesicDistMaxCompIndex] = aggregator.geodesicDistance(1)
+
+        statsArray[self.powerLawIndex] = graph.fitPowerLaw()[0]
+
+    def __treeStatistics(self, graph, statsArray):
+        """
+        Fill in the statistics on the trees of a directed graph.
+        """
+        logging.debug("Computing statistics on trees")
+        trees = graph.findTrees()
+        statsArray[self.numTreesIndex] = len(trees)
 
-            nonSingletonTrees = [c for c in trees if len(c) > 1]
-            statsArray[self.numNonSingletonTreesIndex] = len(nonSingletonTrees)
+        nonSingletonTrees = [c for c in trees if len(c) > 1]
+        statsArray[self.numNonSingletonTreesIndex] = len(nonSingletonTrees)
 
-            statsArray[self.meanTreeSizeIndex] = numpy.mean([len(x) for x in trees])
-            treeDepths = [GraphUtils.treeDepth((graph.subgraph(list(x)))) for x in trees]
-            statsArray[self.meanTreeDepthIndex] = numpy.mean(treeDepths)
+        statsArray[self.meanTreeSizeIndex] = numpy.mean([len(x) for x in trees])
+        treeDepths = [GraphUtils.treeDepth((graph.subgraph(list(x)))) for x in trees]
+        statsArray[self.meanTreeDepthIndex] = numpy.mean(treeDepths)
 
-            if len(trees) != 0:
-                maxTreeGraph = graph.subgraph(trees[0])
-                statsArray[self.maxTreeSizeIndex] = len(trees[0])
-                statsArray[self.maxTreeDepthIndex] = GraphUtils.treeDepth(maxTreeGraph)
+        if len(trees) != 0:
+            maxTreeGraph = graph.subgraph(trees[0])
+            statsArray[self.maxTreeSizeIndex] = len(trees[0])
+            statsArray[self.maxTreeDepthIndex] = GraphUtils.treeDepth(maxTreeGraph)
 
-                if len(trees) >= 2:
-                    secondTreeGraph = graph.subgraph(trees[1])
-                    statsArray[self.secondTreeSizeIndex] = len(trees[1])
-                    statsArray[self.secondTreeDepthIndex] = GraphUtils.treeDepth(secondTreeGraph)
+            if len(trees) >= 2:
+                secondTreeGraph = graph.subgraph(trees[1])
+                statsArray[self.secondTreeSizeIndex] = len(trees[1])
+                statsArray[self.secondTreeDepthIndex] = GraphUtils.treeDepth(secondTreeGraph)
+
+    def __incrementalScalarStatistics(self, incStats):
+        """
+        The scalar statistics which do not need shortest paths, taken from an
+        IncrementalGraphStatistics object.
+        """
+        statsArray = numpy.ones(self.numStats)*-1
+        statsArray[self.numVerticesIndex] = incStats.numVertices
+        statsArray[self.numEdgesIndex] = incStats.numEdges
+        statsArray[self.numDirEdgesIndex] = incStats.numDirEdges
+        statsArray[self.densityIndex] = incStats.density()
+
+        statsArray[self.numComponentsIndex] = incStats.numComponents
+        statsArray[self.numNonSingletonComponentsIndex] = incStats.numNonSingletonComponents
+        statsArray[self.numTriOrMoreComponentsIndex] = incStats.numTriOrMoreComponents
+
+        maxComponentSize, maxComponentEdges, maxComponentDegreeSum = incStats.maxComponent()
+        statsArray[self.maxComponentSizeIndex] = maxComponentSize
+        statsArray[self.maxComponentEdgesIndex] = maxComponentEdges
+
+        if incStats.numComponents != 0:
+            if incStats.numComponents >= 2:
+                statsArray[self.secondComponentSizeIndex] = incStats.secondComponentSize()
+
+            statsArray[self.meanComponentSizeIndex] = incStats.numVertices/float(incStats.numComponents)
+            statsArray[self.maxCompMeanDegreeIndex] = maxComponentDegreeSum/float(maxComponentSize)
+            statsArray[self.meanDegreeIndex] = incStats.numDirEdges/float(incStats.numVertices)
+        else:
+            statsArray[self.meanComponentSizeIndex] = 0
+            statsArray[self.geodesicDistMaxCompIndex] = 0
+            statsArray[self.meanDegreeIndex] = 0
+
+        statsArray[self.numStrongComponentsIndex] = statsArray[self.numComponentsIndex]
+        statsArray[self.maxStrongComponentSizeIndex] = statsArray[self.maxComponentSizeIndex]
 
         return statsArray
 
+    @staticmethod
+    def isNested(subgraphIndices):
+        """
+        Returns True if each list of subgraph indices contains the previous one.
+        """
+        for i in range(1, len(subgraphIndices)):
+            if not numpy.in1d(subgraphIndices[i-1], subgraphIndices[i]).all():
+                return False
+
+        return True
+
     def vectorStatistics(self, graph, treeStats=False, eigenStats=True):
         """
         Find a series of statistics for the given input graph which can be represented 
-        as vector values.
+        as vector values. For graphs with more than denseEigenSize vertices, eigenDist 
+        contains only the positive values among the numEigenvalues largest eigenvalues. 
         """
         Parameter.checkClass(graph, AbstractMatrixGraph)
         Parameter.checkBoolean(treeStats)
@@ -181,9 +298,7 @@ class GraphStatistics(object):
 
         statsDict["inDegreeDist"] = graph.inDegreeDistribution()
         statsDict["outDegreeDist"] = graph.degreeDistribution()
-        logging.debug("Computing hop counts")
-        P = graph.findAllDistances(False)
-        statsDict["hopCount"] = graph.hopCount(P)
+        statsDict["hopCount"] = self.__hopCount(graph)
         logging.debug("Computing triangle count")
         if graph.getNumVertices() != 0:
             statsDict["triangleDist"] = numpy.bincount(graph.triangleSequence())
@@ -193,14 +308,39 @@ class GraphStatistics(object):
         #Get the distribution of component sizes 
         logging.debug("Finding distribution of component sizes")
         
-        if graph.isUndirected(): 
-            components = graph.findConnectedComponents()
-            if len(components) != 0: 
-                statsDict["componentsDist"] = numpy.bincount(numpy.array([len(c) for c in components], numpy.int))
+        componentSizes = graph.findComponentLabels()[1]
+        if componentSizes.shape[0] != 0: 
+            statsDict["componentsDist"] = numpy.bincount(componentSizes)
 
+        self.__eigenStatistics(graph, statsDict, eigenStats)
+
+        if treeStats:
+            logging.debug("Computing statistics on trees")
+            trees = graph.findTrees()
+            statsDict["treeSizesDist"] = numpy.bincount([len(x) for x in trees])
+            treeDepths = [GraphUtils.treeDepth((graph.subgraph(x))) for x in trees]
+            statsDict["treeDepthsDist"] = numpy.bincount(treeDepths)
+
+        return statsDict
+
+    def __hopCount(self, graph):
+        logging.debug("Computing hop counts")
+        if self.useHyperAnf:
+            return DistanceAggregator(graph, relativeError=self.hyperAnfError).hopCount()
+        else:
+            return graph.hopCount()
+
+    def __eigenStatistics(self, graph, statsDict, eigenStats):
         #Make sure weight matrix is symmetric
-        
-        if graph.getNumVertices()!=0 and eigenStats:
+        if graph.getNumVertices() > self.denseEigenSize and eigenStats:
+            #Only the leading eigenpairs of the sparse matrix are computed
+            logging.debug("Computing sparse eigenvalues/vectors")
+            W = graph.getSparseWeightMatrix()
+            W = (W + W.T)/2
+            eigenDistribution, V = SparseGraphUtils.topEigenpairs(W, self.numEigenvalues, True, self.denseEigenSize)
+            statsDict["maxEigVector"] = V[:, 0]
+            statsDict["eigenDist"] = eigenDistribution[eigenDistribution>0]
+        elif graph.getNumVertices()!=0 and eigenStats:
             logging.debug("Computing eigenvalues/vectors")
             W = graph.getWeightMatrix()
             W = (W + W.T)/2
@@ -213,42 +353,139 @@ class GraphStatistics(object):
             statsDict["maxEigVector"] = numpy.array([])
             statsDict["eigenDist"] = numpy.array([])
 
-        if treeStats:
-            logging.debug("Computing statistics on trees")
-            trees = graph.findTrees()
-            statsDict["treeSizesDist"] = numpy.bincount([len(x) for x in trees])
-            treeDepths = [GraphUtils.treeDepth((graph.subgraph(x))) for x in trees]
-            statsDict["treeDepthsDist"] = numpy.bincount(treeDepths)
+    @staticmethod
+    def _initWorker(handle, statistics):
+        """
+        Initialise a worker process with a read-only view of the parent graph 
+        in shared memory. 
+        """
+        _workerState["handle"] = handle
+        _workerState["graph"] = handle.getGraph()
+        _workerState["statistics"] = statistics
 
-        return statsDict
+    @staticmethod
+    def _runWorker(task):
+        return _workerState["statistics"].__subgraphTask(_workerState["graph"], task)
+
+    def __subgraphTask(self, graph, task):
+        """
+        Compute the statistics of a single subgraph, where task is a tuple
+        (kind, vertex indices, arguments). 
+        """
+        kind, inds, args = task
+        subgraph = graph.subgraph(inds)
+
+        if kind == "scalar":
+            slowStats, treeStats = args
+            return self.scalarStatistics(subgraph, slowStats, treeStats)
+        elif kind == "distance":
+            statsArray, maxComponent = args
+            self.__distanceStatistics(subgraph, statsArray, maxComponent)
+            return statsArray
+        elif kind == "vector":
+            treeStats, eigenStats = args
+            return self.vectorStatistics(subgraph, treeStats, eigenStats)
+        elif kind == "incrementalVector":
+            statsDict, eigenStats = args
+            statsDict["hopCount"] = self.__hopCount(subgraph)
+            self.__eigenStatistics(subgraph, statsDict, eigenStats)
+            return statsDict
+        elif kind == "cluster":
+            clusterFunc, maxComponent = args
+            if maxComponent:
+                subComponents = subgraph.findConnectedComponents()
+                subgraph = subgraph.subgraph(subComponents[-1])
+            return clusterFunc(subgraph)
+        else:
+            raise ValueError("Unknown subgraph task: " + str(kind))
 
-    def sequenceScalarStats(self, graph, subgraphIndices, slowStats=True, treeStats=False):
+    def __mapSubgraphs(self, graph, tasks, numProcesses, printStep):
+        """
+        Compute the subgraph tasks in order, either in this process or using
+        a pool of numProcesses workers. The arrays of graph are placed in shared
+        memory once using a SharedGraph and each worker reads the graph from
+        them, so that only the subgraph indices and results are sent between
+        processes. 
+        """
+        Parameter.checkInt(numProcesses, 1, float("inf"))
+
+        if numProcesses == 1 or len(tasks) <= 1:
+            results = []
+            for i, task in enumerate(tasks):
+                Util.printIteration(i, printStep, len(tasks))
+                results.append(self.__subgraphTask(graph, task))
+            return results
+
+        handle = SharedGraph(graph)
+
+        try:
+            pool = multiprocessing.Pool(min(numProcesses, len(tasks)), GraphStatistics._initWorker, (handle, self))
+
+            try:
+                #map returns the results in the order of the tasks
+                results = pool.map(GraphStatistics._runWorker, tasks)
+            finally:
+                pool.close()
+                pool.join()
+        finally:
+            handle.close()
+
+        return results
+
+    def sequenceScalarStats(self, graph, subgraphIndices, slowStats=True, treeStats=False, numProcesses=1):
         """
         Pass in a graph and list of subgraph indices and returns a series of statistics. Each row
-        corresponds to the statistics on the subgraph. 
+        corresponds to the statistics on the subgraph. If the graph is undirected,
+        each subgraph contains the previous one and useIncremental is True, then
+        the statistics not based on shortest paths are updated incrementally
+        using IncrementalGraphStatistics. If numProcesses is greater than 1 the
+        statistics of each subgraph (or just the shortest path ones when updating
+        incrementally) are computed using a pool of processes. 
         """
         Parameter.checkClass(graph, AbstractMatrixGraph)
         for inds in subgraphIndices:
             Parameter.checkList(inds, Parameter.checkInt, [0, graph.getNumVertices()])
         Parameter.checkBoolean(slowStats)
         Parameter.checkBoolean(treeStats)
+        Parameter.checkInt(numProcesses, 1, float("inf"))
 
         numGraphs = len(subgraphIndices)
         statsMatrix = numpy.zeros((numGraphs, self.numStats))
 
-        for i in range(numGraphs):
-            Util.printIteration(i, self.printStep, numGraphs)
-            #logging.debug("Subgraph size: " + str(len(subgraphIndices[i])))
-            subgraph = graph.subgraph(subgraphIndices[i])
-            statsMatrix[i, :] = self.scalarStatistics(subgraph, slowStats, treeStats)
+        if self.useIncremental and graph.isUndirected() and not treeStats and GraphStatistics.isNested(subgraphIndices):
+            incStats = IncrementalGraphStatistics(graph)
+            tasks = []
+
+            for i in range(numGraphs):
+                if not slowStats:
+                    Util.printIteration(i, self.printStep, numGraphs)
+                incStats.addVertices(subgraphIndices[i])
+                statsMatrix[i, :] = self.__incrementalScalarStatistics(incStats)
+
+                if slowStats:
+                    inds = numpy.unique(numpy.array(subgraphIndices[i], numpy.int64))
+                    maxComponent = numpy.searchsorted(inds, incStats.maxComponentVertices()) if incStats.numVertices != 0 else None
+                    tasks.append(("distance", inds.tolist(), (statsMatrix[i, :].copy(), maxComponent)))
+
+            if slowStats:
+                statsMatrix[:, :] = self.__mapSubgraphs(graph, tasks, numProcesses, self.printStep)
+
+            return statsMatrix
+
+        tasks = [("scalar", inds, (slowStats, treeStats)) for inds in subgraphIndices]
+
+        for i, statsArray in enumerate(self.__mapSubgraphs(graph, tasks, numProcesses, self.printStep)):
+            statsMatrix[i, :] = statsArray
 
         return statsMatrix
 
-    def meanSeqScalarStats(self, graphList, slowStats=True, treeStats=False):
+    def meanSeqScalarStats(self, graphList, slowStats=True, treeStats=False, numProcesses=1):
         """
         Pass in a list of tuples (graph, subgraphIndices) and returns a series of statistics. Each row
         corresponds to the statistics on the subgraph. All graphs must be the same size and computed 
-        from the same distribution, and the number of subgraphs must be the same.
+        from the same distribution, and the number of subgraphs must be the same. The
+        subgraphs of each graph are processed using numProcesses processes as in
+        sequenceScalarStats. 
         """
         Parameter.checkBoolean(slowStats)
         Parameter.checkBoolean(treeStats)
@@ -261,47 +498,51 @@ class GraphStatistics(object):
 
         for i in range(len(graphList)):
             (graph, subgraphIndices) = graphList[i]
-            statsMatrix[:, :, i] = self.sequenceScalarStats(graph, subgraphIndices, slowStats, treeStats)
+            statsMatrix[:, :, i] = self.sequenceScalarStats(graph, subgraphIndices, slowStats, treeStats, numProcesses)
 
         return numpy.mean(statsMatrix, 2), numpy.std(statsMatrix, 2)
 
-    def sequenceVectorStats(self, graph, subgraphIndices, treeStats=False, eigenStats=True):
+    def sequenceVectorStats(self, graph, subgraphIndices, treeStats=False, eigenStats=True, numProcesses=1):
         """
         Pass in a list of graphs are returns a series of statistics. Each list
-        element is a dict of vector statistics. 
+        element is a dict of vector statistics. As with sequenceScalarStats,
+        the degree, triangle and component distributions of nested subgraphs
+        of undirected graphs are updated incrementally, and the remaining
+        statistics are computed using numProcesses processes. 
         """
         Parameter.checkClass(graph, AbstractMatrixGraph)
         for inds in subgraphIndices:
             Parameter.checkList(inds, Parameter.checkInt, [0, graph.getNumVertices()])
         Parameter.checkBoolean(treeStats)
+        Parameter.checkInt(numProcesses, 1, float("inf"))
 
-        numGraphs = len(subgraphIndices)
-        statsDictList = []
+        if self.useIncremental and graph.isUndirected() and not treeStats and GraphStatistics.isNested(subgraphIndices):
+            incStats = IncrementalGraphStatistics(graph, True)
+            tasks = []
 
-        for i in range(numGraphs):
-            Util.printIteration(i, self.vectorPrintStep, numGraphs)
-            subgraph = graph.subgraph(subgraphIndices[i])
-            statsDictList.append(self.vectorStatistics(subgraph, treeStats, eigenStats))
+            for inds in subgraphIndices:
+                incStats.addVertices(inds)
 
-        return statsDictList
+                statsDict = {}
+                statsDict["inDegreeDist"] = incStats.degreeDistribution()
+                statsDict["outDegreeDist"] = statsDict["inDegreeDist"]
+                statsDict["triangleDist"] = incStats.triangleDistribution()
 
-    def sequenceClustering(self, graph, subgraphIndices, clusterFunc, maxComponent=True):
-        """
-        Take a graph and a sequence of indices corresponding to subgraphs and
-        compute some clusters indices for each one. 
-        """
-        numGraphs = len(subgraphIndices)
-        clusterList = []
+                if incStats.numComponents != 0:
+                    statsDict["componentsDist"] = incStats.componentDistribution()
 
-        for i in range(numGraphs):
-            Util.printIteration(i, self.vectorPrintStep, numGraphs)
-            subgraph = graph.subgraph(subgraphIndices[i])
+                tasks.append(("incrementalVector", inds, (statsDict, eigenStats)))
 
-            if maxComponent:
-                subComponents = subgraph.findConnectedComponents()
-                subgraph = subgraph.subgraph(subComponents[-1])
+            return self.__mapSubgraphs(graph, tasks, numProcesses, self.vectorPrintStep)
 
-            clusterList.append(clusterFunc(subgraph))
+        tasks = [("vector", inds, (treeStats, eigenStats)) for inds in subgraphIndices]
+        return self.__mapSubgraphs(graph, tasks, numProcesses, self.vectorPrintStep)
 
-        return clusterList
-        
\ No newline at end of file
+    def sequenceClustering(self, graph, subgraphIndices, clusterFunc, maxComponent=True, numProcesses=1):
+        """
+        Take a graph and a sequence of indices corresponding to subgraphs and
+        compute some clusters indices for each one. If numProcesses is greater 
+        than 1 then clusterFunc must be picklable, e.g. a module level function. 
+        """
+        tasks = [("cluster", inds, (clusterFunc, maxComponent)) for inds in subgraphIndices]
+        return self.__mapSubgraphs(graph, tasks, numProcesses, self.vectorPrintStep)
@@ -0,0 +1,277 @@
+"""
+Statistics of a growing sequence of nested subgraphs, updated as vertices are
+added rather than recomputed for each subgraph.
+"""
+import numpy
+import scipy.sparse
+import scipy.sparse.csgraph
+from apgl.util.Parameter import Parameter
+from apgl.util.SparseGraphUtils import SparseGraphUtils
+
+
+class IncrementalGraphStatistics(object):
+    """
+    Tracks the statistics of the subgraph of an undirected graph induced by a
+    growing set of vertices. When vertices are added, only the edges incident
+    to them are processed, as a batch of numpy arrays: degrees and edge counts
+    are updated, the components joined by the new edges are merged using the
+    connected components of the graph of contracted components and,
+    optionally, the triangles closed by the new edges are counted. The total
+    cost over a sequence of nested subgraphs is therefore proportional to the
+    size of the final subgraph.
+    """
+    def __init__(self, graph, triangles=False):
+        """
+        Create the statistics of an empty subgraph of the given graph.
+
+        :param graph: An undirected graph.
+        :type graph: :class:`apgl.graph.AbstractMatrixGraph`
+
+        :param triangles: Whether to count the triangles each vertex participates in.
+        :type triangles: :class:`bool`
+        """
+        Parameter.checkBoolean(triangles)
+        if not graph.isUndirected():
+            raise ValueError("Incremental statistics are only for undirected graphs")
+
+        self.A = SparseGraphUtils.adjacencyPattern(graph.getSparseWeightMatrix())
+        n = self.A.shape[0]
+
+        self.present = numpy.zeros(n, numpy.bool_)
+        self.marks = numpy.zeros(n, numpy.int64)
+        self.step = 0
+
+        self.numVertices = 0
+        self.numEdges = 0
+        self.numDirEdges = 0
+
+        #A forest of components whose roots are the smallest vertex of each
+        #component, with the size, edges and degree sum stored at the roots
+        self.parents = numpy.arange(n)
+        self.sizes = numpy.zeros(n, numpy.int64)
+        self.edges = numpy.zeros(n, numpy.int64)
+        self.degreeSums = numpy.zeros(n, numpy.int64)
+
+        self.numComponents = 0
+        self.numNonSingletonComponents = 0
+        self.numTriOrMoreComponents = 0
+        self.sizeCounts = numpy.zeros(n+1, numpy.int64)
+        self.maxRoot = None
+
+        self.degrees = numpy.zeros(n, numpy.int64)
+
+        self.countTriangles = triangles
+        if triangles:
+            self.triangles = numpy.zeros(n, numpy.int64)
+
+    def __find(self, vertices):
+        """
+        Return the roots of the components of an array of vertices, pointing
+        the vertices directly at their roots.
+        """
+        roots = self.parents[vertices]
+        parents = self.parents[roots]
+
+        while (parents != roots).any():
+            roots = parents
+            parents = self.parents[roots]
+
+        self.parents[vertices] = roots
+        return roots
+
+    def __addComponentSizes(self, sizes, value):
+        numpy.add.at(self.sizeCounts, sizes, value)
+        self.numComponents += value*sizes.shape[0]
+        self.numNonSingletonComponents += value*int(numpy.sum(sizes > 1))
+        self.numTriOrMoreComponents += value*int(numpy.sum(sizes > 2))
+
+    def __updateMaxRoot(self, roots):
+        """
+        The largest component is the one with the most vertices, and ties are
+        broken using the smallest vertex index, as in findConnectedComponents.
+        Since sizes only increase, it is the largest of the given roots of new
+        or merged components and the current largest component.
+        """
+        if self.maxRoot is not None:
+            roots = numpy.r_[roots, self.__find(numpy.array([self.maxRoot]))]
+
+        if roots.shape[0] != 0:
+            self.maxRoot = int(roots[numpy.lexsort((roots, -self.sizes[roots]))[0]])
+
+    def __mergeComponents(self, rows, cols, degreeSums):
+        """
+        Merge the components joined by a batch of edges, in which degreeSums
+        is the amount each edge adds to the degree sum of its component. The
+        components of the endpoints are contracted to the vertices of a graph
+        whose connected components are the merged components, and these are
+        rooted at their smallest root.
+
+        :returns: An array of the roots of the merged components.
+        """
+        numEdges = rows.shape[0]
+        roots, inds = numpy.unique(numpy.r_[self.__find(rows), self.__find(cols)], return_inverse=True)
+
+        C = scipy.sparse.csr_matrix((numpy.ones(numEdges), (inds[0:numEdges], inds[numEdges:])), shape=(roots.shape[0], roots.shape[0]))
+        numMerged, components = scipy.sparse.csgraph.connected_components(C, directed=False)
+
+        #The roots are sorted, so the first root of each merged component is the smallest
+        newRoots = roots[numpy.unique(components, return_index=True)[1]]
+        edgeComponents = components[inds[0:numEdges]]
+
+        sizes = numpy.zeros(numMerged, numpy.int64)
+        numpy.add.at(sizes, components, self.sizes[roots])
+        edges = numpy.bincount(edgeComponents, minlength=numMerged)
+        numpy.add.at(edges, components, self.edges[roots])
+        newDegreeSums = numpy.zeros(numMerged, numpy.int64)
+        numpy.add.at(newDegreeSums, edgeComponents, degreeSums)
+        numpy.add.at(newDegreeSums, components, self.degreeSums[roots])
+
+        self.__addComponentSizes(self.sizes[roots], -1)
+        self.__addComponentSizes(sizes, 1)
+
+        self.parents[roots] = newRoots[components]
+        self.sizes[newRoots] = sizes
+        self.edges[newRoots] = edges
+        self.degreeSums[newRoots] = newDegreeSums
+
+        return newRoots
+
+    def __addTriangles(self, rows, cols):
+        """
+        Count the triangles closed by a batch of edges between distinct present
+        vertices. The common neighbours of the endpoints of each edge are the
+        entries of 2 in the product of the incidence matrix of the edges with
+        A, and a triangle closed by several of the edges is counted once.
+        """
+        numEdges = rows.shape[0]
+        edgeInds = numpy.arange(numEdges)
+        M = scipy.sparse.csr_matrix((numpy.ones(2*numEdges), (numpy.r_[edgeInds, edgeInds], numpy.r_[rows, cols])), shape=(numEdges, self.A.shape[0]))
+        C = M.dot(self.A).tocoo()
+
+        common = numpy.logical_and(C.data == 2, self.present[C.col])
+        common = numpy.logical_and(common, numpy.logical_and(C.col != rows[C.row], C.col != cols[C.row]))
+        triangles = numpy.c_[rows[C.row[common]], cols[C.row[common]], C.col[common]]
+
+        if triangles.shape[0] != 0:
+            triangles = numpy.unique(numpy.sort(triangles, 1), axis=0)
+            numpy.add.at(self.triangles, triangles.ravel(), 1)
+
+    def addVertices(self, vertexIndices):
+        """
+        Add vertices to the subgraph, along with all edges between them and the
+        vertices already present. Vertices which are already present are ignored.
+
+        :param vertexIndices: A list or array of vertex indices of the graph.
+        """
+        vertexIndices = numpy.unique(numpy.array(vertexIndices, numpy.int64))
+        newVertices = vertexIndices[numpy.logical_not(self.present[vertexIndices])]
+
+        self.step += 1
+        self.present[newVertices] = True
+        self.marks[newVertices] = self.step
+        self.numVertices += newVertices.shape[0]
+
+        self.sizes[newVertices] = 1
+        self.__addComponentSizes(self.sizes[newVertices], 1)
+
+        #Edges from new vertices to present ones, counting edges between new vertices once
+        B = self.A[newVertices, :].tocoo()
+        rows = newVertices[B.row]
+        cols = B.col.astype(numpy.int64)
+        keep = numpy.logical_and(self.present[cols], numpy.logical_or(self.marks[cols] != self.step, cols >= rows))
+        rows, cols = rows[keep], cols[keep]
+        loops = rows == cols
+
+        self.numEdges += rows.shape[0]
+        self.numDirEdges += 2*rows.shape[0] - int(numpy.sum(loops))
+        numpy.add.at(self.degrees, rows, 1)
+        numpy.add.at(self.degrees, cols[numpy.logical_not(loops)], 1)
+
+        if self.countTriangles and rows.shape[0] != 0:
+            self.__addTriangles(rows[numpy.logical_not(loops)], cols[numpy.logical_not(loops)])
+
+        roots = newVertices
+        if rows.shape[0] != 0:
+            roots = numpy.r_[roots, self.__mergeComponents(rows, cols, 2 - loops)]
+
+        self.__updateMaxRoot(roots)
+
+    def density(self):
+        """
+        :returns: The density of the subgraph (see AbstractGraph.density).
+        """
+        n = self.numVertices
+
+        if n == 1 or n == 0:
+            return self.numEdges
+        else:
+            return float(2*self.numEdges)/(n*(n-1))
+
+    def maxComponent(self):
+        """
+        :returns: The size, number of edges and sum of degrees of the largest component.
+        """
+        if self.maxRoot is None:
+            return 0, 0, 0
+
+        root = self.maxRoot
+        return int(self.sizes[root]), int(self.edges[root]), int(self.degreeSums[root])
+
+    def maxComponentVertices(self):
+        """
+        :returns: A sorted array of the vertices in the largest component.
+        """
+        if self.maxRoot is None:
+            return numpy.zeros(0, numpy.int64)
+
+        vertices = numpy.nonzero(self.present)[0]
+        return vertices[self.__find(vertices) == self.maxRoot]
+
+    def secondComponentSize(self):
+        """
+        :returns: The size of the second largest component, or 0 if there is only one.
+        """
+        if self.numComponents < 2:
+            return 0
+
+        maxSize = self.sizes[self.maxRoot]
+        if self.sizeCounts[maxSize] >= 2:
+            return int(maxSize)
+
+        return int(numpy.nonzero(self.sizeCounts[0:maxSize])[0][-1])
+
+    @staticmethod
+    def __distribution(counts, scale=1):
+        """
+        Spread an array of counts by scale, without the trailing zeros.
+        """
+        nonZeros = numpy.nonzero(counts)[0]
+        if nonZeros.shape[0] == 0:
+            return numpy.array([], numpy.int64)
+
+        distribution = numpy.zeros(scale*nonZeros[-1]+1, numpy.int64)
+        distribution[0::scale] = counts[0:nonZeros[-1]+1]
+
+        return distribution
+
+    def degreeDistribution(self):
+        """
+        :returns: A vector whose ith element is the number of vertices of degree i.
+        """
+        return IncrementalGraphStatistics.__distribution(numpy.bincount(self.degrees[self.present]))
+
+    def componentDistribution(self):
+        """
+        :returns: A vector whose ith element is the number of components of size i.
+        """
+        return IncrementalGraphStatistics.__distribution(self.sizeCounts)
+
+    def triangleDistribution(self):
+        """
+        :returns: A vector whose ith element is the number of vertices with triangle sequence i (see AbstractMatrixGraph.triangleSequence).
+        """
+        if not self.countTriangles:
+            raise ValueError("Triangles must be requested in the constructor")
+
+        #Each triangle is counted twice in the triangle sequence of an undirected graph
+        return IncrementalGraphStatistics.__distribution(numpy.bincount(self.triangles[self.present]), 2)
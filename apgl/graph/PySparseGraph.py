@@ -3,7 +3,9 @@ import scipy.sparse as sparse
 from apgl.graph.AbstractMatrixGraph import AbstractMatrixGraph
 from apgl.graph.AbstractVertexList import AbstractVertexList
 from apgl.util.Parameter import Parameter
+from apgl.util.MatrixCache import MatrixCache
 from apgl.util.PySparseUtils import PySparseUtils
+from apgl.util.SparseGraphUtils import SparseGraphUtils
 
 from pysparse.sparse.pysparseMatrix import PysparseMatrix
 from apgl.graph import GeneralVertexList 
@@ -119,6 +121,26 @@ class PySparseGraph(AbstractMatrixGraph):
         else:
             self.W[vertexIndex1, vertexIndex2] = edge
 
+        self.modified()
+
+    def addEdges(self, edgeIndexArray, edgeValues=[]):
+        """
+        Takes a numpy array of edge index pairs, and edge values and adds them
+        to this graph using a single put. If an edge appears more than once 
+        then the last value is used. 
+
+        :param edgeIndexArray: The array of edge indices with each being a pair of indices.
+        :type edgeIndexArray: :class:`numpy.ndarray`
+
+        :param edgeValues: The list of edge values
+        :type edgeValues: :class:`list`
+        """
+        rows, cols, values = SparseGraphUtils.edgeEntries(edgeIndexArray, edgeValues, self.vList.getNumVertices(), self.undirected)
+
+        if rows.shape[0] != 0:
+            self.W.put(numpy.array(values, numpy.float64), rows, cols)
+        self.modified()
+
     def getNumEdges(self):
         """
         Returns the total number of edges in this graph.
@@ -142,6 +164,7 @@ class PySparseGraph(AbstractMatrixGraph):
         """
         return self.W.nnz
 
+    @MatrixCache.cached
     def outDegreeSequence(self):
         """
         Return a vector of the (out)degree for each vertex.
@@ -155,6 +178,7 @@ class PySparseGraph(AbstractMatrixGraph):
         degrees = numpy.array(degrees.getNumpyArray().ravel(), numpy.int)
         return degrees
 
+    @MatrixCache.cached
     def inDegreeSequence(self):
         """
         Return a vector of the (in)degree sequence for each vertex.
@@ -168,6 +192,7 @@ class PySparseGraph(AbstractMatrixGraph):
         degrees = numpy.array(degrees.getNumpyArray().ravel(), numpy.int)
         return degrees
 
+    @MatrixCache.cached
     def nativeAdjacencyMatrix(self):
         """
         Return the adjacency matrix in sparse format.
@@ -210,6 +235,16 @@ class PySparseGraph(AbstractMatrixGraph):
         W = PysparseMatrix(matrix=self.W)
         return W.getNumpyArray()
 
+    def getSparseWeightMatrix(self):
+        """
+        Return the weight matrix as a scipy.sparse csr_matrix.
+        """
+        (rows, cols) = PySparseUtils.nonzero(self.W)
+        values = numpy.zeros(len(rows))
+        self.W.take(values, rows, cols)
+
+        return sparse.csr_matrix((values, (rows, cols)), shape=(self.W.shape[0], self.W.shape[1]))
+
     def getAllDirEdges(self):
         """
         Returns the set of directed edges of the current graph as a matrix in which each
@@ -261,6 +296,7 @@ class PySparseGraph(AbstractMatrixGraph):
         #Not sure why this doesn't work 
         #self.W.scale(0)
         self.W = spmatrix.ll_mat(self.getNumVertices(), self.getNumVertices())
+        self.modified()
 
     def setWeightMatrix(self, W):
         """
@@ -289,6 +325,8 @@ class PySparseGraph(AbstractMatrixGraph):
         else: 
             raise ValueError("Invalid matrix type: " + str(type(W)))
 
+        self.modified()
+
     def weightMatrixType(self):
         """
         Returns the type of the sparse matrix used to store edge weights.
@@ -443,5 +481,5 @@ class PySparseGraph(AbstractMatrixGraph):
                   
             for i in range(rowInds.shape[0]):
                 self.W[int(rowInds[i]), int(colInds[i])] = W[int(rowInds[i]), int(colInds[i])]
-        
-        
\ No newline at end of file
+
+        self.modified()
@@ -0,0 +1,174 @@
+"""
+A handle to a matrix graph whose arrays are held in shared memory, so that
+worker processes can read the same graph without copying it.
+"""
+import numpy
+import weakref
+from multiprocessing import shared_memory
+from apgl.util.Parameter import Parameter
+from apgl.graph.AbstractMatrixGraph import AbstractMatrixGraph
+from apgl.graph.VertexList import VertexList
+
+
+class SharedGraph(object):
+    """
+    Publishes the arrays of a graph in multiprocessing.shared_memory blocks:
+    the CSR arrays of a sparse weight matrix (see AbstractMatrixGraph.getCsrArrays)
+    or a dense weight matrix, and the feature matrix V of a VertexList. Other
+    vertex lists are pickled with the handle.
+
+    The handle itself is small, and is pickled by name only, so it can be passed
+    to worker processes, for example as an initializer argument of a
+    multiprocessing.Pool. Each process then calls getGraph to rebuild a graph
+    whose arrays are read-only views of the shared blocks. Sparse graphs in csr
+    format use the blocks directly, whereas other formats are converted.
+
+    The process which created the handle owns the blocks, and close unlinks
+    them in the owner. Each array of a graph returned by getGraph keeps its
+    block mapped, so the graph and any arrays taken from it remain valid after
+    the handle is closed, and a block is detached once the handle is closed and
+    no arrays use it. A handle can be used as a context manager which closes it
+    on exit.
+    """
+    def __init__(self, graph):
+        """
+        Copy the arrays of a graph into shared memory.
+
+        :param graph: The graph to share.
+        :type graph: :class:`apgl.graph.AbstractMatrixGraph`
+        """
+        Parameter.checkClass(graph, AbstractMatrixGraph)
+
+        state = graph.__getstate__()
+        self.graphClass = graph.__class__
+        self.blocks = {}
+        self.memories = {}
+        self.owner = True
+        self.closed = False
+        self.graphRef = None
+
+        if type(state["vList"]) == VertexList:
+            state["V"] = state["vList"].getVertices()
+            state["vList"] = None
+
+        try:
+            for key in self.arrayKeys:
+                if state.get(key) is not None:
+                    self.__share(key, numpy.ascontiguousarray(state[key]))
+                    state[key] = None
+        except:
+            self.close()
+            raise
+
+        self.state = state
+
+    def __share(self, key, array):
+        """
+        Copy an array into a new shared memory block.
+        """
+        memory = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.memories[key] = memory
+        numpy.ndarray(array.shape, array.dtype, buffer=memory.buf)[:] = array
+        self.blocks[key] = (memory.name, array.shape, array.dtype.str)
+
+    def getGraph(self):
+        """
+        Returns a graph whose arrays are read-only views of the shared memory
+        blocks, attaching to them on the first call in each process. The same
+        graph is returned while it is in use.
+
+        :returns: A graph of the same class as the shared graph.
+        """
+        graph = self.graphRef() if self.graphRef is not None else None
+        if graph is not None:
+            return graph
+
+        if self.closed:
+            raise ValueError("Cannot get the graph of a closed handle")
+
+        state = dict(self.state)
+
+        for key, (name, shape, dtype) in self.blocks.items():
+            if key not in self.memories:
+                self.memories[key] = shared_memory.SharedMemory(name=name)
+
+            state[key] = numpy.asarray(_SharedBuffer(self.memories[key], shape, dtype))
+
+        if "V" in self.blocks:
+            vList = VertexList(state["V"].shape[0], 0)
+            vList.V = state.pop("V")
+            state["vList"] = vList
+
+        graph = self.graphClass.__new__(self.graphClass)
+        graph.__setstate__(state)
+        self.graphRef = weakref.ref(graph)
+
+        return graph
+
+    def getNumBytes(self):
+        """
+        :returns: The total size in bytes of the shared memory blocks.
+        """
+        numBytes = 0
+        for name, shape, dtype in self.blocks.values():
+            numBytes += int(numpy.prod(shape))*numpy.dtype(dtype).itemsize
+
+        return numBytes
+
+    def isOwner(self):
+        """
+        :returns: True if this process created the shared memory blocks.
+        """
+        return self.owner
+
+    def close(self):
+        """
+        Close the handle so that getGraph can no longer be called. In the owner
+        the blocks are also unlinked, so that the memory is freed once every
+        process has detached. A block is detached when no arrays of a graph from
+        getGraph use it, so closing the handle does not invalidate such a graph.
+        Closing a closed handle does nothing.
+        """
+        if self.owner and not self.closed:
+            for memory in self.memories.values():
+                memory.unlink()
+
+        #The blocks are detached when the last reference to them is released
+        self.memories = {}
+        self.graphRef = None
+        self.closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    def __getstate__(self):
+        return {"graphClass": self.graphClass, "state": self.state, "blocks": self.blocks}
+
+    def __setstate__(self, state):
+        self.graphClass = state["graphClass"]
+        self.state = state["state"]
+        self.blocks = state["blocks"]
+        self.memories = {}
+        self.owner = False
+        self.closed = False
+        self.graphRef = None
+
+    #The state entries which are stored in shared memory
+    arrayKeys = ["W", "indptr", "indices", "data", "V"]
+
+
+class _SharedBuffer(object):
+    """
+    Exposes a shared memory block through the numpy array interface, so that a
+    read-only array made from it (and every view of that array) keeps the block
+    mapped until the array is released.
+    """
+    def __init__(self, memory, shape, dtype):
+        dtype = numpy.dtype(dtype)
+        address = numpy.ndarray(shape, dtype, buffer=memory.buf).__array_interface__["data"][0]
+
+        self.memory = memory
+        self.__array_interface__ = {"shape": tuple(shape), "typestr": dtype.str, "descr": dtype.descr, "data": (address, True), "version": 3}
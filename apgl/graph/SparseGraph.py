@@ -7,6 +7,8 @@ from apgl.graph.VertexList import VertexList
 from apgl.util.Util import Util
 from apgl.util.SparseUtils import SparseUtils
 from apgl.util.Parameter import Parameter
+from apgl.util.MatrixCache import MatrixCache
+from apgl.util.SparseGraphUtils import SparseGraphUtils
 import scipy.sparse as sparse
 import scipy.io
 import numpy
@@ -18,6 +20,12 @@ class SparseGraph(AbstractMatrixGraph):
     is immutable (see VertexList), however edges can be added or removed. Only
     non-zero edges can be added. Uses scipy.sparse for the underlying matrix
     representation. 
+
+    Edges added or removed using addEdge and removeEdge are recorded in an edge
+    log and merged into the weight matrix in a single operation when the
+    weight matrix is next read, or when commit is called. This avoids
+    restructuring the sparse matrix for each edge. getEdge reads the log
+    without merging it. 
     '''
     def __init__(self, vertices, undirected=True, W=None, dtype=numpy.float, frmt="csr"):
         """
@@ -127,6 +135,7 @@ class SparseGraph(AbstractMatrixGraph):
         """
         return self.W.nonzero()[0].shape[0]
     
+    @MatrixCache.cached
     def outDegreeSequence(self):
         """
         :returns: a vector of the (out)degree sequence for each vertex.
@@ -136,6 +145,7 @@ class SparseGraph(AbstractMatrixGraph):
 
         return degrees 
 
+    @MatrixCache.cached
     def inDegreeSequence(self):
         """
         :returns: a vector of the (in)degree sequence for each vertex.
@@ -282,6 +292,28 @@ class SparseGraph(AbstractMatrixGraph):
             raise ValueError("Weight matrix of undirected graph must be symmetric")
 
         self.W = self.weightMatrixType()(W)
+        self.modified()
+
+    def addEdges(self, edgeIndexArray, edgeValues=[]):
+        """
+        Takes a numpy array of edge index pairs, and edge values and adds them
+        to this graph. The array is 2 dimensional such that each row is a pair
+        of edge indices. If an edge appears more than once then the last value
+        is used. The edges are formed into a sparse matrix which is merged into 
+        the weight matrix in a single operation, replacing existing values. 
+
+        :param edgeIndexArray: The array of edge indices with each being a pair of indices.
+        :type edgeIndexArray: :class:`numpy.ndarray`
+
+        :param edgeValues: The list of edge values
+        :type edgeValues: :class:`list`
+        """
+        rows, cols, values = SparseGraphUtils.edgeEntries(edgeIndexArray, edgeValues, self.vList.getNumVertices(), self.undirected)
+
+        if rows.shape[0] != 0:
+            self.__mergeEntries(rows, cols, values)
+
+        self.modified()
 
     def setWeightMatrixSparse(self, W):
         """
@@ -301,6 +333,7 @@ class SparseGraph(AbstractMatrixGraph):
             raise ValueError("Weight matrix of undirected graph must be symmetric")
 
         self.W = W
+        self.modified()
 
     def weightMatrixType(self):
         """
@@ -308,9 +341,36 @@ class SparseGraph(AbstractMatrixGraph):
         """
         return type(self.W)
 
+    def addEdge(self, vertexIndex1, vertexIndex2, edge=1):
+        """
+        Add a non-zero edge between two vertices. The edge is recorded in the 
+        edge log (see commit). 
+
+        :param vertexIndex1: The index of the first vertex.
+        :type vertexIndex1: :class:`int`
+
+        :param vertexIndex2: The index of the second vertex.
+        :type vertexIndex2: :class:`int`
+
+        :param edge: The value of the edge.
+        :type edge: :class:`float`
+        """
+        Parameter.checkIndex(vertexIndex1, 0, self.vList.getNumVertices())
+        Parameter.checkIndex(vertexIndex2, 0, self.vList.getNumVertices())
+
+        if edge == 0 or edge == float('inf'):
+            raise ValueError("Cannot add a zero or infinite edge")
+
+        edge = self.__W.dtype.type(edge)
+        self.edgeLog[(int(vertexIndex1), int(vertexIndex2))] = edge
+        if self.undirected:
+            self.edgeLog[(int(vertexIndex2), int(vertexIndex1))] = edge
+        self.modified()
+
     def removeEdge(self, vertexIndex1, vertexIndex2):
         """
-        Remove an edge between two vertices.
+        Remove an edge between two vertices. The removal is recorded in the 
+        edge log (see commit). 
 
         :param vertexIndex1: The index of the first vertex.
         :type vertexIndex1: :class:`int`
@@ -318,21 +378,79 @@ class SparseGraph(AbstractMatrixGraph):
         :param vertexIndex2: The index of the second vertex.
         :type vertexIndex2: :class:`int`
         """
-        super(SparseGraph, self).removeEdge(vertexIndex1, vertexIndex2)
+        Parameter.checkIndex(vertexIndex1, 0, self.vList.getNumVertices())
+        Parameter.checkIndex(vertexIndex2, 0, self.vList.getNumVertices())
+
+        self.edgeLog[(int(vertexIndex1), int(vertexIndex2))] = 0
+        if self.undirected:
+            self.edgeLog[(int(vertexIndex2), int(vertexIndex1))] = 0
+        self.modified()
 
-        self.W.eliminate_zeros()
+    def getEdge(self, vertexIndex1, vertexIndex2):
+        """
+        Get the value of an edge, or None if no edge exists. 
 
+        :param vertexIndex1: The index of the first vertex.
+        :type vertexIndex1: :class:`int`
+
+        :param vertexIndex2: The index of the second vertex.
+        :type vertexIndex2: :class:`int`
+
+        :returns:  The value of the edge between the given vertex indices.
+        """
+        Parameter.checkIndex(vertexIndex1, 0, self.vList.getNumVertices())
+        Parameter.checkIndex(vertexIndex2, 0, self.vList.getNumVertices())
+
+        edge = self.edgeLog.get((int(vertexIndex1), int(vertexIndex2)))
+        if edge is None:
+            edge = self.__W[vertexIndex1, vertexIndex2]
+
+        if edge == 0:
+            return None
+        else:
+            return edge
+
+    def commit(self):
+        """
+        Merge the edges added and removed since the last commit into the weight
+        matrix. This is called automatically whenever the weight matrix is read. 
+        """
+        if not self.edgeLog:
+            return
+
+        entries = numpy.array(list(self.edgeLog.keys()), numpy.int64)
+        values = numpy.array(list(self.edgeLog.values()))
+        self.edgeLog = {}
+
+        #The log has one write per entry, which lastWrites sorts by row and column
+        rows, cols, values = SparseGraphUtils.lastWrites(entries[:, 0], entries[:, 1], values, self.vList.getNumVertices())
+        self.__mergeEntries(rows, cols, values)
+
+    def __mergeEntries(self, rows, cols, values):
+        """
+        Replace the given unique entries of the weight matrix, in which a value
+        of zero removes the entry, using a single sparse addition. 
+        """
+        W = SparseGraphUtils.replaceEntries(self.W, rows, cols, values)
+        self.W = self.weightMatrixType()(W)
+
+    def __getW(self):
+        if self.edgeLog:
+            self.commit()
+        return self.__W
+
+    def __setW(self, W):
+        self.__W = W
+        self.edgeLog = {}
+
+    @MatrixCache.cached
     def nativeAdjacencyMatrix(self):
         """
         :returns: the adjacency matrix in the native sparse format.
         """
-        try: 
-            self.W.eliminate_zeros()
-        except AttributeError: 
-            pass 
-        
-        A = self.W/self.W
-        return A
+        #W is not modified since its arrays may be memory mapped read-only 
+        A = SparseGraphUtils.adjacencyPattern(self.W)
+        return self.weightMatrixType()(A)
 
     def setDiff(self, graph):
         """
@@ -377,7 +495,7 @@ class SparseGraph(AbstractMatrixGraph):
     @staticmethod
     def loadMatrix(filename):
         W = scipy.io.mmread(filename)
-        return W.tolil()
+        return W.tocsr()
 
     def saveMatrix(self, W, filename):
         scipy.io.mmwrite(filename, W)
@@ -392,6 +510,8 @@ class SparseGraph(AbstractMatrixGraph):
         if sparse.isspmatrix_csr(self.W) or sparse.isspmatrix_csc(self.W):
             self.W.eliminate_zeros()
 
+        self.modified()
+
     def concat(self, graph):
         """
         Take a new graph and concatenate it to the current one. Returns a new graph
@@ -418,6 +538,7 @@ class SparseGraph(AbstractMatrixGraph):
 
         return newGraph 
 
+    @MatrixCache.cached
     def normalisedLaplacianSym(self, outDegree=True, sparse=False):
         """
         Compute the normalised symmetric laplacian matrix using L = I - D^-1/2 W D^-1/2,
@@ -451,6 +572,7 @@ class SparseGraph(AbstractMatrixGraph):
         else:
             return L.toarray()
 
+    @MatrixCache.cached
     def laplacianMatrix(self, outDegree=True, sparse=False):
         """
         Return the Laplacian matrix of this graph, which is defined as L_{ii} = deg(i)
@@ -486,6 +608,7 @@ class SparseGraph(AbstractMatrixGraph):
         in order to improve the efficiency of certain operations. 
         """
         self.W = self.W.tocsr()
+        self.modified()
         
     def toCsc(self): 
         """
@@ -493,6 +616,7 @@ class SparseGraph(AbstractMatrixGraph):
         in order to improve the efficiency of certain operations. 
         """
         self.W = self.W.tocsc()
+        self.modified()
 
     def __str__(self):
         output= super(SparseGraph, self).__str__()
@@ -500,7 +624,8 @@ class SparseGraph(AbstractMatrixGraph):
         return output
 
     #Class data 
-    W = None
+    W = property(__getW, __setW, doc="The weight matrix, with the edge log merged")
+    edgeLog = None
     vList = None
     undirected = None
     
\ No newline at end of file
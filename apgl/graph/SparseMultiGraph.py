@@ -3,6 +3,14 @@ Represents a sparse multigraph, which can be directed or undirected, and has wei
 on the edges.  The list of vertices is immutable (see VertexList), however edges
 can be added or removed. The graph is efficient in memory usage if there are a
 sparse set of edges. Note that you cannot add edges with zero weights.
+
+By default each edge type is stored in a separate SparseGraph. In stacked mode
+all edge types are stored in a single csr_matrix of size numVertices x 
+(numVertices*maxEdgeTypes), in which the column of an edge is 
+edgeTypeIndex*numVertices + vertexIndex2, so that the neighbours of a vertex 
+over all edge types are found in a single row. As in SparseGraph, edges added
+or removed in stacked mode are recorded in an edge log which is merged into the
+matrix when it is read. 
 Created on 3 Feb 2010 
 
 @author: charanpal
@@ -10,19 +18,37 @@ Created on 3 Feb 2010
 from apgl.graph.AbstractMultiGraph import AbstractMultiGraph
 from apgl.graph.SparseGraph import SparseGraph
 from apgl.util.Parameter import Parameter
+from apgl.util.SparseGraphUtils import SparseGraphUtils
+import scipy.sparse
 import numpy
 
 class SparseMultiGraph(AbstractMultiGraph):
-    def __init__(self, vList, maxEdgeTypes, undirected=True):
+    def __init__(self, vList, maxEdgeTypes, undirected=True, stacked=False):
+        """
+        Create a multigraph with the given vertices and number of edge types. 
+
+        @param vList: The AbstractVertexList of vertices. 
+        @param maxEdgeTypes: The number of edge types. 
+        @param undirected: Whether the graph is undirected. 
+        @param stacked: Whether to store all edge types in a single matrix. 
+        """
         Parameter.checkInt(maxEdgeTypes, 1, float('inf'))
+        Parameter.checkBoolean(stacked)
         self.vList = vList
         self.undirected = undirected
         self.maxEdgeTypes = maxEdgeTypes
+        self.stacked = stacked
 
         self.sparseGraphs = []
+        self.W = None
+        self.edgeLog = {}
 
-        for i in range(maxEdgeTypes):
-            self.sparseGraphs.append(SparseGraph(vList, undirected))
+        if stacked:
+            numVertices = vList.getNumVertices()
+            self.W = scipy.sparse.csr_matrix((numVertices, numVertices*maxEdgeTypes))
+        else:
+            for i in range(maxEdgeTypes):
+                self.sparseGraphs.append(SparseGraph(vList, undirected))
 
     def addEdge(self, vertexIndex1, vertexIndex2, edgeTypeIndex, edge=1):
         """ Add an edge to the graph between two vertices.
@@ -32,7 +58,40 @@ class SparseMultiGraph(AbstractMultiGraph):
         @param edge: The value to assign to the edge.
         """
         Parameter.checkIndex(edgeTypeIndex, 0, self.maxEdgeTypes)
-        self.sparseGraphs[edgeTypeIndex].addEdge(vertexIndex1, vertexIndex2, edge)
+
+        if not self.stacked:
+            self.sparseGraphs[edgeTypeIndex].addEdge(vertexIndex1, vertexIndex2, edge)
+            return
+
+        Parameter.checkIndex(vertexIndex1, 0, self.vList.getNumVertices())
+        Parameter.checkIndex(vertexIndex2, 0, self.vList.getNumVertices())
+
+        if edge == 0 or edge == float('inf'):
+            raise ValueError("Cannot add a zero or infinite edge")
+
+        self.__logEdge(vertexIndex1, vertexIndex2, edgeTypeIndex, edge)
+
+    def addEdges(self, edgeIndexArray, edgeTypeIndex, edgeValues=[]):
+        """
+        Add an array of edges of one type, in which each row is a pair of vertex
+        indices, as a single sparse matrix operation (see SparseGraph.addEdges). 
+
+        @param edgeIndexArray: The array of edge indices with each being a pair of indices.
+        @param edgeTypeIndex: The type of the edges. 
+        @param edgeValues: The list of edge values, or an empty list for edges of value 1. 
+        """
+        Parameter.checkIndex(edgeTypeIndex, 0, self.maxEdgeTypes)
+
+        if not self.stacked:
+            self.sparseGraphs[edgeTypeIndex].addEdges(edgeIndexArray, edgeValues)
+            return
+
+        numVertices = self.vList.getNumVertices()
+        rows, cols, values = SparseGraphUtils.edgeEntries(edgeIndexArray, edgeValues, numVertices, self.undirected)
+
+        if rows.shape[0] != 0:
+            self.commit()
+            self.W = SparseGraphUtils.replaceEntries(self.W, rows, cols + edgeTypeIndex*numVertices, values)
 
     def removeEdge(self, vertexIndex1, vertexIndex2, edgeTypeIndex):
         """ Remove an edge between two vertices.
@@ -41,7 +100,68 @@ class SparseMultiGraph(AbstractMultiGraph):
         @param vertexIndex1: The index of the second vertex.
         """
         Parameter.checkIndex(edgeTypeIndex, 0, self.maxEdgeTypes)
-        self.sparseGraphs[edgeTypeIndex].removeEdge(vertexIndex1, vertexIndex2)
+
+        if not self.stacked:
+            self.sparseGraphs[edgeTypeIndex].removeEdge(vertexIndex1, vertexIndex2)
+            return
+
+        Parameter.checkIndex(vertexIndex1, 0, self.vList.getNumVertices())
+        Parameter.checkIndex(vertexIndex2, 0, self.vList.getNumVertices())
+        self.__logEdge(vertexIndex1, vertexIndex2, edgeTypeIndex, 0)
+
+    def __logEdge(self, vertexIndex1, vertexIndex2, edgeTypeIndex, edge):
+        """
+        Record the value of an edge in stacked mode in the edge log, in which a
+        value of zero removes the edge. 
+        """
+        offset = edgeTypeIndex*self.vList.getNumVertices()
+        self.edgeLog[(int(vertexIndex1), int(vertexIndex2) + offset)] = edge
+        if self.undirected:
+            self.edgeLog[(int(vertexIndex2), int(vertexIndex1) + offset)] = edge
+
+    def commit(self):
+        """
+        Merge the edge log into the stacked weight matrix in stacked mode.
+        """
+        if not self.stacked or not self.edgeLog:
+            return
+
+        entries = numpy.array(list(self.edgeLog.keys()), numpy.int64)
+        values = numpy.array(list(self.edgeLog.values()), numpy.float64)
+        self.edgeLog = {}
+
+        self.W = SparseGraphUtils.replaceEntries(self.W, entries[:, 0], entries[:, 1], values)
+
+    def getStackedWeightMatrix(self):
+        """
+        Returns the csr_matrix of size numVertices x (numVertices*maxEdgeTypes)
+        in which the weight matrices of the edge types are stacked horizontally. 
+        In stacked mode this is the matrix used to store the edges. 
+        """
+        if self.stacked:
+            self.commit()
+            if not self.W.has_sorted_indices:
+                self.W.sort_indices()
+            return self.W
+        else:
+            return scipy.sparse.hstack([graph.getSparseWeightMatrix() for graph in self.sparseGraphs], format="csr")
+
+    def __stackedEntries(self, edgeTypeIndex):
+        """
+        Returns the rows, vertex columns and edge types of the entries of the 
+        stacked weight matrix, optionally only of a given edge type. 
+        """
+        W = self.getStackedWeightMatrix()
+        numVertices = self.vList.getNumVertices()
+        rows = numpy.repeat(numpy.arange(numVertices), numpy.diff(W.indptr))
+        cols = W.indices % numVertices
+        edgeTypes = W.indices // numVertices
+
+        if edgeTypeIndex != -1:
+            inds = edgeTypes == edgeTypeIndex
+            rows, cols, edgeTypes = rows[inds], cols[inds], edgeTypes[inds]
+
+        return rows, cols, edgeTypes
 
     def getNumEdges(self, edgeTypeIndex=-1):
         """
@@ -50,6 +170,13 @@ class SparseMultiGraph(AbstractMultiGraph):
         """
         Parameter.checkIndex(edgeTypeIndex, -1, self.maxEdgeTypes)
 
+        if self.stacked:
+            rows, cols, edgeTypes = self.__stackedEntries(edgeTypeIndex)
+            if self.undirected:
+                return (rows.shape[0] + numpy.sum(rows == cols))//2
+            else:
+                return rows.shape[0]
+
         if edgeTypeIndex == -1:
             numEdges = 0
             for i in range(0, self.maxEdgeTypes):
@@ -69,10 +196,22 @@ class SparseMultiGraph(AbstractMultiGraph):
 
     def getNeighboursByEdgeType(self, vertexIndex1, edgeTypeIndex):
         """ Return a iterable item of neighbours (indices) """
+        if self.stacked:
+            W = self.getStackedWeightMatrix()
+            numVertices = self.vList.getNumVertices()
+            row = W.indices[W.indptr[vertexIndex1]:W.indptr[vertexIndex1+1]]
+            start, end = numpy.searchsorted(row, [edgeTypeIndex*numVertices, (edgeTypeIndex+1)*numVertices])
+            return (row[start:end] - edgeTypeIndex*numVertices).tolist()
+
         return list(self.sparseGraphs[edgeTypeIndex].neighbours(vertexIndex1))
 
     def neighbours(self, vertexIndex1):
         """ Return a list of all neighbours """ 
+        if self.stacked:
+            W = self.getStackedWeightMatrix()
+            row = W.indices[W.indptr[vertexIndex1]:W.indptr[vertexIndex1+1]]
+            return numpy.unique(row % self.vList.getNumVertices()).tolist()
+
         neighbours = []
 
         for i in range(0, self.maxEdgeTypes):
@@ -83,6 +222,21 @@ class SparseMultiGraph(AbstractMultiGraph):
 
     def getEdge(self, vertexIndex1, vertexIndex2, edgeTypeIndex):
         """ Return an edge between two vertices """
+        if self.stacked:
+            Parameter.checkIndex(vertexIndex1, 0, self.vList.getNumVertices())
+            Parameter.checkIndex(vertexIndex2, 0, self.vList.getNumVertices())
+            Parameter.checkIndex(edgeTypeIndex, 0, self.maxEdgeTypes)
+            col = edgeTypeIndex*self.vList.getNumVertices() + vertexIndex2
+
+            edge = self.edgeLog.get((int(vertexIndex1), int(col)))
+            if edge is None:
+                edge = self.W[vertexIndex1, col]
+
+            if edge == 0:
+                return None
+            else:
+                return edge
+
         return self.sparseGraphs[edgeTypeIndex].getEdge(vertexIndex1, vertexIndex2)
 
     def getVertex(self, vertexIndex):
@@ -101,6 +255,15 @@ class SparseMultiGraph(AbstractMultiGraph):
         """
         Return an array of edges with each row representing an edge and its type index.
         """
+        if self.stacked:
+            rows, cols, edgeTypes = self.__stackedEntries(-1)
+            if self.undirected:
+                inds = rows >= cols
+                rows, cols, edgeTypes = rows[inds], cols[inds], edgeTypes[inds]
+
+            inds = numpy.lexsort((cols, rows, edgeTypes))
+            return numpy.array(numpy.c_[rows[inds], cols[inds], edgeTypes[inds]], numpy.float64)
+
         allEdges = numpy.zeros((0, 3))
 
         for i in range(0, self.maxEdgeTypes):
@@ -111,6 +274,15 @@ class SparseMultiGraph(AbstractMultiGraph):
         return allEdges
 
     def getSparseGraph(self, edgeTypeIndex):
+        """
+        Return the SparseGraph of the edges of a given type. In stacked mode 
+        this is a new graph with a copy of the edges. 
+        """
+        if self.stacked:
+            numVertices = self.vList.getNumVertices()
+            W = self.getStackedWeightMatrix()[:, edgeTypeIndex*numVertices:(edgeTypeIndex+1)*numVertices]
+            return SparseGraph(self.vList, self.undirected, W=scipy.sparse.csr_matrix(W))
+
         return self.sparseGraphs[edgeTypeIndex]
 
 
@@ -1,10 +1,14 @@
 from apgl.graph.SparseGraph import SparseGraph
 from apgl.graph.GeneralVertexList import GeneralVertexList
 from apgl.graph.DenseGraph import DenseGraph
+from apgl.graph.CsrGraph import CsrGraph
+from apgl.graph.SharedGraph import SharedGraph
 from apgl.graph.DictGraph import DictGraph
 from apgl.graph.VertexList import VertexList
 from apgl.graph.GraphUtils import GraphUtils
 from apgl.graph.GraphStatistics import GraphStatistics
+from apgl.graph.DistanceAggregator import DistanceAggregator
+from apgl.graph.IncrementalGraphStatistics import IncrementalGraphStatistics
 from apgl.graph.AbstractSingleGraph import AbstractSingleGraph
 from apgl.graph.AbstractMatrixGraph import AbstractMatrixGraph
 
@@ -0,0 +1,159 @@
+from apgl.graph.CsrGraph import CsrGraph
+from apgl.graph.DenseGraph import DenseGraph
+from apgl.graph.GeneralVertexList import GeneralVertexList
+from apgl.graph.VertexList import VertexList
+from apgl.graph.test.MatrixGraphTest import MatrixGraphTest
+from apgl.util.PathDefaults import PathDefaults
+import scipy.sparse as sparse
+import numpy.testing as nptst
+import unittest
+import numpy
+
+class CsrGraphTest(unittest.TestCase, MatrixGraphTest):
+    def setUp(self):
+        self.GraphType = CsrGraph
+        self.initialise()
+
+    def testInit(self):
+        numVertices = 10
+        vList = VertexList(numVertices, 1)
+        graph = CsrGraph(vList)
+        self.assertEquals(graph.weightMatrixType(), sparse.csr_matrix)
+        self.assertEquals(graph.weightMatrixDType(), numpy.float64)
+        self.assertEquals(graph.getNumEdges(), 0)
+
+        self.assertRaises(ValueError, CsrGraph, [])
+        self.assertRaises(ValueError, CsrGraph, vList, 1)
+
+        W = numpy.zeros((numVertices, numVertices))
+        W[0, 1] = 1
+        self.assertRaises(ValueError, CsrGraph, vList, True, W)
+
+        W[1, 0] = 0.5
+        graph = CsrGraph(vList, False, W)
+        self.assertEquals(graph.getEdge(1, 0), 0.5)
+
+        graph = CsrGraph(numVertices, W=sparse.csr_matrix(W + W.T))
+        self.assertEquals(graph[1, 0], 1.5)
+
+        graph = CsrGraph(0)
+        self.assertEquals(graph.getNumEdges(), 0)
+        self.assertEquals(graph.getWeightMatrix().shape, (0, 0))
+
+    def testCompactStorage(self):
+        numVertices = 10
+        graph = CsrGraph(numVertices)
+        graph.addEdges(numpy.array([[0, 1], [2, 3], [1, 4], [5, 5]]))
+
+        self.assertEquals(graph.indices.dtype, numpy.int32)
+        self.assertEquals(graph.indptr.dtype, numpy.int32)
+        self.assertEquals(graph.weights, None)
+        nptst.assert_array_equal(graph.indptr, numpy.array([0, 1, 3, 4, 5, 6, 7, 7, 7, 7, 7]))
+        nptst.assert_array_equal(graph.indices, numpy.array([1, 0, 4, 3, 2, 1, 5]))
+
+        #A weight array is only stored when a weight is not 1
+        graph.addEdge(2, 3, 0.5)
+        nptst.assert_array_equal(graph.weights, numpy.array([1, 1, 1, 0.5, 0.5, 1, 1]))
+        graph.addEdge(2, 3)
+        self.assertEquals(graph.weights, None)
+
+        graph = CsrGraph(numVertices, dtype=numpy.float32)
+        graph.addEdge(2, 3, 0.5)
+        self.assertEquals(graph.weights.dtype, numpy.float32)
+        self.assertEquals(graph.getEdge(3, 2), 0.5)
+
+        graph = CsrGraph(numVertices, dtype=numpy.bool_)
+        graph.addEdge(2, 3, 0.5)
+        self.assertEquals(graph.weights, None)
+        self.assertEquals(graph.getEdge(3, 2), True)
+
+        #The weight matrix shares the arrays of the graph
+        W = graph.getSparseWeightMatrix()
+        self.assertTrue(numpy.shares_memory(W.indices, graph.indices))
+        self.assertFalse(W.data.flags.writeable)
+
+    def testSetArrays(self):
+        numVertices = 4
+        graph = CsrGraph(numVertices, False)
+        indptr = numpy.array([0, 2, 2, 3, 3], numpy.int32)
+        indices = numpy.array([1, 3, 0], numpy.int32)
+        graph.setArrays(indptr, indices)
+
+        self.assertTrue(graph.indices is indices)
+        nptst.assert_array_equal(graph.getAllDirEdges(), numpy.array([[0, 1], [0, 3], [2, 0]]))
+        nptst.assert_array_equal(graph.neighbourOf(0), numpy.array([2]))
+
+        graph.setArrays(indptr, indices, numpy.array([1, 2, 3]))
+        self.assertEquals(graph.getEdge(0, 3), 2)
+        self.assertEquals(graph.getEdge(0, 2), None)
+
+        self.assertRaises(ValueError, graph.setArrays, indptr[:-1], indices)
+        self.assertRaises(ValueError, graph.setArrays, indptr, numpy.array([3, 1, 0]))
+        self.assertRaises(ValueError, graph.setArrays, indptr, numpy.array([1, 1, 0]))
+        self.assertRaises(ValueError, graph.setArrays, indptr, numpy.array([1, 4, 0]))
+        self.assertRaises(ValueError, graph.setArrays, indptr, indices, numpy.array([1, 0, 1]))
+
+        graph = CsrGraph(numVertices)
+        self.assertRaises(ValueError, graph.setArrays, indptr, indices)
+
+    def testCompareDenseGraph(self):
+        numVertices = 30
+        edges = numpy.random.randint(0, numVertices, (100, 2))
+        values = numpy.random.rand(100)
+
+        for undirected in [True, False]:
+            graph = CsrGraph(numVertices, undirected)
+            graph2 = DenseGraph(numVertices, undirected)
+            graph.addEdges(edges, values)
+            graph2.addEdges(edges, values)
+
+            for i in range(0, 100, 3):
+                graph.removeEdge(edges[i, 0], edges[i, 1])
+                graph2.removeEdge(edges[i, 0], edges[i, 1])
+
+            nptst.assert_array_equal(graph.getWeightMatrix(), graph2.getWeightMatrix())
+            nptst.assert_array_equal(graph.outDegreeSequence(), graph2.outDegreeSequence())
+            nptst.assert_array_equal(graph.inDegreeSequence(), graph2.inDegreeSequence())
+            nptst.assert_array_equal(graph.getAllEdges(), graph2.getAllEdges())
+            nptst.assert_array_equal(graph.laplacianMatrix(), graph2.laplacianMatrix())
+            self.assertEquals(graph.getNumEdges(), graph2.getNumEdges())
+
+            for i in range(numVertices):
+                nptst.assert_array_equal(graph.neighbours(i), numpy.sort(graph2.neighbours(i)))
+                nptst.assert_array_equal(graph.neighbourOf(i), numpy.sort(graph2.neighbourOf(i)))
+
+    def testLoadArrays(self):
+        numVertices = 10
+        dirname = PathDefaults.getTempDir() + "testCsrGraphArrays"
+        graph = CsrGraph(numVertices, False)
+        graph.addEdges(numpy.array([[0, 1], [2, 3], [2, 1]]))
+        graph.saveArrays(dirname)
+
+        graph2 = CsrGraph.loadArrays(dirname)
+        self.assertTrue(isinstance(graph2.indptr, numpy.memmap))
+        self.assertTrue(isinstance(graph2.indices, numpy.memmap))
+        self.assertEquals(graph2.weights, None)
+        nptst.assert_array_equal(graph2.outDegreeSequence(), graph.outDegreeSequence())
+        self.assertEquals(graph2.breadthFirstSearch(2), [2, 1, 3])
+
+        graph = CsrGraph(numVertices, dtype=numpy.float32)
+        graph.addEdge(0, 1, 0.5)
+        graph.saveArrays(dirname)
+
+        graph2 = CsrGraph.loadArrays(dirname)
+        self.assertEquals(graph2.weightMatrixDType(), numpy.float32)
+        self.assertTrue(isinstance(graph2.weights, numpy.memmap))
+        self.assertEquals(graph2.getEdge(1, 0), 0.5)
+
+    def testAddVertices(self):
+        graph = CsrGraph(GeneralVertexList(3))
+        graph.addEdge(0, 2, 0.5)
+        graph.addVertices(2)
+
+        self.assertEquals(graph.getNumVertices(), 5)
+        self.assertEquals(graph.getEdge(2, 0), 0.5)
+        graph.addEdge(4, 3)
+        self.assertEquals(graph.getNumEdges(), 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -807,6 +807,34 @@ class DictGraphTest(unittest.TestCase):
 
         self.assertTrue((P == P2).all())
 
+    def testFindComponentLabels(self):
+        labels, sizes = self.graph.findComponentLabels()
+        vertexIds = self.graph.getAllVertexIds()
+        nptst.assert_array_equal(sizes, numpy.array([5, 1]))
+        self.assertEquals(labels[vertexIds.index(5)], 1)
+
+        self.assertEquals(self.graph.findConnectedComponents(), [[0, 1, 2, 3, 4], [5]])
+        self.assertEquals([sorted(c) for c in self.graph.findWeaklyConnectedComponents()], [[0, 1, 2, 3, 4], [5]])
+        self.assertEquals([sorted(c) for c in self.graph.findStronglyConnectedComponents()], [[0, 1, 2, 3, 4], [5]])
+
+        #graph2 is a directed acyclic graph
+        labels, sizes = self.graph2.findComponentLabels(True)
+        nptst.assert_array_equal(sizes, numpy.ones(6))
+        labels, sizes = self.graph2.findComponentLabels()
+        nptst.assert_array_equal(sizes, numpy.array([5, 1]))
+
+        self.graph2.addEdge(4, 0)
+        self.graph2.addEdge("a", "b")
+        self.graph2.addEdge("b", "a")
+        components = self.graph2.findStronglyConnectedComponents()
+        self.assertEquals(len(components), 3)
+        self.assertEquals(sorted(components[0]), [0, 1, 2, 3, 4])
+        self.assertEquals(sorted(components[1]), ["a", "b"])
+        self.assertEquals(components[2], [5])
+
+        labels, sizes = DictGraph().findComponentLabels()
+        self.assertEquals(sizes.shape[0], 0)
+
     def testToIGraph(self): 
         try:
             import igraph
@@ -0,0 +1,92 @@
+import unittest
+import numpy
+import numpy.testing as nptst
+from apgl.graph.SparseGraph import SparseGraph
+from apgl.graph.DenseGraph import DenseGraph
+from apgl.graph.DistanceAggregator import DistanceAggregator
+
+class DistanceAggregatorTest(unittest.TestCase):
+    def setUp(self):
+        numpy.random.seed(21)
+
+    def randomGraph(self, GraphType, numVertices, numEdges, undirected):
+        graph = GraphType(numVertices, undirected)
+        edges = numpy.random.randint(0, numVertices, (numEdges, 2))
+        edges = edges[edges[:, 0] != edges[:, 1], :]
+        graph.addEdges(edges, numpy.random.rand(edges.shape[0])+0.1)
+        return graph
+
+    def testStatistics(self):
+        q = 0.8
+
+        for GraphType in [SparseGraph, DenseGraph]:
+            for undirected in [True, False]:
+                graph = self.randomGraph(GraphType, 25, 30, undirected)
+                labels = numpy.random.randint(0, 3, 25)
+                inds = numpy.nonzero(labels==2)[0].tolist()
+
+                P = graph.floydWarshall(False)
+                aggregator = DistanceAggregator(graph, False, labels, chunkSize=4)
+
+                self.assertEquals(aggregator.diameter(), graph.diameter(P=P))
+                self.assertEquals(aggregator.effectiveDiameter(q), graph.effectiveDiameter(q, P=P))
+                nptst.assert_array_equal(aggregator.hopCount(), graph.hopCount(P))
+                self.assertAlmostEquals(aggregator.geodesicDistance(), graph.geodesicDistance(P=P))
+                self.assertAlmostEquals(aggregator.geodesicDistance(2), graph.geodesicDistance(P=P, vertexInds=inds))
+                self.assertAlmostEquals(aggregator.harmonicGeodesicDistance(), graph.harmonicGeodesicDistance(P=P))
+                self.assertAlmostEquals(aggregator.harmonicGeodesicDistance(2), graph.harmonicGeodesicDistance(P=P, vertexInds=inds))
+
+                P = graph.floydWarshall(True)
+                aggregator = DistanceAggregator(graph, True)
+
+                self.assertAlmostEquals(aggregator.diameter(), graph.diameter(True, P=P))
+                self.assertAlmostEquals(aggregator.geodesicDistance(), graph.geodesicDistance(P=P))
+                self.assertAlmostEquals(aggregator.harmonicGeodesicDistance(), graph.harmonicGeodesicDistance(P=P))
+                self.assertRaises(ValueError, aggregator.hopCount)
+                self.assertRaises(ValueError, aggregator.geodesicDistance, 1)
+
+    def testApproximate(self):
+        q = 0.9
+        graph = self.randomGraph(SparseGraph, 500, 600, True)
+        components = graph.findConnectedComponents()
+        labels = numpy.zeros(graph.getNumVertices(), numpy.int64)
+        labels[list(components[0])] = 1
+
+        aggregator = DistanceAggregator(graph, False, labels)
+        aggregator2 = DistanceAggregator(graph, False, labels, relativeError=0.02)
+
+        hopCount = aggregator.hopCount()
+        hopCount2 = aggregator2.hopCount()
+        self.assertTrue(hopCount2.shape[0] <= hopCount.shape[0])
+        nptst.assert_array_less(numpy.abs(hopCount2 - hopCount[0:hopCount2.shape[0]]), 0.05*hopCount[0:hopCount2.shape[0]])
+
+        self.assertTrue(abs(aggregator2.effectiveDiameter(q) - aggregator.effectiveDiameter(q)) <= 1)
+        self.assertTrue(aggregator2.diameter() <= aggregator.diameter())
+        self.assertAlmostEquals(aggregator2.geodesicDistance()/aggregator.geodesicDistance(), 1, 1)
+        self.assertAlmostEquals(aggregator2.geodesicDistance(1)/aggregator.geodesicDistance(1), 1, 1)
+        self.assertAlmostEquals(aggregator2.harmonicGeodesicDistance()/aggregator.harmonicGeodesicDistance(), 1, 1)
+
+        self.assertRaises(ValueError, DistanceAggregator, graph, True, relativeError=0.1)
+
+    def testEmptyGraphs(self):
+        graph = SparseGraph(0)
+        aggregator = DistanceAggregator(graph)
+
+        self.assertEquals(aggregator.diameter(), 0)
+        self.assertEquals(aggregator.geodesicDistance(), 0)
+        self.assertEquals(aggregator.harmonicGeodesicDistance(), 0)
+        self.assertEquals(aggregator.hopCount().shape[0], 0)
+
+        graph = SparseGraph(5)
+        aggregator = DistanceAggregator(graph)
+
+        self.assertEquals(aggregator.diameter(), 0)
+        self.assertEquals(aggregator.effectiveDiameter(0.5), 0)
+        self.assertEquals(aggregator.geodesicDistance(), 0)
+        self.assertEquals(aggregator.harmonicGeodesicDistance(), float('inf'))
+        nptst.assert_array_equal(aggregator.hopCount(), numpy.array([5]))
+
+        self.assertRaises(ValueError, DistanceAggregator, graph, False, numpy.array([0, 1]))
+
+if __name__ == '__main__':
+    unittest.main()
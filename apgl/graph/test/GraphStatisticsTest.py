@@ -2,10 +2,12 @@
 
 import unittest
 import numpy
+import numpy.testing as nptst
 import logging
 import sys 
 from apgl.graph.VertexList import VertexList
 from apgl.graph.SparseGraph import SparseGraph
+from apgl.graph.DenseGraph import DenseGraph
 from apgl.graph.GraphStatistics import GraphStatistics
 from apgl.graph import DictGraph 
 from apgl.generator.ErdosRenyiGenerator import ErdosRenyiGenerator
@@ -128,10 +130,12 @@ class  GraphStatisticsTest(unittest.TestCase):
         statsArray = growthStatistics.scalarStatistics(graph)
         self.assertEquals(statsArray[growthStatistics.numVerticesIndex], 0)
         self.assertEquals(statsArray[growthStatistics.numEdgesIndex], 0)
-        self.assertEquals(statsArray[growthStatistics.maxComponentSizeIndex], -1)
-        self.assertEquals(statsArray[growthStatistics.numComponentsIndex], -1)
-        self.assertEquals(statsArray[growthStatistics.meanComponentSizeIndex], -1)
-        self.assertEquals(statsArray[growthStatistics.maxComponentEdgesIndex], -1)
+        self.assertEquals(statsArray[growthStatistics.maxComponentSizeIndex], 0)
+        self.assertEquals(statsArray[growthStatistics.numComponentsIndex], 0)
+        self.assertEquals(statsArray[growthStatistics.meanComponentSizeIndex], 0)
+        self.assertEquals(statsArray[growthStatistics.maxComponentEdgesIndex], 0)
+        self.assertEquals(statsArray[growthStatistics.numStrongComponentsIndex], 0)
+        self.assertEquals(statsArray[growthStatistics.maxStrongComponentSizeIndex], 0)
         self.assertEquals(statsArray[growthStatistics.meanDegreeIndex], 0)
         self.assertEquals(statsArray[growthStatistics.diameterIndex], 0)
         self.assertEquals(statsArray[growthStatistics.effectiveDiameterIndex], 0)
@@ -141,10 +145,29 @@ class  GraphStatisticsTest(unittest.TestCase):
         self.assertEquals(statsArray[growthStatistics.geodesicDistMaxCompIndex], -1)
         self.assertEquals(statsArray[growthStatistics.meanTreeSizeIndex], -1)
         self.assertEquals(statsArray[growthStatistics.meanTreeDepthIndex], -1)
-        self.assertEquals(statsArray[growthStatistics.numNonSingletonComponentsIndex], -1)
+        self.assertEquals(statsArray[growthStatistics.numNonSingletonComponentsIndex], 0)
         self.assertEquals(statsArray[growthStatistics.numTreesIndex], -1)
         self.assertEquals(statsArray[growthStatistics.numNonSingletonTreesIndex], -1)
 
+    def testScalarStatisticsDirected(self):
+        graph = DenseGraph(6, False)
+        graph.addEdge(0, 1)
+        graph.addEdge(1, 2)
+        graph.addEdge(2, 0)
+        graph.addEdge(3, 4)
+
+        growthStatistics = GraphStatistics()
+        statsArray = growthStatistics.scalarStatistics(graph, False)
+
+        self.assertEquals(statsArray[growthStatistics.numComponentsIndex], 3)
+        self.assertEquals(statsArray[growthStatistics.maxComponentSizeIndex], 3)
+        self.assertEquals(statsArray[growthStatistics.secondComponentSizeIndex], 2)
+        self.assertEquals(statsArray[growthStatistics.maxComponentEdgesIndex], 3)
+        self.assertEquals(statsArray[growthStatistics.numNonSingletonComponentsIndex], 2)
+        self.assertEquals(statsArray[growthStatistics.numStrongComponentsIndex], 4)
+        self.assertEquals(statsArray[growthStatistics.maxStrongComponentSizeIndex], 3)
+        self.assertEquals(statsArray[growthStatistics.geodesicDistMaxCompIndex], -1)
+
     def testScalaraStatistics(self): 
         numVertices = 10
         graph = DictGraph(numVertices)
@@ -172,6 +195,56 @@ class  GraphStatisticsTest(unittest.TestCase):
         self.assertTrue(statsArray[0, 1] == 1.0)
         self.assertTrue(statsArray[1, 1] == 2.0)
 
+    def testSequenceStatsIncremental(self):
+        numVertices = 50
+        graph = DenseGraph(numVertices, True)
+        graph.addEdges(numpy.random.randint(0, numVertices, (60, 2)))
+
+        perm = numpy.random.permutation(numVertices)
+        subgraphIndices = [perm[0:k].tolist() for k in [0, 1, 10, 30, 50]]
+        self.assertTrue(GraphStatistics.isNested(subgraphIndices))
+        self.assertFalse(GraphStatistics.isNested([[0, 1], [1, 2]]))
+
+        growthStatistics = GraphStatistics()
+        statsArray = growthStatistics.sequenceScalarStats(graph, subgraphIndices, False)
+        statsDictList = growthStatistics.sequenceVectorStats(graph, subgraphIndices)
+
+        growthStatistics.useIncremental = False
+        nptst.assert_array_equal(statsArray, growthStatistics.sequenceScalarStats(graph, subgraphIndices, False))
+
+        for statsDict, statsDict2 in zip(statsDictList, growthStatistics.sequenceVectorStats(graph, subgraphIndices)):
+            self.assertEquals(sorted(statsDict.keys()), sorted(statsDict2.keys()))
+            for key in statsDict.keys():
+                nptst.assert_array_almost_equal(statsDict[key], statsDict2[key])
+
+    def testSequenceStatsParallel(self):
+        numVertices = 50
+        graph = DenseGraph(numVertices, True)
+        graph.addEdges(numpy.random.randint(0, numVertices, (60, 2)))
+
+        perm = numpy.random.permutation(numVertices)
+        subgraphIndices = [perm[0:k].tolist() for k in [0, 1, 10, 30, 50]]
+        growthStatistics = GraphStatistics()
+
+        for useIncremental in [True, False]:
+            growthStatistics.useIncremental = useIncremental
+            statsArray = growthStatistics.sequenceScalarStats(graph, subgraphIndices, False)
+            nptst.assert_array_equal(statsArray, growthStatistics.sequenceScalarStats(graph, subgraphIndices, False, numProcesses=2))
+
+            statsDictList = growthStatistics.sequenceVectorStats(graph, subgraphIndices)
+            statsDictList2 = growthStatistics.sequenceVectorStats(graph, subgraphIndices, numProcesses=2)
+            self.assertEquals(len(statsDictList), len(statsDictList2))
+
+            for statsDict, statsDict2 in zip(statsDictList, statsDictList2):
+                self.assertEquals(sorted(statsDict.keys()), sorted(statsDict2.keys()))
+                for key in statsDict.keys():
+                    nptst.assert_array_almost_equal(statsDict[key], statsDict2[key])
+
+        clusterList = growthStatistics.sequenceClustering(graph, subgraphIndices[1:], DenseGraph.getNumVertices, False, 2)
+        self.assertEquals(clusterList, [1, 10, 30, 50])
+
+        self.assertRaises(ValueError, growthStatistics.sequenceScalarStats, graph, subgraphIndices, False, False, 0)
+
     def testVectorStatistics(self):
         numFeatures = 1
         numVertices = 10
@@ -237,6 +310,23 @@ class  GraphStatisticsTest(unittest.TestCase):
         self.assertTrue(( statsDict["treeSizesDist"] == numpy.array([0, 4, 1, 0, 1]) ).all())
         self.assertTrue(( statsDict["treeDepthsDist"] == numpy.array([4, 1, 1]) ).all())
 
+    def testSparseEigenStatistics(self):
+        numVertices = 100
+        graph = DenseGraph(numVertices, True)
+        graph.addEdges(numpy.random.randint(0, numVertices, (200, 2)))
+
+        growthStatistics = GraphStatistics()
+        growthStatistics.denseEigenSize = 0
+        growthStatistics.numEigenvalues = 5
+        statsDict = growthStatistics.vectorStatistics(graph)
+
+        lmbda, V = numpy.linalg.eigh(graph.getWeightMatrix())
+        maxEigVector = V[:, numpy.argmax(lmbda)]
+        lmbda = numpy.flipud(lmbda)[0:5]
+
+        nptst.assert_array_almost_equal(statsDict["eigenDist"], lmbda[lmbda>0])
+        nptst.assert_array_almost_equal(numpy.abs(statsDict["maxEigVector"]), numpy.abs(maxEigVector))
+
     def testSequenceVectorStats(self):
         numFeatures = 1
         numVertices = 10
@@ -0,0 +1,77 @@
+import unittest
+import numpy
+import numpy.testing as nptst
+from apgl.graph.DenseGraph import DenseGraph
+from apgl.graph.SparseGraph import SparseGraph
+from apgl.graph.IncrementalGraphStatistics import IncrementalGraphStatistics
+
+class IncrementalGraphStatisticsTest(unittest.TestCase):
+    def setUp(self):
+        numpy.random.seed(21)
+
+        #A triangle 0-1-2 with a tail 2-3, a self loop on 4 and an edge 5-6
+        self.graph = DenseGraph(8, True)
+        self.graph.addEdge(0, 1)
+        self.graph.addEdge(1, 2)
+        self.graph.addEdge(0, 2)
+        self.graph.addEdge(2, 3)
+        self.graph.addEdge(4, 4)
+        self.graph.addEdge(5, 6)
+
+    def testAddVertices(self):
+        incStats = IncrementalGraphStatistics(self.graph, True)
+        self.assertEquals(incStats.numVertices, 0)
+        self.assertEquals(incStats.maxComponent(), (0, 0, 0))
+        self.assertEquals(incStats.degreeDistribution().shape[0], 0)
+
+        incStats.addVertices([0, 1, 5])
+        self.assertEquals(incStats.numVertices, 3)
+        self.assertEquals(incStats.numEdges, 1)
+        self.assertEquals(incStats.numDirEdges, 2)
+        self.assertEquals(incStats.numComponents, 2)
+        self.assertEquals(incStats.maxComponent(), (2, 1, 2))
+        self.assertEquals(incStats.secondComponentSize(), 1)
+        nptst.assert_array_equal(incStats.triangleDistribution(), numpy.array([3]))
+
+        incStats.addVertices([0, 2, 2, 4])
+        self.assertEquals(incStats.numVertices, 5)
+        self.assertEquals(incStats.numEdges, 4)
+        self.assertEquals(incStats.numDirEdges, 7)
+        self.assertEquals(incStats.numComponents, 3)
+        self.assertEquals(incStats.numNonSingletonComponents, 1)
+        self.assertEquals(incStats.numTriOrMoreComponents, 1)
+        self.assertEquals(incStats.maxComponent(), (3, 3, 6))
+        nptst.assert_array_equal(incStats.maxComponentVertices(), numpy.array([0, 1, 2]))
+        nptst.assert_array_equal(incStats.degreeDistribution(), numpy.array([1, 1, 3]))
+        nptst.assert_array_equal(incStats.triangleDistribution(), numpy.array([2, 0, 3]))
+        nptst.assert_array_equal(incStats.componentDistribution(), numpy.array([0, 2, 0, 1]))
+        self.assertAlmostEquals(incStats.density(), 0.4)
+
+    def testCompareSubgraphs(self):
+        numVertices = 50
+        graph = DenseGraph(numVertices, True)
+        graph.addEdges(numpy.random.randint(0, numVertices, (60, 2)))
+
+        incStats = IncrementalGraphStatistics(graph, True)
+        perm = numpy.random.permutation(numVertices)
+
+        for k in [1, 10, 11, 30, 50]:
+            incStats.addVertices(perm[0:k])
+            subgraph = graph.subgraph(numpy.sort(perm[0:k]).tolist())
+            components = subgraph.findConnectedComponents()
+
+            self.assertEquals(incStats.numEdges, subgraph.getNumEdges())
+            self.assertEquals(incStats.numDirEdges, subgraph.getNumDirEdges())
+            self.assertEquals(incStats.density(), subgraph.density())
+            self.assertEquals(incStats.numComponents, len(components))
+            self.assertEquals(incStats.maxComponent()[0], len(components[0]))
+            nptst.assert_array_equal(incStats.maxComponentVertices(), numpy.sort(perm[0:k])[components[0]])
+            nptst.assert_array_equal(incStats.degreeDistribution(), subgraph.degreeDistribution())
+            nptst.assert_array_equal(incStats.triangleDistribution(), numpy.bincount(subgraph.triangleSequence()))
+            nptst.assert_array_equal(incStats.componentDistribution(), numpy.bincount([len(component) for component in components]))
+
+    def testDirected(self):
+        self.assertRaises(ValueError, IncrementalGraphStatistics, SparseGraph(5, False))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -83,6 +83,31 @@ class MatrixGraphTest():
 
         edgeValues = numpy.array([0.1, 0.0])
         self.assertRaises(ValueError, graph.addEdges, edgeIndexArray, edgeValues)
+        self.assertRaises(ValueError, graph.addEdges, edgeIndexArray, numpy.array([0.1]))
+        self.assertRaises(ValueError, graph.addEdges, numpy.array([[0, 5]]))
+
+        #Later edges overwrite earlier ones, including reversed undirected edges
+        edgeIndexArray = numpy.array([[0, 1], [1, 0], [3, 4], [3, 4], [4, 4], [2, 1]])
+        edgeValues = numpy.array([0.5, 0.6, 0.7, 0.8, 0.9, 0.3])
+        graph.addEdges(edgeIndexArray, edgeValues)
+        self.assertEquals(graph.getEdge(0, 1), 0.6)
+        self.assertEquals(graph.getEdge(1, 0), 0.6)
+        self.assertEquals(graph.getEdge(4, 3), 0.8)
+        self.assertEquals(graph.getEdge(4, 4), 0.9)
+        self.assertEquals(graph.getEdge(1, 2), 0.3)
+        self.assertEquals(graph.getEdge(2, 3), 0.2)
+        self.assertEquals(graph.getNumEdges(), 5)
+
+        graph = self.GraphType(vList, False)
+        graph.addEdges(edgeIndexArray, edgeValues)
+        self.assertEquals(graph.getEdge(0, 1), 0.5)
+        self.assertEquals(graph.getEdge(1, 0), 0.6)
+        self.assertEquals(graph.getEdge(3, 4), 0.8)
+        self.assertEquals(graph.getEdge(4, 3), None)
+        self.assertEquals(graph.getNumEdges(), 5)
+
+        graph.addEdges(numpy.zeros((0, 2), numpy.int64))
+        self.assertEquals(graph.getNumEdges(), 5)
 
     def testRemoveEdge(self):
         self.graph.addEdge(1, 5, 2)
@@ -192,6 +217,93 @@ class MatrixGraphTest():
 
         self.assertEqual(graph.clusteringCoefficient(), 0.0)
 
+    def testMatrixCache(self):
+        numVertices = 5
+        graph = self.GraphType(VertexList(numVertices, 1))
+        graph.addEdge(0, 1)
+        graph.addEdge(1, 2)
+
+        A = graph.adjacencyMatrix()
+        cache = graph.getMatrixCache()
+        self.assertEquals(cache.hits, 0)
+
+        #Returned values share read-only data with the cached value
+        A2 = graph.adjacencyMatrix()
+        self.assertEquals(cache.hits, 1)
+        self.assertTrue(numpy.may_share_memory(A, A2))
+        self.assertRaises(ValueError, A.__setitem__, (0, 0), 7)
+        self.assertRaises(ValueError, A2.setflags, True)
+
+        neighbourList, weightList = graph.adjacencyList()
+        self.assertRaises(ValueError, neighbourList[0].__setitem__, 0, 4)
+        self.assertRaises(ValueError, weightList[0].__setitem__, 0, 7)
+        neighbourList[0] = numpy.array([4])
+        self.assertEquals(graph.adjacencyList()[0][0][0], 1)
+
+        degrees = graph.outDegreeSequence()
+        self.assertRaises(ValueError, degrees.__setitem__, 0, 7)
+        degrees = degrees.copy()
+        degrees[0] = 7
+        nptst.assert_array_equal(graph.outDegreeSequence(), numpy.array([1, 2, 1, 0, 0]))
+
+        version = graph.version
+        graph.addEdge(2, 3)
+        self.assertEquals(graph.version, version+1)
+        A2 = graph.adjacencyMatrix()
+        self.assertFalse(A2 is A)
+        self.assertEquals(A2[2, 3], 1)
+
+        L = graph.laplacianWeightMatrix()
+        nptst.assert_array_equal(numpy.diag(L), numpy.array([1, 2, 2, 1, 0]))
+        graph.removeEdge(2, 3)
+        nptst.assert_array_equal(numpy.diag(graph.laplacianWeightMatrix()), numpy.array([1, 2, 1, 0, 0]))
+
+        graph.removeAllEdges()
+        self.assertEquals(numpy.sum(graph.adjacencyMatrix()), 0)
+
+        cache.setMaxBytes(0)
+        graph.adjacencyMatrix()
+        self.assertEquals(len(cache), 0)
+
+    def testLocalClusteringCoefficients(self):
+        numVertices = 5
+        vList = VertexList(numVertices, 1)
+        graph = self.GraphType(vList)
+        graph.addEdge(0, 1, 2)
+        graph.addEdge(0, 2, 2)
+        graph.addEdge(1, 2, 2)
+        graph.addEdge(2, 3, 2)
+        graph.addEdge(2, 4, 2)
+        graph.addEdge(4, 4, 2)
+
+        nptst.assert_array_almost_equal(graph.localClusteringCoefficients(), numpy.array([1, 1, 1.0/6, 0, 0]))
+        self.assertEqual(graph.transitivity(), float(3)/8)
+
+        graph = self.GraphType(vList, False)
+        self.assertRaises(ValueError, graph.localClusteringCoefficients)
+
+    def testApproximateTransitivity(self):
+        numVertices = 5
+        vList = VertexList(numVertices, 1)
+        graph = self.GraphType(vList)
+        self.assertEqual(graph.approximateTransitivity(), (0, 0, 0))
+
+        graph.addEdge(0, 1)
+        graph.addEdge(0, 2)
+        graph.addEdge(1, 2)
+        graph.addEdge(2, 3)
+        graph.addEdge(2, 4)
+
+        transitivity, lower, upper = graph.approximateTransitivity(0.05, 0.99)
+        self.assertTrue(lower <= float(3)/8 <= upper)
+        self.assertAlmostEqual(upper - transitivity, 0.05)
+
+        numTriangles, lower, upper = graph.approximateNumTriangles(0.05, 0.99)
+        self.assertTrue(lower <= 1 <= upper)
+
+        graph = self.GraphType(vList, False)
+        self.assertRaises(ValueError, graph.approximateTransitivity)
+
     def testDegreeDistribution(self):
         numVertices = 5
         numFeatures = 1
@@ -995,9 +1107,46 @@ class MatrixGraphTest():
         self.assertEquals(graph.findConnectedComponents()[0], [0,1,2,3,6])
         self.assertEquals(graph.findConnectedComponents()[1], [4, 5])
 
+        labels, sizes = graph.findComponentLabels()
+        nptst.assert_array_equal(labels[0:7], numpy.array([0, 0, 0, 0, 1, 1, 0]))
+        nptst.assert_array_equal(sizes[0:2], numpy.array([5, 2]))
+        self.assertEquals(sizes.shape[0], numVertices-5)
+
         graph = self.GraphType(vList, False)
         self.assertRaises(ValueError, graph.findConnectedComponents)
 
+    def testFindStronglyConnectedComponents(self):
+        numVertices = 7
+        numFeatures = 0
+        vList = VertexList(numVertices, numFeatures)
+
+        #A cycle 0->1->2->0 feeding the cycle 3->4->3, and 5->6
+        graph = self.GraphType(vList, False)
+        graph.addEdge(0, 1)
+        graph.addEdge(1, 2)
+        graph.addEdge(2, 0)
+        graph.addEdge(2, 3)
+        graph.addEdge(3, 4)
+        graph.addEdge(4, 3)
+        graph.addEdge(5, 6)
+
+        labels, sizes = graph.findComponentLabels(True)
+        nptst.assert_array_equal(labels, numpy.array([0, 0, 0, 1, 1, 2, 3]))
+        nptst.assert_array_equal(sizes, numpy.array([3, 2, 1, 1]))
+        self.assertEquals(graph.findStronglyConnectedComponents(), [[0, 1, 2], [3, 4], [5], [6]])
+
+        labels, sizes = graph.findComponentLabels()
+        nptst.assert_array_equal(labels, numpy.array([0, 0, 0, 0, 0, 1, 1]))
+        nptst.assert_array_equal(sizes, numpy.array([5, 2]))
+        self.assertEquals(graph.findWeaklyConnectedComponents(), [[0, 1, 2, 3, 4], [5, 6]])
+
+        #Strong and weak components are the same for undirected graphs
+        graph = self.GraphType(vList, True)
+        graph.addEdge(0, 1)
+        graph.addEdge(5, 6)
+        self.assertEquals(graph.findStronglyConnectedComponents(), graph.findConnectedComponents())
+        self.assertEquals(graph.findWeaklyConnectedComponents(), graph.findConnectedComponents())
+
     #This doesn't seem to be a conclusive test
     def testFitPowerLaw(self):
         numVertices = 1000
@@ -1040,6 +1189,11 @@ class MatrixGraphTest():
 
         self.assertTrue((P == P2).all())
 
+        #Single precision paths give the same result here 
+        P = self.graph2.floydWarshall(dtype=numpy.float32)
+        self.assertEquals(P.dtype, numpy.float32)
+        nptst.assert_array_equal(P, P2)
+
     def testFindAllDistances(self):
         P = self.graph.findAllDistances()
 
@@ -1066,6 +1220,25 @@ class MatrixGraphTest():
 
         self.assertTrue((P == P2).all())
 
+    def testFindAllDistancesUnweighted(self):
+        P = self.graph.findAllDistances(False)
+        P2 = self.graph.floydWarshall(False)
+        nptst.assert_array_equal(P, P2)
+
+        P = self.graph2.findAllDistances(False)
+        P2 = self.graph2.floydWarshall(False)
+        nptst.assert_array_equal(P, P2)
+
+        #Test a larger random graph
+        numVertices = 50
+        graph = self.GraphType(GeneralVertexList(numVertices))
+        graph.addEdges(numpy.random.randint(0, numVertices, (60, 2)))
+
+        nptst.assert_array_equal(graph.findAllDistances(False), graph.floydWarshall(False))
+
+        graph = self.GraphType(GeneralVertexList(0))
+        self.assertEquals(graph.findAllDistances(False).shape, (0, 0))
+
     def testEgoGraph(self):
         numVertices = 6
         numFeatures = 3
@@ -1673,6 +1846,60 @@ class MatrixGraphTest():
             logging.warn(e)
             pass
 
+    def testLoadZip(self):
+        import zipfile
+        import scipy.io
+        import scipy.sparse
+        numVertices = 5
+        vList = VertexList(numVertices, 2)
+        vList.setVertices(numpy.random.rand(numVertices, 2))
+        W = numpy.zeros((numVertices, numVertices))
+        W[0, 1] = W[1, 0] = 0.5
+        W[2, 2] = 1
+
+        #Write a legacy zip file by hand 
+        tempDir = PathDefaults.getTempDir()
+        tempFile = tempDir + "testLegacyGraph"
+        if os.path.exists(tempFile + ".npz"):
+            os.remove(tempFile + ".npz")
+        scipy.io.mmwrite(tempDir + "weightMatrix.mtx", scipy.sparse.coo_matrix(W))
+        pickle.dump({"undirected": True, "vListType": "VertexList"}, open(tempDir + "metaDict.dat", "wb"))
+        verticesFilename = vList.save(tempDir + "vertices")
+
+        myzip = zipfile.ZipFile(tempFile + ".zip", "w")
+        myzip.write(tempDir + "weightMatrix.mtx", "weightMatrix.mtx")
+        myzip.write(tempDir + "metaDict.dat", "metaDict.dat")
+        myzip.write(verticesFilename, os.path.basename(verticesFilename))
+        myzip.close()
+
+        currentPath = os.getcwd()
+        graph = self.GraphType.load(tempFile)
+        self.assertEquals(os.getcwd(), currentPath)
+
+        self.assertTrue(graph.isUndirected())
+        self.assertEquals(graph.getNumEdges(), 2)
+        self.assertEquals(graph.getEdge(1, 0), 0.5)
+        nptst.assert_array_almost_equal(graph.getVertexList().getVertices(), vList.getVertices())
+        self.assertEquals(type(graph.W), type(self.GraphType(numVertices).W))
+
+        #The npz file is preferred and keeps the native format 
+        graph = self.GraphType(GeneralVertexList(numVertices), False)
+        graph.addEdge(3, 4, 0.25)
+        graph.setVertex(3, "abc")
+        self.assertEquals(graph.save(tempFile), tempFile + ".npz")
+
+        graph2 = self.GraphType.load(tempFile)
+        self.assertFalse(graph2.isUndirected())
+        self.assertEquals(graph2.getEdge(3, 4), 0.25)
+        self.assertEquals(graph2.getEdge(4, 3), None)
+        self.assertEquals(graph2.getVertex(3), "abc")
+        self.assertEquals(type(graph2.W), type(graph.W))
+        self.assertEquals(graph2.W.dtype, graph.W.dtype)
+
+        os.remove(tempFile + ".npz")
+        os.remove(tempFile + ".zip")
+        self.assertRaises(IOError, self.GraphType.load, tempFile)
+
     def testMaxEigenvector(self):
         tol = 10**-6
         numVertices = 5
@@ -1692,6 +1919,15 @@ class MatrixGraphTest():
 
         self.assertTrue(numpy.linalg.norm(U[:, i] - v) < tol)
 
+        #Use ARPACK on the sparse matrix of an undirected graph
+        graph = self.GraphType(VertexList(50, 0))
+        graph.addEdges(numpy.random.randint(0, 50, (100, 2)))
+        v = graph.maxEigenvector(0)
+
+        lmbda, U = numpy.linalg.eigh(graph.getWeightMatrix())
+        u = U[:, numpy.argmax(lmbda)]
+        self.assertTrue(numpy.linalg.norm(u*numpy.sign(numpy.sum(u)) - v) < tol)
+
     def testMaxProductPaths(self):
         numVertices = 6
         numFeatures = 1
@@ -1800,6 +2036,46 @@ class MatrixGraphTest():
             logging.warn(e)
             pass
 
+    def testSaveArrays(self):
+        numVertices = 10
+        numFeatures = 2
+        vList = VertexList(numVertices, numFeatures)
+        vList.setVertices(numpy.random.rand(numVertices, numFeatures))
+        dirname = PathDefaults.getTempDir() + "testGraphArrays"
+
+        for undirected in [True, False]:
+            graph = self.GraphType(vList, undirected)
+            graph.addEdge(0, 1, 0.1)
+            graph.addEdge(1, 2, 0.2)
+            graph.addEdge(1, 3, 0.3)
+            graph.addEdge(4, 4)
+
+            self.assertEquals(graph.saveArrays(dirname), dirname)
+            graph2 = self.GraphType.loadArrays(dirname)
+
+            self.assertEquals(graph2.isUndirected(), undirected)
+            self.assertEquals(graph2.getNumEdges(), graph.getNumEdges())
+            nptst.assert_array_equal(graph2.getWeightMatrix(), graph.getWeightMatrix())
+            nptst.assert_array_equal(graph2.getVertexList().getVertices(), vList.getVertices())
+            nptst.assert_array_equal(graph2.neighbours(1), numpy.sort(graph.neighbours(1)))
+
+            graph2 = self.GraphType.loadArrays(dirname, None)
+            graph2.addEdge(5, 6)
+            self.assertEquals(graph2.getEdge(5, 6), 1)
+            self.assertEquals(graph2.getEdge(1, 3), 0.3)
+
+        graph = self.GraphType(GeneralVertexList(numVertices))
+        graph.setVertex(1, "abc")
+        graph.addEdge(2, 3)
+        graph.saveArrays(dirname)
+        graph2 = self.GraphType.loadArrays(dirname)
+
+        self.assertEquals(graph2.getVertex(1), "abc")
+        self.assertEquals(graph2.getEdge(3, 2), 1)
+        self.assertEquals(graph2.getNumEdges(), 1)
+
+        self.assertRaises(IOError, self.GraphType.loadArrays, dirname + "Missing")
+
     def testSetVertices(self):
         numVertices = 10
         numFeatures = 1
@@ -2057,7 +2333,22 @@ class MatrixGraphTest():
         graph.addEdge(2, 3, 0.1)
         graph.addEdge(0, 3, 0.1)
 
-        #logging.debug(graph.betweenness())
+        #Two shortest paths between 0 and 2, and 1 and 3
+        nptst.assert_array_almost_equal(graph.betweenness(), numpy.array([1, 1, 1, 1, 0]))
+        nptst.assert_array_almost_equal(graph.betweenness(True), numpy.array([0, 0, 4, 4, 0]))
+
+        graph = self.GraphType(vList, False)
+        graph.addEdge(0, 1)
+        graph.addEdge(1, 2)
+        graph.addEdge(2, 3)
+        graph.addEdge(0, 4)
+        graph.addEdge(4, 3)
+        nptst.assert_array_almost_equal(graph.betweenness(), numpy.array([0, 1, 1, 0, 1]))
+        nptst.assert_array_almost_equal(graph.betweenness(numProcesses=2), graph.betweenness())
+
+        #Sampling all vertices gives the exact values
+        nptst.assert_array_almost_equal(graph.betweenness(numSamples=5), graph.betweenness())
+        self.assertEquals(graph.betweenness(numSamples=2).shape[0], 5)
 
     def testSetVertexList(self):
         numVertices = 5
@@ -2350,6 +2641,29 @@ class MatrixGraphTest():
         for i in range(numVertices): 
             nptst.assert_array_equal(graph.getVertex(i), newGraph.getVertex(i))
             
+    def testPickleOutOfBand(self):
+        numVertices = 10
+        vList = VertexList(numVertices, 2)
+        vList.setVertices(numpy.random.rand(numVertices, 2))
+
+        for undirected in [True, False]:
+            graph = self.GraphType(vList, undirected)
+            graph.addEdges(numpy.array([[0, 1], [3, 5], [5, 9]]), numpy.array([1, 0.5, 2]))
+
+            buffers = []
+            output = pickle.dumps(graph, protocol=5, buffer_callback=buffers.append)
+            self.assertTrue(len(buffers) >= 2)
+            self.assertTrue(len(output) < 1000)
+
+            newGraph = pickle.loads(output, buffers=buffers)
+            self.assertEquals(newGraph.isUndirected(), undirected)
+            self.assertEquals(type(newGraph.W), type(graph.W))
+            self.assertEquals(newGraph.W.dtype, graph.W.dtype)
+            nptst.assert_array_equal(newGraph.getWeightMatrix(), graph.getWeightMatrix())
+            nptst.assert_array_equal(newGraph.getVertexList().getVertices(), vList.getVertices())
+            self.assertTrue(numpy.shares_memory(newGraph.getVertexList().getVertices(), vList.getVertices()))
+
+
     def testToDictGraph(self): 
         dictGraph = self.graph.toDictGraph() 
         
@@ -0,0 +1,132 @@
+import unittest
+import pickle
+import gc
+import weakref
+import multiprocessing
+import numpy
+import numpy.testing as nptst
+from multiprocessing import shared_memory
+from apgl.graph.SparseGraph import SparseGraph
+from apgl.graph.DenseGraph import DenseGraph
+from apgl.graph.CsrGraph import CsrGraph
+from apgl.graph.VertexList import VertexList
+from apgl.graph.GeneralVertexList import GeneralVertexList
+from apgl.graph.SharedGraph import SharedGraph
+
+def _sumWeights(handle):
+    graph = handle.getGraph()
+    total = graph.getWeightMatrix().sum() + graph.getVertexList().getVertices().sum()
+    handle.close()
+    return total
+
+class SharedGraphTest(unittest.TestCase):
+    def setUp(self):
+        numpy.random.seed(21)
+
+    def testGetGraph(self):
+        numVertices = 10
+        vList = VertexList(numVertices, 2)
+        vList.setVertices(numpy.random.rand(numVertices, 2))
+        edges = numpy.array([[0, 1], [3, 5], [5, 9], [2, 2]])
+
+        for GraphType in [SparseGraph, DenseGraph, CsrGraph]:
+            for undirected in [True, False]:
+                graph = GraphType(vList, undirected)
+                graph.addEdges(edges, numpy.array([1, 0.5, 2, 3]))
+
+                with SharedGraph(graph) as handle:
+                    self.assertTrue(handle.isOwner())
+
+                    #Workers receive a handle which is pickled by name
+                    handle2 = pickle.loads(pickle.dumps(handle))
+                    self.assertFalse(handle2.isOwner())
+                    self.assertTrue(len(pickle.dumps(handle)) < 1000)
+
+                    graph2 = handle2.getGraph()
+                    self.assertTrue(handle2.getGraph() is graph2)
+                    self.assertEquals(type(graph2), GraphType)
+                    self.assertEquals(graph2.isUndirected(), undirected)
+                    nptst.assert_array_equal(graph2.getWeightMatrix(), graph.getWeightMatrix())
+                    nptst.assert_array_equal(graph2.getVertexList().getVertices(), vList.getVertices())
+                    self.assertEquals(graph2.breadthFirstSearch(3), graph.breadthFirstSearch(3))
+
+                    V = graph2.getVertexList().getVertices()
+                    self.assertFalse(V.flags.writeable)
+                    self.assertFalse(numpy.shares_memory(V, vList.getVertices()))
+
+                    del graph2, V
+                    handle2.close()
+                    self.assertRaises(ValueError, handle2.getGraph)
+
+    def testSharedArrays(self):
+        graph = SparseGraph(GeneralVertexList(5))
+        graph.addEdge(0, 1, 0.5)
+        graph.setVertex(0, "abc")
+
+        handle = SharedGraph(graph)
+        graph2 = handle.getGraph()
+        self.assertEquals(graph2.getVertex(0), "abc")
+
+        #The weight matrix uses the shared arrays directly
+        memory = shared_memory.SharedMemory(name=handle.blocks["data"][0])
+        numpy.ndarray(graph2.W.data.shape, graph2.W.data.dtype, buffer=memory.buf)[:] = 2
+        self.assertEquals(graph2.getEdge(1, 0), 2)
+        self.assertFalse(graph2.W.indices.flags.writeable)
+        self.assertEquals(handle.getNumBytes(), graph2.W.data.nbytes + graph2.W.indices.nbytes + graph2.W.indptr.nbytes)
+        memory.close()
+
+        #The owner unlinks the blocks on close
+        del graph2
+        handle.close()
+        handle.close()
+        self.assertRaises(FileNotFoundError, shared_memory.SharedMemory, name=handle.blocks["data"][0])
+
+    def testCloseInUse(self):
+        numVertices = 10
+        vList = VertexList(numVertices, 2)
+        vList.setVertices(numpy.random.rand(numVertices, 2))
+
+        for GraphType in [CsrGraph, SparseGraph, DenseGraph]:
+            graph = GraphType(vList)
+            graph.addEdges(numpy.array([[0, 1], [2, 3], [3, 3]]))
+
+            handle = SharedGraph(graph)
+            handle2 = pickle.loads(pickle.dumps(handle))
+            graph2 = handle2.getGraph()
+            V = graph2.getVertexList().getVertices()[2:5, :]
+            memoryRef = weakref.ref(handle2.memories["V"])
+
+            #Closing both handles keeps the blocks of graph2 mapped
+            handle2.close()
+            handle.close()
+            self.assertRaises(ValueError, handle2.getGraph)
+            self.assertEquals(list(graph2.neighbours(0)), [1])
+            nptst.assert_array_equal(graph2.getWeightMatrix(), graph.getWeightMatrix())
+            nptst.assert_array_equal(V, vList.getVertices()[2:5, :])
+
+            #The block is detached once the last array using it is released
+            del graph2
+            gc.collect()
+            self.assertTrue(memoryRef() is not None)
+            del V
+            gc.collect()
+            self.assertTrue(memoryRef() is None)
+
+    def testWorkers(self):
+        numVertices = 20
+        vList = VertexList(numVertices, 1)
+        vList.setVertices(numpy.random.rand(numVertices, 1))
+        graph = SparseGraph(vList)
+        graph.addEdges(numpy.random.randint(0, numVertices, (30, 2)))
+
+        with SharedGraph(graph) as handle:
+            pool = multiprocessing.Pool(2)
+            totals = pool.map(_sumWeights, [handle]*4)
+            pool.close()
+            pool.join()
+
+        total = graph.getWeightMatrix().sum() + vList.getVertices().sum()
+        nptst.assert_array_almost_equal(numpy.array(totals), numpy.ones(4)*total)
+
+if __name__ == '__main__':
+    unittest.main()
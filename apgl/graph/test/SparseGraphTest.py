@@ -190,6 +190,64 @@ class SparseGraphTest(unittest.TestCase, MatrixGraphTest):
         self.assertEquals(graph[3, 8], 0.2)
         
 
+    def testCommit(self):
+        numVertices = 10
+        graph = SparseGraph(numVertices)
+        graph.addEdge(0, 1, 0.5)
+        graph.addEdge(1, 2)
+        graph.removeEdge(0, 1)
+        graph.addEdge(3, 3, 2)
+
+        #The edge log is read without merging it into the weight matrix
+        self.assertEquals(len(graph.edgeLog), 5)
+        self.assertEquals(graph.getEdge(0, 1), None)
+        self.assertEquals(graph.getEdge(2, 1), 1)
+        self.assertEquals(graph.getEdge(3, 3), 2)
+        self.assertEquals(len(graph.edgeLog), 5)
+
+        graph.commit()
+        self.assertEquals(len(graph.edgeLog), 0)
+        self.assertEquals(graph.W.nnz, 3)
+        self.assertEquals(graph.getEdge(1, 2), 1)
+
+        #Reading the weight matrix merges the log
+        graph.addEdge(0, 1, 0.5)
+        graph.removeEdge(1, 2)
+        self.assertEquals(graph.getNumEdges(), 2)
+        self.assertEquals(len(graph.edgeLog), 0)
+        self.assertEquals(graph.W.nnz, 3)
+
+        #Bulk additions are applied after logged edges
+        graph.addEdge(4, 5, 0.1)
+        graph.addEdges(numpy.array([[5, 4]]), numpy.array([0.3]))
+        self.assertEquals(graph.getEdge(4, 5), 0.3)
+
+        graph = SparseGraph(numVertices, False, frmt="lil")
+        graph.addEdge(0, 1, 0.5)
+        self.assertEquals(graph.weightMatrixType(), scipy.sparse.lil_matrix)
+        self.assertEquals(graph.getAllEdges().tolist(), [[0, 1]])
+
+    def testMatrixCacheSparse(self):
+        graph = SparseGraph(VertexList(5, 1))
+        graph.addEdge(0, 1)
+        graph.addEdge(1, 2)
+
+        #Returned sparse matrices share read-only arrays with the cached value
+        N = graph.nativeAdjacencyMatrix()
+        self.assertRaises(ValueError, N.__setitem__, (2, 3), 7)
+        N = N.copy()
+        N[2, 3] = 7
+        self.assertEquals(graph.nativeAdjacencyMatrix()[2, 3], 0)
+
+        L = graph.laplacianMatrix(sparse=True)
+        self.assertRaises(ValueError, L.data.__setitem__, slice(None), 7)
+        self.assertEquals(graph.laplacianMatrix(sparse=True)[0, 0], 1)
+
+        graph2 = graph.union(graph)
+        graph2.addEdge(3, 4)
+        self.assertEquals(graph2.getNumEdges(), 3)
+
+
 if __name__ == "__main__":
     #import sys;sys.argv = ['', 'Test.testName']
     unittest.main()
\ No newline at end of file
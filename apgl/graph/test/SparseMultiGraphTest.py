@@ -7,6 +7,7 @@ from apgl.graph.SparseMultiGraph import SparseMultiGraph
 from apgl.graph.VertexList import VertexList
 import unittest
 import numpy
+import numpy.testing as nptst
 
 
 class SparseMultiGraphTest(unittest.TestCase):
@@ -153,6 +154,50 @@ class SparseMultiGraphTest(unittest.TestCase):
         allEdges = numpy.array([[0,1,0], [0,2,0], [0,1,1]])
 
         self.assertTrue((sMultiGraph.getAllEdges() == allEdges).all())
+    def testStacked(self):
+        numpy.random.seed(21)
+
+        for undirected in [True, False]:
+            sMultiGraph = SparseMultiGraph(self.vList, self.maxEdgeTypes, undirected)
+            sMultiGraph2 = SparseMultiGraph(self.vList, self.maxEdgeTypes, undirected, True)
+
+            for i in range(50):
+                vertexIndex1, vertexIndex2 = numpy.random.randint(0, self.numVertices, 2)
+                edgeTypeIndex = numpy.random.randint(0, self.maxEdgeTypes)
+
+                if numpy.random.rand() < 0.7:
+                    value = numpy.random.randint(1, 5)
+                    sMultiGraph.addEdge(vertexIndex1, vertexIndex2, edgeTypeIndex, value)
+                    sMultiGraph2.addEdge(vertexIndex1, vertexIndex2, edgeTypeIndex, value)
+                else:
+                    sMultiGraph.removeEdge(vertexIndex1, vertexIndex2, edgeTypeIndex)
+                    sMultiGraph2.removeEdge(vertexIndex1, vertexIndex2, edgeTypeIndex)
+
+                if i % 10 == 0:
+                    edges = numpy.random.randint(0, self.numVertices, (5, 2))
+                    sMultiGraph.addEdges(edges, 1, numpy.arange(1, 6))
+                    sMultiGraph2.addEdges(edges, 1, numpy.arange(1, 6))
+
+            self.assertEquals(sMultiGraph2.getNumEdges(), sMultiGraph.getNumEdges())
+            nptst.assert_array_equal(sMultiGraph2.getAllEdges(), sMultiGraph.getAllEdges())
+            self.assertEquals((sMultiGraph2.getStackedWeightMatrix() != sMultiGraph.getStackedWeightMatrix()).nnz, 0)
+
+            for edgeTypeIndex in range(self.maxEdgeTypes):
+                self.assertEquals(sMultiGraph2.getNumEdges(edgeTypeIndex), sMultiGraph.getNumEdges(edgeTypeIndex))
+                nptst.assert_array_equal(sMultiGraph2.getSparseGraph(edgeTypeIndex).getWeightMatrix(), sMultiGraph.getSparseGraph(edgeTypeIndex).getWeightMatrix())
+
+                for i in range(self.numVertices):
+                    self.assertEquals(sMultiGraph2.getNeighboursByEdgeType(i, edgeTypeIndex), sorted(sMultiGraph.getNeighboursByEdgeType(i, edgeTypeIndex)))
+
+                    for j in range(self.numVertices):
+                        self.assertEquals(sMultiGraph2.getEdge(i, j, edgeTypeIndex), sMultiGraph.getEdge(i, j, edgeTypeIndex))
+
+            for i in range(self.numVertices):
+                self.assertEquals(sMultiGraph2.neighbours(i), sorted(sMultiGraph.neighbours(i)))
+
+        self.assertRaises(ValueError, sMultiGraph2.addEdge, 0, 1, 0, 0)
+        self.assertRaises(ValueError, sMultiGraph2.addEdge, 0, self.numVertices, 0)
+        self.assertRaises(ValueError, sMultiGraph2.addEdges, numpy.array([[0, 1]]), self.maxEdgeTypes)
 
 
 if __name__ == "__main__":
@@ -5,6 +5,7 @@ from apgl.graph.VertexList import VertexList
 from apgl.graph.SparseGraph import SparseGraph
 from apgl.util.Parameter import Parameter 
 import logging
+import itertools
 import numpy
 import copy 
 
@@ -41,44 +42,85 @@ class CsvGraphReader(GraphReader, CsvReader):
         self.undirected = undirected
         self.edgeWeight = 1
 
-    def readFromFile(self, fileName):
-        X = numpy.loadtxt(fileName, skiprows=1, converters=self.converters)
-        vertexIds = numpy.zeros(X.shape[0]*2)
-        
-        #First, we will map the vertex Ids to a set of numbers
-        for i in range(0, X.shape[0]):
-            vertexIds[2*i] = X[i, self.vertex1IdIndex]
-            vertexIds[2*i+1] = X[i, self.vertex2IdIndex]
+    def readFromFile(self, fileName, chunkSize=None):
+        """
+        Read a graph from a CSV file. The vertex ids are mapped to the indices
+        0, ..., numVertices-1 in sorted order of id, and if a vertex appears more 
+        than once then its features are taken from its last occurrence. If 
+        chunkSize is given then the file is read chunkSize lines at a time, so 
+        that only the ids of each edge and the features of each vertex are kept 
+        rather than the whole file. 
 
-        vertexIds = numpy.unique(vertexIds)
+        :param fileName: The name of the CSV file to read.
+        :type fileName: :class:`str`
 
-        numVertices = vertexIds.shape[0]
-        numFeatures = len(self.vertex1Indices)
-        
-        vList = VertexList(numVertices, numFeatures)
-        sGraph = SparseGraph(vList, self.undirected)
+        :param chunkSize: The number of lines to read at a time, or None to read the whole file at once.
+        :type chunkSize: :class:`int`
 
-        for i in range(0, X.shape[0]):
-            vertex1Id = X[i, self.vertex1IdIndex]
-            vertex2Id = X[i, self.vertex2IdIndex]
-            
-            vertex1 = X[i, self.vertex1Indices]
-            vertex2 = X[i, self.vertex2Indices]
-
-            vertex1VListId = numpy.nonzero(vertexIds==vertex1Id)[0]
-            vertex2VListId = numpy.nonzero(vertexIds==vertex2Id)[0]
+        :returns: A SparseGraph read from the file. 
+        """
+        if chunkSize is not None:
+            Parameter.checkInt(chunkSize, 1, float('inf'))
 
-            vertex1VListId = int(vertex1VListId)
-            vertex2VListId = int(vertex2VListId)
-            vList.setVertex(vertex1VListId, vertex1)
-            vList.setVertex(vertex2VListId, vertex2)
+        numFeatures = len(self.vertex1Indices)
+        vertexIds = numpy.zeros(0)
+        V = numpy.zeros((0, numFeatures))
+        edgeIds = []
+
+        fileObj = open(fileName, "r")
+        try:
+            fileObj.readline()
+
+            while True:
+                lines = list(itertools.islice(fileObj, chunkSize))
+                if len(lines) == 0:
+                    break
+
+                lines = [line for line in lines if line.strip() != ""]
+                if len(lines) == 0:
+                    continue
+
+                X = numpy.loadtxt(lines, converters=self.converters, ndmin=2)
+                vertexIds, V = self.__mergeVertices(X, vertexIds, V)
+                edgeIds.append(X[:, [self.vertex1IdIndex, self.vertex2IdIndex]])
+        finally:
+            fileObj.close()
+
+        vList = VertexList(vertexIds.shape[0], numFeatures)
+        vList.setVertices(V)
+        sGraph = SparseGraph(vList, self.undirected)
 
-            sGraph.addEdge(vertex1VListId, vertex2VListId, self.edgeWeight)
+        if len(edgeIds) != 0:
+            edgeIds = numpy.concatenate(edgeIds)
+            edges = numpy.searchsorted(vertexIds, edgeIds)
+            sGraph.addEdges(edges, numpy.ones(edges.shape[0])*self.edgeWeight)
 
         logging.info("Read " + fileName + " with " + str(sGraph.getNumVertices()) + " vertices and " + str(sGraph.getNumEdges()) + " edges")
 
         return sGraph 
 
+    def __mergeVertices(self, X, vertexIds, V):
+        """
+        Merge the vertices of the rows X into the sorted array of vertex ids and
+        the corresponding features V, in which later rows take precedence. 
+        """
+        #The ids and features in the order of the rows, first vertex then second 
+        ids = X[:, [self.vertex1IdIndex, self.vertex2IdIndex]].ravel()
+        features = numpy.zeros((ids.shape[0], V.shape[1]))
+        features[0::2, :] = X[:, self.vertex1Indices]
+        features[1::2, :] = X[:, self.vertex2Indices]
+
+        #Find the last occurrence of each id 
+        rowIds, lastInds = numpy.unique(ids[::-1], return_index=True)
+        lastInds = ids.shape[0] - 1 - lastInds
+
+        newIds, inds = numpy.unique(numpy.r_[vertexIds, rowIds], return_inverse=True)
+        newV = numpy.zeros((newIds.shape[0], V.shape[1]))
+        newV[inds[0:vertexIds.shape[0]], :] = V
+        newV[inds[vertexIds.shape[0]:], :] = features[lastInds, :]
+
+        return newIds, newV
+
     vertex1IdIndex = None
     vertex2IdIndex = None
     vertex1Indices = None
@@ -3,9 +3,13 @@ A class to read a set of graphs in MDL format, the vertex is labelled according
 to the atom type.
 """
 
-import numpy 
+import collections
+import itertools
+import multiprocessing
+import numpy
 from apgl.graph.VertexList import VertexList
 from apgl.graph.SparseGraph import SparseGraph
+from apgl.util.Parameter import Parameter
 
 class MDLGraphsReader():
     def __init__(self):
@@ -16,15 +20,77 @@ class MDLGraphsReader():
         self.atomDict["O"] = 3
 
     def readFromFile(self, fileName):
+        """
+        Read all of the graphs in a file of MDL records.
+
+        :param fileName: The name of the MDL file.
+        :type fileName: :class:`str`
+
+        :returns: A list of SparseGraphs, one for each record.
+        """
+        return list(self.iterateFromFile(fileName))
+
+    def iterateFromFile(self, fileName, numProcesses=1, chunkSize=1000):
+        """
+        A generator of the graphs in a file of MDL records, which reads one
+        record at a time so that memory use does not grow with the size of the
+        file. If numProcesses is more than 1 then the records are split into
+        chunks of chunkSize records which are parsed by a pool of worker
+        processes. At most 2*numProcesses chunks are read ahead of the graph
+        being yielded, and the graphs are yielded in the order of the file.
+
+        :param fileName: The name of the MDL file.
+        :type fileName: :class:`str`
+
+        :param numProcesses: The number of processes used to parse records.
+        :type numProcesses: :class:`int`
+
+        :param chunkSize: The number of records parsed by each worker task.
+        :type chunkSize: :class:`int`
+
+        :returns: A SparseGraph for each record.
+        """
+        Parameter.checkInt(numProcesses, 1, float('inf'))
+        Parameter.checkInt(chunkSize, 1, float('inf'))
+
         inFile = open(fileName,"r")
-        numFeatures = 1
 
-        graphList = []
+        try:
+            records = self.__readRecords(inFile)
+
+            if numProcesses == 1:
+                for record in records:
+                    yield self.parseRecord(record)
+            else:
+                pool = multiprocessing.Pool(numProcesses)
+                results = collections.deque()
+
+                try:
+                    while True:
+                        chunk = list(itertools.islice(records, chunkSize))
+                        if len(chunk) != 0:
+                            results.append(pool.apply_async(self._parseRecords, (chunk, )))
+
+                        if len(results) == 0:
+                            break
+                        elif len(chunk) == 0 or len(results) >= 2*numProcesses:
+                            for graph in results.popleft().get():
+                                yield graph
+                finally:
+                    pool.terminate()
+                    pool.join()
+        finally:
+            inFile.close()
+
+    def __readRecords(self, inFile):
+        """
+        A generator of the lines of each record which describe the molecule:
+        the counts line followed by the atom and bond lines.
+        """
         line = inFile.readline()
 
         while line != "":
             #First 3 lines are useless
-            
             inFile.readline()
             inFile.readline()
 
@@ -33,28 +99,59 @@ class MDLGraphsReader():
             valueList = line.split(None)
             numVertices = int(valueList[0])
             #Not strictly the number of edges, as molecules can have multiple edges
-            #between a pair of atoms 
+            #between a pair of atoms
             numEdges = int(valueList[1])
 
-            vList = VertexList(numVertices, numFeatures)
+            record = [line]
+            for i in range(numVertices + numEdges):
+                record.append(inFile.readline())
 
-            for i in range(numVertices):
-                line = inFile.readline()
-                valueList = line.split(None)
-                vList.setVertex(i, numpy.array([self.atomDict[valueList[3]]]))
-
-            graph = SparseGraph(vList)
-
-            for i in range(numEdges):
-                line = inFile.readline()
-                valueList = line.split(None)
-                graph.addEdge(int(valueList[0])-1, int(valueList[1])-1)
-        
-            graphList.append(graph)
+            yield record
 
             #Ignore next two lines
             inFile.readline()
             inFile.readline()
             line = inFile.readline()
 
-        return graphList 
\ No newline at end of file
+    def parseRecord(self, record):
+        """
+        Create a graph from the lines of a record, given as the counts line
+        followed by the atom and bond lines. The vertices are labelled with the
+        atom types, and all bonds are added as edges of weight 1 in a single
+        construction of the weight matrix.
+
+        :param record: The lines of the record.
+        :type record: :class:`list`
+
+        :returns: A SparseGraph of the molecule.
+        """
+        valueList = record[0].split(None)
+        numVertices = int(valueList[0])
+        numEdges = int(valueList[1])
+        numFeatures = 1
+
+        vList = VertexList(numVertices, numFeatures)
+        atoms = [self.atomDict[line.split(None)[3]] for line in record[1:numVertices+1]]
+        vList.setVertices(numpy.array(atoms, numpy.float64).reshape((numVertices, numFeatures)))
+
+        edges = numpy.array([line.split(None)[0:2] for line in record[numVertices+1:numVertices+numEdges+1]], numpy.int64).reshape((numEdges, 2)) - 1
+
+        if numEdges != 0 and (edges.min() < 0 or edges.max() >= numVertices):
+            raise ValueError("Bond between atoms which are not in the record: " + record[0].strip())
+
+        #Multiple bonds between a pair of atoms give a single edge, and the
+        #sorted unique entries are already in canonical CSR order
+        entries = numpy.unique(numpy.concatenate((edges[:, 0]*numVertices + edges[:, 1], edges[:, 1]*numVertices + edges[:, 0])))
+        indptr = numpy.searchsorted(entries, numpy.arange(numVertices+1)*numVertices)
+        indices = entries % max(numVertices, 1)
+
+        graph = SparseGraph(vList)
+        graph.setCsrArrays(indptr, indices, None, False)
+
+        return graph
+
+    def _parseRecords(self, records):
+        """
+        Parse a chunk of records in a worker process.
+        """
+        return [self.parseRecord(record) for record in records]
@@ -19,23 +19,21 @@ class MultiGraphCsvReader(CsvReader):
         self.vertexIndices = tuple(featureIndices)
         self.nanProcessor = nanProcessor 
 
-    def readGraph(self, vertexFileName, edgeFileNames, undirected=True, delimiter=None):
+    def readGraph(self, vertexFileName, edgeFileNames, undirected=True, delimiter=None, stacked=False):
         """
         Read a MultiGraph from at least 2 files: one is the information about
         vertices and the other(s) are lists of edges. For the list of vertices
-        the first column must be the ID of the vertex. 
+        the first column must be the ID of the vertex. The edges of each file
+        are added to the graph in a single operation, and if stacked is True then
+        the graph stores all edge types in one matrix (see SparseMultiGraph). 
         """
         
-        X = numpy.loadtxt(vertexFileName, skiprows=1, converters=self.converters, usecols=self.vertexIndices, delimiter=delimiter)
+        X = numpy.loadtxt(vertexFileName, skiprows=1, converters=self.converters, usecols=self.vertexIndices, delimiter=delimiter, ndmin=2)
 
         numVertices = X.shape[0]
         numFeatures = X.shape[1]-1 
 
         vertexIds = X[:, 0]
-        vertexIdsDict = {}
-
-        for i in range(0, numVertices):
-            vertexIdsDict[vertexIds[i]] = i
 
         if self.nanProcessor != None:
             X[:, 1:numFeatures+1] = self.nanProcessor(X[:, 1:numFeatures+1])
@@ -44,30 +42,39 @@ class MultiGraphCsvReader(CsvReader):
         vertexList.setVertices(X[:, 1:numFeatures+1])
         
         maxEdgeTypes = len(edgeFileNames)
-        sparseMultiGraph = SparseMultiGraph(vertexList, maxEdgeTypes, undirected)
+        sparseMultiGraph = SparseMultiGraph(vertexList, maxEdgeTypes, undirected, stacked)
 
         for i in range(0, maxEdgeTypes):
-            self.__readEdgeFile(vertexIdsDict, edgeFileNames[i], sparseMultiGraph, i)
+            self.__readEdgeFile(vertexIds, edgeFileNames[i], sparseMultiGraph, i)
 
         logging.info("MultiGraph read with " + str(sparseMultiGraph.getNumVertices()) + " vertices and " + str(sparseMultiGraph.getNumEdges()) + " edges")
 
         return sparseMultiGraph
 
-    def __readEdgeFile(self, vertexIdsDict, edgeFileName, sparseMultiGraph, edgeType):
+    def __readEdgeFile(self, vertexIds, edgeFileName, sparseMultiGraph, edgeType):
         """
-        Each edge file contains a list of edges with possible weights.
+        Each edge file contains a list of edges with possible weights. The vertex
+        ids are mapped to indices using a binary search of the sorted ids. 
         """
-        edges = numpy.loadtxt(edgeFileName)
-        numEdges = edges.shape[0]
+        edges = numpy.loadtxt(edgeFileName, ndmin=2)
+
+        if edges.shape[0] == 0:
+            return 
+        elif edges.shape[1] != 2 and edges.shape[1] != 3:
+            raise ValueError("Bad edge file")
+
+        #If an id is repeated then the last vertex with that id is used 
+        order = numpy.argsort(vertexIds, kind="mergesort")
+        edgeIds = edges[:, 0:2]
+        inds = order[numpy.maximum(numpy.searchsorted(vertexIds, edgeIds, side="right", sorter=order) - 1, 0)]
+
+        if (vertexIds[inds] != edgeIds).any():
+            raise ValueError("Unknown vertex id in edge file " + edgeFileName)
 
         if edges.shape[1] == 2:
-            for i in range(0, numEdges):
-                sparseMultiGraph.addEdge(vertexIdsDict[edges[i, 0]], vertexIdsDict[edges[i, 1]], edgeType)
-        elif edges.shape[1] == 3:
-            for i in range(0, numEdges):
-                sparseMultiGraph.addEdge(vertexIdsDict[edges[i, 0]], vertexIdsDict[edges[i, 1]], edgeType, edges[i, 2])
+            sparseMultiGraph.addEdges(inds, edgeType)
         else:
-            raise ValueError("Bad edge file")
+            sparseMultiGraph.addEdges(inds, edgeType, edges[:, 2])
 
     idIndex = None
     featureIndices = None
@@ -7,12 +7,26 @@ A class to output Pajek files from a Graph
 '''
 
 from apgl.io.GraphWriter import GraphWriter
+from apgl.graph.AbstractMatrixGraph import AbstractMatrixGraph
+from apgl.util.Parameter import Parameter
 from apgl.util.Util import Util
+import gzip
+import itertools
 import logging
+import numpy
 
 
 class PajekWriter(GraphWriter):
-    def __init__(self): 
+    def __init__(self, chunkSize=2**16):
+        """
+        Create a writer which formats and writes chunkSize vertices or edges at
+        a time.
+
+        :param chunkSize: The number of lines formatted and written in each chunk.
+        :type chunkSize: :class:`int`
+        """
+        Parameter.checkInt(chunkSize, 1, float('inf'))
+
         #There are 40 colours in Pajek, but we just use the first 20 for now 
         self.colours = ["Cyan", "Yellow", "LimeGreen", "Red", "Blue"]
         self.colours.extend(["Pink", "White", "Orange", "Purple", "CadetBlue"])
@@ -28,134 +42,282 @@ class PajekWriter(GraphWriter):
         self.vertexSizeFunction = None
         self.edgeSizeFunction = None
         self.edgeWeightFunction = None
+        #Whether each function takes arrays of vertex IDs
+        self.vectorised = {"vertexColour": False, "edgeColour": False, "vertexSize": False, "edgeSize": False, "edgeWeight": False}
 
         self.printStep = 100
+        self.chunkSize = chunkSize
 
-    def setVertexColourFunction(self, vertexColourFunction):
+    def setVertexColourFunction(self, vertexColourFunction, vectorised=False):
+        """
+        Set a function giving the colour of each vertex. It is called as
+        vertexColourFunction(vertexId, graph) for each vertex, or if vectorised
+        is True then as vertexColourFunction(vertexIds, graph) with an array of
+        vertex IDs and returns a sequence of colours of the same length.
+        """
+        Parameter.checkBoolean(vectorised)
         self.vertexColourFunction = vertexColourFunction
+        self.vectorised["vertexColour"] = vectorised
 
-    def setEdgeColourFunction(self, edgeColourFunction):
+    def setEdgeColourFunction(self, edgeColourFunction, vectorised=False):
+        """
+        Set a function giving the colour of each edge. It is called as
+        edgeColourFunction(vertexId1, vertexId2, graph) for each edge, or if
+        vectorised is True then as edgeColourFunction(vertexIds1, vertexIds2, graph)
+        with arrays of vertex IDs and returns a sequence of colours.
+        """
+        Parameter.checkBoolean(vectorised)
         self.edgeColourFunction = edgeColourFunction
+        self.vectorised["edgeColour"] = vectorised
 
-    def setVertexSizeFunction(self, vertexSizeFunction):
+    def setVertexSizeFunction(self, vertexSizeFunction, vectorised=False):
+        """
+        Set a function giving the size of each vertex, called in the same way
+        as the function of setVertexColourFunction.
+        """
+        Parameter.checkBoolean(vectorised)
         self.vertexSizeFunction = vertexSizeFunction
+        self.vectorised["vertexSize"] = vectorised
 
-    def setEdgeSizeFunction(self, edgeSizeFunction):
+    def setEdgeSizeFunction(self, edgeSizeFunction, vectorised=False):
+        """
+        Set a function giving the size of each edge, called in the same way
+        as the function of setEdgeColourFunction.
+        """
+        Parameter.checkBoolean(vectorised)
         self.edgeSizeFunction = edgeSizeFunction
+        self.vectorised["edgeSize"] = vectorised
 
-    def setEdgeWeightFunction(self, edgeWeightFunction):
+    def setEdgeWeightFunction(self, edgeWeightFunction, vectorised=False):
+        """
+        Set a function giving the weight of each edge, called in the same way
+        as the function of setEdgeColourFunction.
+        """
+        Parameter.checkBoolean(vectorised)
         self.edgeWeightFunction = edgeWeightFunction
+        self.vectorised["edgeWeight"] = vectorised
     
-    def writeToFile(self, fileName, graph):
+    def writeToFile(self, fileName, graph, compress=False):
+        """
+        Write the graph to the Pajek file fileName + ".net", or fileName + ".net.gz"
+        compressed with gzip if compress is True. The vertices and edges are
+        formatted and written in chunks. Only the functions which are set are
+        called, and vectorised functions are called once per chunk. For matrix
+        graphs the edges and weights are read from the CSR arrays of the weight
+        matrix.
+
+        :param fileName: The name of the file without an extension.
+        :type fileName: :class:`str`
+
+        :param graph: The graph to write.
+
+        :param compress: Whether to compress the file with gzip.
+        :type compress: :class:`bool`
+        """
+        Parameter.checkBoolean(compress)
         fileName = fileName + ".net"
     
         numVertices = graph.getNumVertices()
-        pajekIndex = 1
+        self.vertexIdDict = {}
         
-        f = open(fileName, 'w')
-        f.write("*Vertices " + str(numVertices) + "\n")
-        logging.info('Writing to Pajek file: ' + fileName)
-        logging.info('Writing vertices')
-
-        for i in graph.getAllVertexIds():
-            Util.printIteration(i, self.printStep, graph.getNumVertices())
-            self.vertexIdDict[i] = pajekIndex
-            vertexSize = self.getVertexSize(i, graph)
-            vertexColour = self.getVertexColour(i, graph)
-
-            vertexString = str(pajekIndex) + ' "' + str(pajekIndex) + '" '
-            vertexString = vertexString + "0.0 0.0 0.0 "
-            vertexString = vertexString + "x_fact " + str(vertexSize) + " "
-            vertexString = vertexString + "y_fact " + str(vertexSize) + " "
-            vertexString = vertexString + "ic " + vertexColour + " "
-            vertexString = vertexString + "bc " + vertexColour + " \n"
-            f.write(vertexString)
-
-            pajekIndex += 1
-
-        logging.info('Writing edges')
-        if graph.isUndirected(): 
-            f.write("*Edges\n")
-            f.write(self.__getEdgeString(graph))
+        if compress:
+            fileName = fileName + ".gz"
+            f = gzip.open(fileName, "wt", compresslevel=6)
         else:
-            f.write("*Arcs\n")
-            f.write(self.__getArcString(graph))
+            f = open(fileName, 'w')
+
+        try:
+            f.write("*Vertices " + str(numVertices) + "\n")
+            logging.info('Writing to Pajek file: ' + fileName)
+            logging.info('Writing vertices')
+
+            if isinstance(graph, AbstractMatrixGraph):
+                vertexIds = numpy.arange(numVertices)
+                indptr, indices, weights = graph.getCsrArrays()
+                if weights is None:
+                    weights = numpy.ones(indices.shape[0], graph.getSparseWeightMatrix().dtype)
+
+                vertexIds1 = numpy.repeat(vertexIds, numpy.diff(indptr))
+                vertexIds2 = numpy.asarray(indices)
+            else:
+                vertexIds = self.__toIdArray(graph.getAllVertexIds())
+                self.vertexIdDict = dict(zip(vertexIds.tolist(), range(1, numVertices+1)))
+                vertexIds1, vertexIds2, weights = self.__getEdgeArrays(vertexIds, graph)
+
+            for i in range(0, numVertices, self.chunkSize):
+                Util.printIteration(i, self.chunkSize, numVertices)
+                f.write(self.__getVertexString(i+1, vertexIds[i:i+self.chunkSize], graph))
                  
-        f.close()
+            logging.info('Writing edges')
+            numEdges = vertexIds1.shape[0]
+
+            if graph.isUndirected():
+                f.write("*Edges\n")
+            else:
+                f.write("*Arcs\n")
+
+            for i in range(0, numEdges, self.chunkSize):
+                Util.printIteration(i, self.chunkSize, numEdges)
+                edgeSlice = slice(i, i+self.chunkSize)
+
+                if graph.isUndirected():
+                    f.write(self.__getEdgeString(vertexIds1[edgeSlice], vertexIds2[edgeSlice], weights[edgeSlice], graph))
+                else:
+                    f.write(self.__getArcString(vertexIds1[edgeSlice], vertexIds2[edgeSlice], weights[edgeSlice], graph))
+        finally:
+            f.close()
+
         logging.info("Finished, wrote " + str(numVertices) + " vertices & " + str(graph.getNumEdges()) + " edges.")
 
     def getVertexPosition(self, vertexIndex, graph):
         return (0.0, 0.0, 0.0)
 
     def getVertexSize(self, vertexIndex, graph):
-        if self.vertexSizeFunction == None:
-            return 1
-        else:
-            return self.vertexSizeFunction(vertexIndex, graph)
+        return self.__getValue("vertexSize", self.vertexSizeFunction, 1, (vertexIndex, ), graph)
 
     def getVertexColour(self, vertexIndex, graph):
-        if self.vertexColourFunction == None:
-            return self.colours[self.defaultColour]
-        else: 
-            return self.vertexColourFunction(vertexIndex, graph)
+        return self.__getValue("vertexColour", self.vertexColourFunction, self.colours[self.defaultColour], (vertexIndex, ), graph)
 
     def getEdgeSize(self, vertexIndex1, vertexIndex2, graph):
-        if self.edgeSizeFunction == None:
-            return 1
-        else:
-            return self.edgeSizeFunction(vertexIndex1, vertexIndex2, graph)
+        return self.__getValue("edgeSize", self.edgeSizeFunction, 1, (vertexIndex1, vertexIndex2), graph)
 
     def getEdgeColour(self, vertexIndex1, vertexIndex2, graph):
-        if self.edgeColourFunction == None:
-            return self.colours[self.defaultColour]
-        else:
-            return self.edgeColourFunction(vertexIndex1, vertexIndex2, graph)
+        return self.__getValue("edgeColour", self.edgeColourFunction, self.colours[self.defaultColour], (vertexIndex1, vertexIndex2), graph)
     
     def getEdgeWeight(self, vertexIndex1, vertexIndex2, graph):
         if self.edgeWeightFunction == None:
             return graph.getEdge(vertexIndex1, vertexIndex2)
         else:
-            return self.edgeWeightFunction(vertexIndex1, vertexIndex2, graph)
+            return self.__getValue("edgeWeight", self.edgeWeightFunction, None, (vertexIndex1, vertexIndex2), graph)
 
-    def __getEdgeString(self, graph):
-        edgeString = ""
-        ind = 0 
+    def __getValue(self, name, function, default, vertexIds, graph):
+        """
+        Call the function for a single vertex or edge, or return the default
+        if it is not set.
+        """
+        if function == None:
+            return default
+        elif self.vectorised[name]:
+            return function(*([numpy.array([vertexId]) for vertexId in vertexIds] + [graph]))[0]
+        else:
+            return function(*(vertexIds + (graph, )))
         
-        for vertex1 in graph.getAllVertexIds():
-            Util.printIteration(ind, self.printStep, graph.getNumVertices())
-            neighbours = graph.neighbours(vertex1)
-            pajekIndex1 = self.vertexIdDict[vertex1]
+    def __getValues(self, name, function, default, vertexIds, graph):
+        """
+        Call the function for a chunk of vertices or edges given as arrays of
+        vertex IDs, returning a sequence of values. If the function is not set
+        the default is repeated.
+        """
+        if function == None:
+            return itertools.repeat(default)
+        elif self.vectorised[name]:
+            values = function(*(vertexIds + (graph, )))
+            if len(values) != vertexIds[0].shape[0]:
+                raise ValueError("Function for " + name + " returned " + str(len(values)) + " values for " + str(vertexIds[0].shape[0]) + " IDs")
+        else:
+            values = list(map(function, *([ids.tolist() for ids in vertexIds] + [itertools.repeat(graph)])))
             
-            for vertex2 in neighbours:
-                pajekIndex2 = self.vertexIdDict[vertex2]
-                colour = self.getEdgeColour(vertex1, vertex2, graph)
-                edgeString = edgeString + str(pajekIndex1) + " " + str(pajekIndex2) + " " + str(self.getEdgeWeight(vertex1, vertex2, graph))
-                edgeString = edgeString + " w " + str(self.getEdgeSize(vertex1, vertex2, graph))
-                edgeString = edgeString + " c " + colour + "\n"
+        if isinstance(values, numpy.ndarray):
+            values = values.tolist()
                 
-            ind = ind + 1
+        return values
                     
-        return edgeString
+    def __getVertexString(self, pajekIndex, vertexIds, graph):
+        """
+        Format the lines of a chunk of vertices, the first of which has the
+        given Pajek index.
+        """
+        vertexSizes = self.__getValues("vertexSize", self.vertexSizeFunction, 1, (vertexIds, ), graph)
+        vertexColours = self.__getValues("vertexColour", self.vertexColourFunction, self.colours[self.defaultColour], (vertexIds, ), graph)
+        pajekIndices = range(pajekIndex, pajekIndex + vertexIds.shape[0])
     
-    def __getArcString(self, graph):
-        arcString = ""
-        ind = 0 
+        return "".join(map(self.vertexFormat, pajekIndices, vertexSizes, vertexColours))
             
-        for vertex1 in graph.getAllVertexIds():
-            Util.printIteration(ind, self.printStep, graph.getNumVertices())
+    def __getEdgeArrays(self, vertexIds, graph):
+        """
+        Find the edges of a graph which is not a matrix graph in the order of its
+        vertex IDs, as arrays of the vertex IDs of each end and the weights.
+        """
+        vertexIds1 = []
+        vertexIds2 = []
+        weights = []
             
-            neighbours = graph.neighbours(vertex1)
-            pajekIndex1 = self.vertexIdDict[vertex1]
+        for vertex1 in vertexIds.tolist():
+            for vertex2 in graph.neighbours(vertex1):
+                vertexIds1.append(vertex1)
+                vertexIds2.append(vertex2)
+                weights.append(graph.getEdge(vertex1, vertex2))
             
-            for vertex2 in neighbours:
-                pajekIndex2 = self.vertexIdDict[vertex2]
-                arcString = arcString + str(pajekIndex1) + " " + str(pajekIndex2) + " " + str(graph.getEdge(vertex1, vertex2))
-                arcString = arcString + " c " + self.colours[self.defaultColour] + "\n"
+        return self.__toIdArray(vertexIds1, vertexIds.dtype), self.__toIdArray(vertexIds2, vertexIds.dtype), self.__toObjectArray(weights)
                 
-            ind = ind + 1
+    def __toIdArray(self, vertexIds, dtype=None):
+        """
+        Convert a list of vertex IDs to a numeric array if they are numbers and
+        otherwise an array of objects.
+        """
+        array = numpy.array(vertexIds, dtype)
+        if array.dtype.kind not in "biuf" or array.ndim != 1:
+            array = self.__toObjectArray(vertexIds)
            
-        return arcString
+        return array
     
+    def __toObjectArray(self, values):
+        """
+        Convert a list to an array of objects, so that the values are unchanged.
+        """
+        array = numpy.empty(len(values), object)
+        array[:] = values
+        return array
+
+    def __getPajekIndices(self, vertexIds):
+        """
+        Map an array of vertex IDs to Pajek indices, which start at 1.
+        """
+        if len(self.vertexIdDict) == 0:
+            return (vertexIds + 1).tolist()
+        else:
+            return [self.vertexIdDict[vertexId] for vertexId in vertexIds.tolist()]
+
+    def __formatWeights(self, weights):
+        """
+        Format an array of edge weights as strings. Numeric weights are formatted
+        using their own dtype, as str does for the values of getEdge, so that for
+        example a float32 weight of 0.1 is written as 0.1.
+        """
+        if weights.dtype == object:
+            return weights.tolist()
+        else:
+            return weights.astype(str).tolist()
+
+    def __getEdgeString(self, vertexIds1, vertexIds2, weights, graph):
+        """
+        Format the lines of a chunk of undirected edges.
+        """
+        if self.edgeWeightFunction != None:
+            weights = self.__getValues("edgeWeight", self.edgeWeightFunction, None, (vertexIds1, vertexIds2), graph)
+        else:
+            weights = self.__formatWeights(weights)
+
+        edgeSizes = self.__getValues("edgeSize", self.edgeSizeFunction, 1, (vertexIds1, vertexIds2), graph)
+        edgeColours = self.__getValues("edgeColour", self.edgeColourFunction, self.colours[self.defaultColour], (vertexIds1, vertexIds2), graph)
+        pajekIndices1 = self.__getPajekIndices(vertexIds1)
+        pajekIndices2 = self.__getPajekIndices(vertexIds2)
+
+        return "".join(map(self.edgeFormat, pajekIndices1, pajekIndices2, weights, edgeSizes, edgeColours))
+
+    def __getArcString(self, vertexIds1, vertexIds2, weights, graph):
+        """
+        Format the lines of a chunk of directed edges.
+        """
+        pajekIndices1 = self.__getPajekIndices(vertexIds1)
+        pajekIndices2 = self.__getPajekIndices(vertexIds2)
+        arcColours = itertools.repeat(self.colours[self.defaultColour])
+
+        return "".join(map(self.arcFormat, pajekIndices1, pajekIndices2, self.__formatWeights(weights), arcColours))
+
+    vertexFormat = '{0} "{0}" 0.0 0.0 0.0 x_fact {1} y_fact {1} ic {2} bc {2} \n'.format
+    edgeFormat = "{} {} {} w {} c {}\n".format
+    arcFormat = "{} {} {} c {}\n".format
     defaultColour = None
     vertexIdDict = None
     colours = None
\ No newline at end of file
@@ -1,16 +1,27 @@
 
-
 from apgl.io.GraphReader import GraphReader
 from apgl.graph.VertexList import VertexList
-from apgl.graph.SparseGraph import SparseGraph 
+from apgl.graph.SparseGraph import SparseGraph
+from apgl.util.Parameter import Parameter
+import itertools
 import logging
+import re
+import warnings
+import numpy
 
 class SimpleGraphReader(GraphReader):
         '''
         A class to read SimpleGraph files.
         '''
-        def __init__(self):
-            pass
+        def __init__(self, chunkSize=2**16):
+            """
+            Create a reader which parses chunkSize edge lines at a time.
+
+            :param chunkSize: The number of edge lines parsed in each chunk.
+            :type chunkSize: :class:`int`
+            """
+            Parameter.checkInt(chunkSize, 1, float('inf'))
+            self.chunkSize = chunkSize
 
         def readFromFile(self, fileName):
             """
@@ -18,45 +29,154 @@ class SimpleGraphReader(GraphReader):
             must have as its first line "Vertices" followed by a list of
             vertex indices (one per line). Then the lines following "Arcs" or "Edges"
             have a list of pairs of vertex indices represented directed or undirected
-            edges.
+            edges. The edge lines are parsed numerically in chunks and the edges
+            are added to the graph in a single operation. A ValueError is raised
+            if a line has the wrong number of fields, a vertex ID is not an
+            integer or an edge value is zero or non-finite.
             """
             infile = open(fileName, "r")
-            line = infile.readline()
-            line = infile.readline()
-            ind = 0
-            vertexIdDict = {}
-
-            while infile and line != "Edges" and line != "Arcs":
-                vertexIdDict[int(line)] = ind
-                line = infile.readline().strip()
-                ind += 1 
-
-            if line == "Edges":
-                undirected = True
-            elif line == "Arcs":
-                undirected = False
-            else:
-                raise ValueError("Unknown edge types: " + line)
+            try:
+                infile.readline()
+                vertexText = []
+                edgeText = []
+                undirected = None
+
+                #Read the vertex block in chunks up to the Edges or Arcs line
+                while undirected is None:
+                    text = "".join(itertools.islice(infile, self.chunkSize))
+                    if text == "":
+                        raise ValueError("Unknown edge types: no Edges or Arcs line")
 
-            numVertices = len(vertexIdDict)
+                    match = self.edgesPattern.search(text)
+                    if match is None:
+                        vertexText.append(text)
+                    else:
+                        vertexText.append(text[0:match.start()])
+                        edgeText.append(text[match.end():])
+                        undirected = match.group(1) == "Edges"
+
+                edgeArrays = [self.__parseEdges("".join(edgeText))]
+
+                while True:
+                    text = "".join(itertools.islice(infile, self.chunkSize))
+                    if text == "":
+                        break
+
+                    edgeArrays.append(self.__parseEdges(text))
+            finally:
+                infile.close()
+
+            vertexIds = self.__parseLines("".join(vertexText), 1, numpy.int64).ravel()
+            numVertices = vertexIds.shape[0]
             numFeatures = 0
             vList = VertexList(numVertices, numFeatures)
             sGraph = SparseGraph(vList, undirected)
-            line = infile.readline()
 
-            while line:
-                s = line.split()
-                try:
-                    i = vertexIdDict[int(s[0].strip(',').strip())]
-                    j = vertexIdDict[int(s[1].strip(',').strip())]
-                    k = float(s[2].strip(',').strip())
-                except KeyError:
-                    print("Vertex not found in list of vertices.")
-                    raise 
+            edgeArray = numpy.concatenate(edgeArrays)
+            edgeIds = edgeArray[:, 0:2]
 
-                sGraph.addEdge(i, j, k)
-                line = infile.readline()
+            if (edgeIds != numpy.floor(edgeIds)).any():
+                raise ValueError("Vertex IDs of edges must be integers")
+            if (edgeArray[:, 2] == 0).any() or not numpy.isfinite(edgeArray[:, 2]).all():
+                raise ValueError("Cannot add a zero or non-finite edge")
+
+            edges = self.__vertexIndices(vertexIds, edgeIds.astype(numpy.int64))
+            sGraph.addEdges(edges, edgeArray[:, 2])
 
             logging.info("Read graph with " + str(numVertices) + " vertices and " + str(sGraph.getNumEdges()) + " edges")
 
-            return sGraph
\ No newline at end of file
+            return sGraph
+
+        def __parseEdges(self, text):
+            """
+            Parse lines of the form "index1, index2, value" (in which the commas
+            are optional) into an array with a row for each edge.
+            """
+            return self.__parseLines(text.replace(",", " "), 3, numpy.float64)
+
+        def __parseLines(self, text, numFields, dtype):
+            """
+            Parse lines which each have numFields numbers into an array with a
+            row for each line, ignoring blank lines. A ValueError is raised if any
+            line has a different number of fields.
+            """
+            numFieldsList = self.__countFields(text)
+            numFieldsList = numFieldsList[numFieldsList != 0]
+
+            if (numFieldsList != numFields).any():
+                raise ValueError("Lines in SimpleGraph file must have " + str(numFields) + " field(s)")
+
+            values = self.__parseNumbers(text, dtype)
+            return values.reshape((numFieldsList.shape[0], numFields))
+
+        def __countFields(self, text):
+            """
+            Return an array of the number of whitespace separated fields on each
+            line of the text, using the ASCII characters of the text.
+            """
+            chars = numpy.frombuffer(text.encode(), numpy.uint8)
+            space = self.spaceTable[chars]
+
+            #A field starts at a non-space character after a space or at the start
+            starts = ~space
+            starts[1:] &= space[:-1]
+
+            ends = numpy.flatnonzero(chars == ord("\n"))
+            if chars.shape[0] != 0 and chars[-1] != ord("\n"):
+                ends = numpy.r_[ends, chars.shape[0]-1]
+
+            return numpy.diff(numpy.r_[0, numpy.cumsum(starts)[ends]])
+
+        def __parseNumbers(self, text, dtype):
+            """
+            Parse whitespace separated numbers using numpy.fromstring, raising a
+            ValueError if the text contains anything else.
+            """
+            if text == "" or text.isspace():
+                return numpy.zeros(0, dtype)
+
+            with warnings.catch_warnings():
+                warnings.simplefilter("error", DeprecationWarning)
+                try:
+                    return numpy.fromstring(text, dtype, sep=" ")
+                except DeprecationWarning:
+                    raise ValueError("Invalid numbers in SimpleGraph file")
+
+        def __vertexIndices(self, vertexIds, edgeIds):
+            """
+            Map an array of vertex IDs to indices in the list of vertices, using
+            the last index of a repeated ID. A lookup table is used when the IDs
+            are non-negative and not much larger than the number of vertices, and
+            otherwise a binary search of the sorted IDs.
+            """
+            numVertices = vertexIds.shape[0]
+
+            if edgeIds.size == 0:
+                return edgeIds
+            elif numVertices == 0:
+                raise KeyError("Vertex not found in list of vertices.")
+
+            if vertexIds.min() >= 0 and vertexIds.max() < 4*numVertices + 2**16:
+                table = numpy.ones(vertexIds.max()+1, numpy.int64)*-1
+                #Assign in reverse so that the first assignment of the last index is kept
+                reverseInds = numpy.arange(numVertices)[::-1]
+                uniqueIds, firstInds = numpy.unique(vertexIds[::-1], return_index=True)
+                table[uniqueIds] = reverseInds[firstInds]
+
+                inRange = (edgeIds >= 0) & (edgeIds < table.shape[0])
+                edges = table[numpy.where(inRange, edgeIds, 0)]
+                edges[~inRange] = -1
+            else:
+                order = numpy.argsort(vertexIds, kind="mergesort")
+                edges = order[numpy.maximum(numpy.searchsorted(vertexIds, edgeIds, side="right", sorter=order) - 1, 0)]
+                edges[vertexIds[edges] != edgeIds] = -1
+
+            if (edges == -1).any():
+                raise KeyError("Vertex not found in list of vertices.")
+
+            return edges
+
+        edgesPattern = re.compile(r"^\s*(Edges|Arcs)\s*$", re.MULTILINE)
+        #Whether each byte is an ASCII whitespace character
+        spaceTable = numpy.zeros(256, numpy.bool_)
+        spaceTable[[ord(c) for c in " \t\n\r\x0b\x0c"]] = True
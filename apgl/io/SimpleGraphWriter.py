@@ -1,15 +1,26 @@
 
-
 from apgl.io.GraphWriter import GraphWriter
+from apgl.graph.AbstractMatrixGraph import AbstractMatrixGraph
+from apgl.util.Parameter import Parameter
 import logging
+import numpy
 
 class SimpleGraphWriter(GraphWriter):
     '''
     A class to output all edges of a graph in a simple text format
     '''
-    def __init__(self):
+    def __init__(self, chunkSize=2**16):
+        """
+        Create a writer which writes chunkSize edges at a time.
+
+        :param chunkSize: The number of edges formatted and written in each chunk.
+        :type chunkSize: :class:`int`
+        """
+        Parameter.checkInt(chunkSize, 1, float('inf'))
+
         #Map from the IDs given in the graph to 0 ... n
         self.vertexIdDict = {}
+        self.chunkSize = chunkSize
 
     def writeToFile(self, fileName, graph):
         """
@@ -17,42 +28,53 @@ class SimpleGraphWriter(GraphWriter):
         file name. The file has a first line "Vertices" followed by a list of
         vertex indices (one per line). Then the lines following "Arcs" or "Edges"
         have a list of pairs of vertex indices represented directed or undirected
-        edges. 
+        edges. The edges of an AbstractMatrixGraph are taken from getAllEdges
+        and the sparse weight matrix in one pass, and written in chunks.
         """
 
         self.vertexIdDict = {}
         fileName = fileName + ".txt"
         numVertices = graph.getNumVertices()
-        index = 0
 
         f = open(fileName, 'w')
         f.write("Vertices\n")
         logging.info('Writing to SimpleGraph file: ' + fileName)
 
-        for i in graph.getAllVertexIds():
-            self.vertexIdDict[i] = index
-            vertexString = str(index) + "\n"
-            f.write(vertexString)
-            index += 1
+        if isinstance(graph, AbstractMatrixGraph):
+            #The vertex IDs are already 0 ... n-1
+            vertexIds = numpy.arange(numVertices)
+            edges = graph.getAllEdges()
+            W = graph.getSparseWeightMatrix().tocsr()
+            edgeValues = numpy.asarray(W[edges[:, 0], edges[:, 1]]).ravel()
+        else:
+            vertexIds = graph.getAllVertexIds()
+            self.vertexIdDict = dict(zip(vertexIds, range(len(vertexIds))))
+            vertexIds = numpy.arange(len(vertexIds))
+            edges = graph.getAllEdges()
+            edgeValues = [graph.getEdge(vertex1, vertex2) for (vertex1, vertex2) in edges]
+            edges = numpy.array([(self.vertexIdDict[vertex1], self.vertexIdDict[vertex2]) for (vertex1, vertex2) in edges], numpy.int64).reshape((-1, 2))
+
+        for i in range(0, vertexIds.shape[0], self.chunkSize):
+            f.write("\n".join(map(str, vertexIds[i:i+self.chunkSize].tolist())) + "\n")
 
         if graph.isUndirected():
             f.write("Edges\n")
         else:
             f.write("Arcs\n")
-        f.write(self.__getArcString(graph))
-
-        f.close()
-        logging.info("Finished, wrote " + str(numVertices) + " vertices & " + str(graph.getNumEdges()) + " edges.")
 
-    def __getArcString(self, graph):
-        arcString = ""
+        for i in range(0, len(edges), self.chunkSize):
+            f.write(self.__getArcString(edges[i:i+self.chunkSize], edgeValues[i:i+self.chunkSize]))
 
-        for edge in graph.getAllEdges():
-            vertex1 = edge[0]
-            vertex2 = edge[1]
+        f.close()
+        logging.info("Finished, wrote " + str(numVertices) + " vertices & " + str(len(edges)) + " edges.")
 
-            index1 = self.vertexIdDict[vertex1]
-            index2 = self.vertexIdDict[vertex2]
-            arcString = arcString + str(index1) + ", " + str(index2) + ", " + str(graph.getEdge(vertex1, vertex2)) + "\n"
+    def __getArcString(self, edges, edgeValues):
+        """
+        Format a chunk of edges, given as an array of vertex indices, and their
+        values as lines "index1, index2, value". An array of values is formatted
+        using its own dtype, as str does for the values of getEdge.
+        """
+        if isinstance(edgeValues, numpy.ndarray):
+            edgeValues = edgeValues.astype(str).tolist()
 
-        return arcString
\ No newline at end of file
+        return "".join(map("{}, {}, {}\n".format, edges[:, 0].tolist(), edges[:, 1].tolist(), edgeValues))
@@ -5,6 +5,7 @@ import unittest
 from apgl.io.CsvGraphReader import CsvGraphReader
 from apgl.util.PathDefaults import PathDefaults
 import numpy
+import numpy.testing as nptst
 
 
 class CsvGraphReaderTest(unittest.TestCase):
@@ -77,5 +78,37 @@ class CsvGraphReaderTest(unittest.TestCase):
         self.assertTrue(graph.isUndirected())
         self.assertEquals(graph.getVertexList().getNumFeatures(), 0)
 
+    def testReadFromFileChunks(self):
+        fileName = PathDefaults.getTempDir() + "testCsvGraph.csv"
+        fileObj = open(fileName, "w")
+        fileObj.write("id1 id2 gender1 age1 gender2 age2\n")
+        fileObj.write("12 3 0 28 1 26\n")
+        fileObj.write("3 40 1 27 0 42\n")
+        fileObj.write("\n")
+        fileObj.write("5 12 1 35 0 29\n")
+        fileObj.write("40 40 0 43 0 44\n")
+        fileObj.write("3 12 1 30 0 31\n")
+        fileObj.close()
+
+        for undirected in [True, False]:
+            csvGraphReader = CsvGraphReader([0, 2, 3], [1, 4, 5], {}, undirected)
+            graph = csvGraphReader.readFromFile(fileName)
+
+            #Vertices are ordered by id and take the features of the last occurrence
+            nptst.assert_array_equal(graph.getVertexList().getVertices(), numpy.array([[1, 30], [1, 35], [0, 31], [0, 44]]))
+            self.assertEquals(graph.getEdge(2, 0), 1)
+            self.assertEquals(graph.getEdge(0, 3), 1)
+            self.assertEquals(graph.getEdge(1, 2), 1)
+            self.assertEquals(graph.getEdge(3, 3), 1)
+            self.assertEquals(graph.getNumEdges(), 4 if undirected else 5)
+            self.assertEquals(graph.isUndirected(), undirected)
+
+            for chunkSize in [1, 2, 100]:
+                graph2 = csvGraphReader.readFromFile(fileName, chunkSize)
+                nptst.assert_array_equal(graph2.getVertexList().getVertices(), graph.getVertexList().getVertices())
+                nptst.assert_array_equal(graph2.getWeightMatrix(), graph.getWeightMatrix())
+
+        self.assertRaises(ValueError, csvGraphReader.readFromFile, fileName, 0)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
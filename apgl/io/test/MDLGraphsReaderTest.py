@@ -1,4 +1,7 @@
 import unittest
+import os
+import numpy
+import numpy.testing as nptst
 from apgl.io.MDLGraphsReader import MDLGraphsReader
 from apgl.util.PathDefaults import PathDefaults 
 
@@ -73,6 +76,52 @@ class  MDLGraphsReaderTestCase(unittest.TestCase):
         self.assertEquals(getEdge(graphs[1],11, 12), 1)
         self.assertEquals(getEdge(graphs[1],11, 13), 1)
 
+    def testIterateFromFile(self):
+        numpy.random.seed(21)
+        reader = MDLGraphsReader()
+        fileName = PathDefaults.getTempDir() + "testIterate.mdl"
+        atoms = ["C", "H", "N", "O"]
+        molecules = []
+
+        #Write random molecules, including repeated bonds between a pair of atoms
+        f = open(fileName, "w")
+        for i in range(25):
+            numVertices = numpy.random.randint(1, 10)
+            numEdges = numpy.random.randint(0, 15)
+            vertices = numpy.random.randint(0, 4, numVertices)
+            edges = numpy.random.randint(1, numVertices+1, (numEdges, 2))
+            molecules.append((vertices, edges))
+
+            f.write("Molecule " + str(i) + "\n  apgl\n\n")
+            f.write("%3d%3d  0  0  0  0  0  0  0  0999 V2000\n" % (numVertices, numEdges))
+            for vertex in vertices:
+                f.write("    0.0000    0.0000    0.0000 " + atoms[vertex] + "   0  0  0  0  0  0  0  0  0  0  0  0\n")
+            for edge in edges:
+                f.write("%3d%3d  1  0  0  0  0\n" % (edge[0], edge[1]))
+            f.write("M  END\n$$$$\n")
+        f.close()
+
+        graphs = reader.readFromFile(fileName)
+        graphs2 = list(reader.iterateFromFile(fileName, numProcesses=2, chunkSize=3))
+        self.assertEquals(len(graphs), 25)
+        self.assertEquals(len(graphs2), 25)
+
+        for (vertices, edges), graph, graph2 in zip(molecules, graphs, graphs2):
+            nptst.assert_array_equal(graph.getVertexList().getVertices()[:, 0], vertices)
+            W = numpy.zeros((vertices.shape[0], vertices.shape[0]))
+            W[edges[:, 0]-1, edges[:, 1]-1] = 1
+            W[edges[:, 1]-1, edges[:, 0]-1] = 1
+            nptst.assert_array_equal(graph.getWeightMatrix(), W)
+            nptst.assert_array_equal(graph2.getWeightMatrix(), W)
+            nptst.assert_array_equal(graph2.getVertexList().getVertices(), graph.getVertexList().getVertices())
+
+        #Stopping early closes the file and the worker processes
+        iterator = reader.iterateFromFile(fileName, numProcesses=2, chunkSize=2)
+        self.assertEquals(next(iterator).getNumVertices(), molecules[0][0].shape[0])
+        iterator.close()
+
+        os.remove(fileName)
+
 if __name__ == '__main__':
     unittest.main()
 
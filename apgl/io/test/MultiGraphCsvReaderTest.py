@@ -91,6 +91,34 @@ class MultiGraphCsvReaderTest(unittest.TestCase):
 
         #Next test out graphs with edge weights
         
+    def testReadGraphBulk(self):
+        tempDir = PathDefaults.getTempDir()
+        vertexFileName = tempDir + "testVertices.csv"
+        edgeFileNames = [tempDir + "testEdges1.csv", tempDir + "testEdges2.csv"]
+
+        numpy.savetxt(vertexFileName, numpy.array([[30, 1, 2], [10, 3, 4], [20, 5, 6], [40, 7, 8]]), header="id a b", comments="")
+        numpy.savetxt(edgeFileNames[0], numpy.array([[30, 10], [20, 40], [10, 10]]))
+        numpy.savetxt(edgeFileNames[1], numpy.array([[40, 30, 0.5], [20, 10, 2]]))
+
+        multiGraphCsvReader = MultiGraphCsvReader(0, [1, 2], {})
+
+        for undirected in [True, False]:
+            sparseMultiGraph = multiGraphCsvReader.readGraph(vertexFileName, edgeFileNames, undirected)
+            sparseMultiGraph2 = multiGraphCsvReader.readGraph(vertexFileName, edgeFileNames, undirected, stacked=True)
+
+            self.assertTrue((sparseMultiGraph.getVertex(1) == numpy.array([3, 4])).all())
+            self.assertEquals(sparseMultiGraph.getEdge(0, 1, 0), 1)
+            self.assertEquals(sparseMultiGraph.getEdge(1, 1, 0), 1)
+            self.assertEquals(sparseMultiGraph.getEdge(3, 0, 1), 0.5)
+            self.assertEquals(sparseMultiGraph.getEdge(2, 1, 1), 2)
+            self.assertEquals(sparseMultiGraph.getEdge(1, 2, 1), 2 if undirected else None)
+            self.assertEquals(sparseMultiGraph.getNumEdges(), 5)
+
+            self.assertTrue(sparseMultiGraph2.stacked)
+            self.assertTrue((sparseMultiGraph2.getAllEdges() == sparseMultiGraph.getAllEdges()).all())
+
+        numpy.savetxt(edgeFileNames[1], numpy.array([[40, 35]]))
+        self.assertRaises(ValueError, multiGraphCsvReader.readGraph, vertexFileName, edgeFileNames)
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
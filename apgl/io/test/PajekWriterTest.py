@@ -7,12 +7,15 @@ from apgl.io.PajekWriter import PajekWriter
 from apgl.graph.DenseGraph import DenseGraph
 from apgl.graph.DictGraph import DictGraph
 from apgl.graph.SparseGraph import SparseGraph
+from apgl.graph.CsrGraph import CsrGraph
 from apgl.graph.VertexList import VertexList
 from apgl.generator.ErdosRenyiGenerator import ErdosRenyiGenerator
 from apgl.generator.SmallWorldGenerator import SmallWorldGenerator
 from apgl.util.PathDefaults import PathDefaults
 import unittest
 import os
+import gzip
+import numpy
 
 class PajekWriterTest(unittest.TestCase):
     def setUp(self):
@@ -165,6 +168,58 @@ class PajekWriterTest(unittest.TestCase):
 
         pw.writeToFile(directory + "smallWorld20", graph)
         
+    def testWriteToFileVectorised(self):
+        directory = PathDefaults.getTempDir()
+        colours = numpy.array(["grey05", "grey10", "grey15", "grey20", "grey25"])
+
+        for graph in [self.dGraph1, self.sGraph2, self.dctGraph1]:
+            pw = PajekWriter()
+            pw.setVertexColourFunction(lambda i, graph: colours[i % 5])
+            pw.setVertexSizeFunction(lambda i, graph: i)
+            pw.setEdgeColourFunction(lambda i, j, graph: colours[i % 5])
+            pw.setEdgeSizeFunction(lambda i, j, graph: i+j)
+            pw.setEdgeWeightFunction(lambda i, j, graph: i*j)
+            pw.writeToFile(directory + "pajekTest1", graph)
+
+            pw = PajekWriter(chunkSize=2)
+            pw.setVertexColourFunction(lambda i, graph: colours[i % 5], True)
+            pw.setVertexSizeFunction(lambda i, graph: i, True)
+            pw.setEdgeColourFunction(lambda i, j, graph: colours[i % 5], True)
+            pw.setEdgeSizeFunction(lambda i, j, graph: i+j, True)
+            pw.setEdgeWeightFunction(lambda i, j, graph: i*j, True)
+            pw.writeToFile(directory + "pajekTest2", graph, True)
+
+            self.assertEquals(pw.getVertexSize(3, graph), 3)
+            self.assertEquals(pw.getEdgeColour(2, 4, graph), "grey15")
+
+            f = open(directory + "pajekTest1.net")
+            text1 = f.read()
+            f.close()
+            f = gzip.open(directory + "pajekTest2.net.gz", "rt")
+            text2 = f.read()
+            f.close()
+
+            self.assertEquals(text1, text2)
+            #Undirected edges are written in both directions
+            numLines = graph.getNumVertices() + (1 + graph.isUndirected())*graph.getNumEdges() + 2
+            self.assertEquals(text1.count("\n"), numLines)
+
+            pw.setVertexSizeFunction(lambda i, graph: [1], True)
+            self.assertRaises(ValueError, pw.writeToFile, directory + "pajekTest2", graph)
+
+            os.remove(directory + "pajekTest1.net")
+            os.remove(directory + "pajekTest2.net.gz")
+
+        #Weights are formatted using the dtype of the weight matrix
+        graph = CsrGraph(VertexList(3, 0), False, dtype=numpy.float32)
+        graph.addEdge(0, 1, 0.1)
+        pw = PajekWriter()
+        pw.writeToFile(directory + "pajekTest3", graph)
+        f = open(directory + "pajekTest3.net")
+        self.assertEquals(f.read().splitlines()[-1], "1 2 0.1 c Black")
+        f.close()
+        os.remove(directory + "pajekTest3.net")
+            
 
  
 
@@ -2,6 +2,7 @@
 
 import unittest
 import logging
+import os
 from apgl.io.SimpleGraphReader import SimpleGraphReader
 from apgl.util.PathDefaults import PathDefaults 
 
@@ -50,6 +51,72 @@ class  SimpleGraphReaderTest(unittest.TestCase):
         self.assertEquals(graph.getEdge(2, 2), 1)
         self.assertEquals(graph.getEdge(4, 0), 1)
 
+    def testReadChunks(self):
+        fileName = PathDefaults.getTempDir() + "simpleGraphChunks.txt"
+        fileObj = open(fileName, "w")
+        fileObj.write("Vertices\n5\n3\n8\n0\nArcs\n")
+        fileObj.write("5, 3, 1.5\n0 8 2\n\n3, 3, 1\n5, 3, 0.5\n")
+        fileObj.close()
+
+        for chunkSize in [1, 2, 10]:
+            graph = SimpleGraphReader(chunkSize).readFromFile(fileName)
+
+            self.assertEquals(graph.isUndirected(), False)
+            self.assertEquals(graph.getNumVertices(), 4)
+            self.assertEquals(graph.getNumEdges(), 3)
+            self.assertEquals(graph.getEdge(0, 1), 0.5)
+            self.assertEquals(graph.getEdge(1, 0), None)
+            self.assertEquals(graph.getEdge(3, 2), 2)
+            self.assertEquals(graph.getEdge(1, 1), 1)
+
+        fileObj = open(fileName, "a")
+        fileObj.write("5, 7, 1\n")
+        fileObj.close()
+        self.assertRaises(KeyError, SimpleGraphReader().readFromFile, fileName)
+
+        fileObj = open(fileName, "a")
+        fileObj.write("5, 3\n")
+        fileObj.close()
+        self.assertRaises(ValueError, SimpleGraphReader().readFromFile, fileName)
+
+    def testReadMalformed(self):
+        fileName = PathDefaults.getTempDir() + "simpleGraphMalformed.txt"
+        reader = SimpleGraphReader(2)
+
+        def writeFile(text):
+            fileObj = open(fileName, "w")
+            fileObj.write(text)
+            fileObj.close()
+
+        #Edge lines without weights
+        writeFile("Vertices\n0\n1\n2\nEdges\n0, 1\n1, 2\n2, 1\n")
+        self.assertRaises(ValueError, reader.readFromFile, fileName)
+
+        #Missing and extra fields which give the right number of values in total
+        writeFile("Vertices\n0\n1\n2\nEdges\n0, 1\n1, 2, 1, 1\n")
+        self.assertRaises(ValueError, reader.readFromFile, fileName)
+
+        writeFile("Vertices\n0 1\n2\nEdges\n0, 1, 1\n")
+        self.assertRaises(ValueError, reader.readFromFile, fileName)
+
+        writeFile("Vertices\n0\n1\n2\nEdges\n0, 1, x\n")
+        self.assertRaises(ValueError, reader.readFromFile, fileName)
+
+        #Non-integral vertex IDs and zero or non-finite edge values
+        writeFile("Vertices\n0\n1\n2\nEdges\n0.7, 1, 1\n")
+        self.assertRaises(ValueError, reader.readFromFile, fileName)
+
+        for value in ["0", "inf", "nan"]:
+            writeFile("Vertices\n0\n1\n2\nEdges\n0, 1, " + value + "\n")
+            self.assertRaises(ValueError, reader.readFromFile, fileName)
+
+        #Blank lines and a last line without a newline are allowed
+        writeFile("Vertices\n0\n1\n2\nEdges\n0, 1, 1\n \n2, 1, 0.5")
+        graph = reader.readFromFile(fileName)
+        self.assertEquals(graph.getNumEdges(), 2)
+        self.assertEquals(graph.getEdge(1, 2), 0.5)
+
+        os.remove(fileName)
 
 if __name__ == '__main__':
     unittest.main()
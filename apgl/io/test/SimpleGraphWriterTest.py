@@ -1,8 +1,14 @@
 
 import unittest
 import os
+import numpy
+import numpy.testing as nptst
 from apgl.graph.DictGraph import DictGraph
+from apgl.graph.SparseGraph import SparseGraph
+from apgl.graph.DenseGraph import DenseGraph
+from apgl.graph.GeneralVertexList import GeneralVertexList
 from apgl.io.SimpleGraphWriter import SimpleGraphWriter
+from apgl.io.SimpleGraphReader import SimpleGraphReader
 from apgl.util.PathDefaults import PathDefaults 
 
 class  SimpleGraphWriterTest(unittest.TestCase):
@@ -36,6 +42,46 @@ class  SimpleGraphWriterTest(unittest.TestCase):
         #os.remove(fileName1 + ".txt")
         #os.remove(fileName2 + ".txt")
 
+    def testWriteMatrixGraph(self):
+        numVertices = 10
+        tempDir = PathDefaults.getTempDir()
+
+        for undirected in [True, False]:
+            graph = SparseGraph(GeneralVertexList(numVertices), undirected)
+            graph.addEdges(numpy.array([[0, 1], [2, 5], [9, 3], [4, 4]]), numpy.array([0.5, 1, 2, 0.1]))
+
+            sgw = SimpleGraphWriter(chunkSize=3)
+            fileName = tempDir + "sparseTest"
+            sgw.writeToFile(fileName, graph)
+
+            lines = open(fileName + ".txt").read().splitlines()
+            self.assertEquals(lines[0:numVertices+2], ["Vertices"] + [str(i) for i in range(numVertices)] + ["Edges" if undirected else "Arcs"])
+
+            edgeLines = ["%d, %d, %s" % (i, j, graph.getEdge(i, j)) for i, j in graph.getAllEdges()]
+            self.assertEquals(lines[numVertices+2:], edgeLines)
+
+            graph2 = SimpleGraphReader(chunkSize=2).readFromFile(fileName + ".txt")
+            nptst.assert_array_equal(graph2.getWeightMatrix(), graph.getWeightMatrix())
+            self.assertEquals(graph2.isUndirected(), undirected)
+
+            #DictGraphs are mapped to indices in the order of their vertex ids
+            sgw.writeToFile(fileName, self.dctGraph2)
+            graph2 = SimpleGraphReader().readFromFile(fileName + ".txt")
+            vertexIds = self.dctGraph2.getAllVertexIds()
+
+            self.assertEquals(graph2.getNumEdges(), self.dctGraph2.getNumEdges())
+            for vertex1, vertex2 in self.dctGraph2.getAllEdges():
+                self.assertEquals(graph2.getEdge(vertexIds.index(vertex1), vertexIds.index(vertex2)), self.dctGraph2.getEdge(vertex1, vertex2))
+
+        #Weights are written using the dtype of the weight matrix
+        for graph in [SparseGraph(GeneralVertexList(3), dtype=numpy.float32), DenseGraph(GeneralVertexList(3), dtype=numpy.float32)]:
+            graph.addEdge(0, 1, 0.1)
+            graph.addEdge(2, 1, 1.3)
+            SimpleGraphWriter().writeToFile(fileName, graph)
+
+            lines = open(fileName + ".txt").read().splitlines()
+            self.assertEquals(lines[5:], ["1, 0, 0.1", "2, 1, 1.3"])
+
 if __name__ == '__main__':
     unittest.main()
 
@@ -0,0 +1,200 @@
+"""
+A least recently used cache of matrices and vectors derived from a graph, with
+a budget on the total number of bytes stored.
+"""
+
+import sys
+import copy
+import weakref
+import functools
+import collections
+import numpy
+import scipy.sparse
+
+
+class MatrixCache(object):
+    """
+    Stores values computed from a source object, such as the weight matrix of a
+    graph, together with the version of the source they were computed from.
+    When validate is called with a different version or source object all
+    entries are discarded. Entries are evicted in least recently used order
+    when the total size exceeds maxBytes, and values larger than maxBytes are
+    not stored. The numbers of hits and misses are recorded so that the budget
+    can be tuned.
+    """
+    def __init__(self, maxBytes=2**28):
+        """
+        Create an empty cache.
+
+        :param maxBytes: The maximum total size of the cached values in bytes.
+        :type maxBytes: :class:`int`
+        """
+        if maxBytes < 0:
+            raise ValueError("maxBytes must be non-negative: " + str(maxBytes))
+
+        self.maxBytes = maxBytes
+        self.entries = collections.OrderedDict()
+        self.numBytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        self.version = None
+        self.sourceRef = None
+
+    @staticmethod
+    def size(value):
+        """
+        Estimate the number of bytes used by a value: the array data of numpy
+        arrays and scipy.sparse matrices, summed over the elements of lists and
+        tuples.
+        """
+        if isinstance(value, numpy.ndarray):
+            return value.nbytes
+        elif scipy.sparse.issparse(value):
+            arrays = [getattr(value, name, None) for name in ["data", "indices", "indptr", "row", "col", "offsets"]]
+            numBytes = sum([array.nbytes for array in arrays if isinstance(array, numpy.ndarray)])
+            return numBytes if numBytes != 0 else value.nnz*(value.dtype.itemsize + 16)
+        elif isinstance(value, (list, tuple)):
+            return sys.getsizeof(value) + sum([MatrixCache.size(item) for item in value])
+        else:
+            return sys.getsizeof(value)
+
+    @staticmethod
+    def setReadOnly(value):
+        """
+        Make the array data of a value read-only: numpy arrays, the arrays of
+        scipy.sparse matrices and the elements of lists and tuples.
+        """
+        if isinstance(value, numpy.ndarray):
+            value.flags.writeable = False
+        elif scipy.sparse.issparse(value):
+            for name in ["data", "indices", "indptr", "row", "col"]:
+                array = getattr(value, name, None)
+                if isinstance(array, numpy.ndarray):
+                    array.flags.writeable = False
+        elif isinstance(value, (list, tuple)):
+            for item in value:
+                MatrixCache.setReadOnly(item)
+
+    @staticmethod
+    def view(value):
+        """
+        Return a view of a value which shares its array data: numpy arrays are
+        returned as views, scipy.sparse matrices as shallow copies and lists
+        and tuples as new containers of views of their elements. The cost does
+        not depend on the size of the arrays.
+        """
+        if isinstance(value, numpy.ndarray):
+            return value.view()
+        elif scipy.sparse.issparse(value):
+            return copy.copy(value)
+        elif isinstance(value, (list, tuple)):
+            return type(value)([MatrixCache.view(item) for item in value])
+        else:
+            return value
+
+    def validate(self, version, source):
+        """
+        Discard all entries if they were not computed from the given version of
+        source, and record these as the current version and source.
+
+        :param version: An integer version number of the source.
+        :type version: :class:`int`
+
+        :param source: The object from which values are derived.
+        """
+        if self.version == version and self.sourceRef is not None and self.sourceRef() is source:
+            return
+
+        self.clear()
+        self.version = version
+
+        #Use a weak reference so that the cache does not keep a replaced source alive
+        try:
+            self.sourceRef = weakref.ref(source)
+        except TypeError:
+            self.sourceRef = lambda: source
+
+    def get(self, key):
+        """
+        Return the value for a key, or None if it is not in the cache.
+        """
+        if key in self.entries:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return self.entries[key][0]
+
+        self.misses += 1
+        return None
+
+    def put(self, key, value):
+        """
+        Store a value under a key, evicting the least recently used entries to
+        stay within the byte budget.
+        """
+        numBytes = MatrixCache.size(value)
+        self.remove(key)
+
+        if numBytes > self.maxBytes:
+            return
+
+        self.entries[key] = (value, numBytes)
+        self.numBytes += numBytes
+        self.__evict()
+
+    def remove(self, key):
+        if key in self.entries:
+            self.numBytes -= self.entries.pop(key)[1]
+
+    def __evict(self):
+        while self.numBytes > self.maxBytes:
+            value, numBytes = self.entries.popitem(last=False)[1]
+            self.numBytes -= numBytes
+
+    def setMaxBytes(self, maxBytes):
+        """
+        Set the byte budget, evicting entries if necessary.
+        """
+        if maxBytes < 0:
+            raise ValueError("maxBytes must be non-negative: " + str(maxBytes))
+
+        self.maxBytes = maxBytes
+        self.__evict()
+
+    def clear(self):
+        """
+        Remove all entries. The hit and miss counts are kept.
+        """
+        self.entries.clear()
+        self.numBytes = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def cached(method):
+        """
+        Decorate a method of AbstractMatrixGraph whose result depends only on the
+        weight matrix W and the arguments, so that results are stored in the
+        matrix cache of the graph (see AbstractMatrixGraph.getMatrixCache). The
+        cache is keyed by the method, its arguments, the version of the graph
+        and the identity of W. The array data of cached values is read-only
+        (see setReadOnly) and each call returns a view of the cached value, so
+        changing the result in place raises a ValueError. Callers which change
+        the result should copy it first.
+        """
+        @functools.wraps(method)
+        def cachedMethod(self, *args, **kwargs):
+            cache = self.getMatrixCache()
+            cache.validate(self.version, self.W)
+            key = (method.__qualname__, args, tuple(sorted(kwargs.items())))
+
+            value = cache.get(key)
+            if value is None:
+                value = method(self, *args, **kwargs)
+                MatrixCache.setReadOnly(value)
+                cache.put(key, value)
+
+            return MatrixCache.view(value)
+
+        return cachedMethod
@@ -0,0 +1,911 @@
+"""
+Graph algorithms which operate directly on the compressed sparse row (CSR)
+arrays of a weight matrix. These avoid building dense matrices or Python
+adjacency lists, and are used by the graph classes for the expensive statistics.
+"""
+
+import multiprocessing
+import numpy
+import scipy.sparse
+import scipy.sparse.csgraph
+import scipy.sparse.linalg
+
+class SparseGraphUtils(object):
+    @staticmethod
+    def adjacencyPattern(W):
+        """
+        Take a square matrix W (a numpy array or any scipy.sparse matrix) and return
+        a csr_matrix with an entry of 1 for each non-zero element of W. Explicitly
+        stored zeros are removed.
+
+        :param W: A square weight matrix.
+
+        :returns: The adjacency pattern of W as a scipy.sparse.csr_matrix.
+        """
+        W = scipy.sparse.csr_matrix(W)
+        A = scipy.sparse.csr_matrix(((W.data != 0).astype(numpy.float64), W.indices.copy(), W.indptr.copy()), shape=W.shape)
+        A.eliminate_zeros()
+
+        return A
+
+    @staticmethod
+    def edgeEntries(edgeIndexArray, edgeValues, numVertices, undirected=True):
+        """
+        Convert an array of edges and their values into the matrix entries to be
+        written to the weight matrix. For an undirected graph each edge gives
+        two symmetric entries. If an entry is written more than once then the
+        value of the last edge is kept, as if the edges were added in order.
+
+        :param edgeIndexArray: An array with a pair of vertex indices in each row.
+        :type edgeIndexArray: :class:`numpy.ndarray`
+
+        :param edgeValues: The non-zero edge values, or an empty list for edges of value 1.
+
+        :param numVertices: The number of vertices in the graph.
+        :type numVertices: :class:`int`
+
+        :param undirected: Whether to add the symmetric entries.
+        :type undirected: :class:`bool`
+
+        :returns: Arrays of the rows, columns and values of the unique entries, sorted by row and then column.
+        """
+        edgeIndexArray = numpy.array(edgeIndexArray, numpy.int64).reshape((-1, 2))
+        edgeValues = numpy.array(edgeValues).ravel()
+
+        if (edgeIndexArray < 0).any() or (edgeIndexArray >= numVertices).any():
+            raise ValueError("Invalid indices for edges.")
+
+        if edgeValues.shape[0] == 0:
+            edgeValues = numpy.ones(edgeIndexArray.shape[0])
+        elif edgeValues.shape[0] != edgeIndexArray.shape[0]:
+            raise ValueError("Require a value for each edge: " + str(edgeValues.shape[0]) + " != " + str(edgeIndexArray.shape[0]))
+        elif (edgeValues == 0).any():
+            raise ValueError("Invalid entry, found zero edge value(s): " + str(numpy.nonzero(edgeValues==0)[0]))
+
+        rows, cols = edgeIndexArray[:, 0], edgeIndexArray[:, 1]
+
+        #Interleave the symmetric entries so that edge order is preserved
+        if undirected:
+            rows, cols = numpy.c_[rows, cols].ravel(), numpy.c_[cols, rows].ravel()
+            edgeValues = numpy.repeat(edgeValues, 2)
+
+        return SparseGraphUtils.lastWrites(rows, cols, edgeValues, numVertices)
+
+    @staticmethod
+    def lastWrites(rows, cols, values, numVertices):
+        """
+        Given a sequence of writes of values to entries (rows[i], cols[i]) of a
+        square matrix, return the unique entries and the last value written to
+        each, sorted by row and then column.
+        """
+        rows = numpy.array(rows, numpy.int64)
+        cols = numpy.array(cols, numpy.int64)
+        values = numpy.array(values)
+
+        #The first occurrence in the reversed entries is the last write
+        keys = rows[::-1]*numVertices + cols[::-1]
+        keys, inds = numpy.unique(keys, return_index=True)
+
+        return keys//numVertices, keys%numVertices, values[::-1][inds]
+
+    @staticmethod
+    def replaceEntries(W, rows, cols, values):
+        """
+        Replace the given unique entries of a sparse matrix W, in which a value
+        of zero removes the entry, using a single sparse addition. 
+
+        :returns: A new csr_matrix with the replaced entries. 
+        """
+        W = W.tocsr()
+        mask = scipy.sparse.csr_matrix((numpy.ones(rows.shape[0], W.dtype), (rows, cols)), shape=W.shape)
+        V = scipy.sparse.csr_matrix((values.astype(W.dtype), (rows, cols)), shape=W.shape)
+        V.eliminate_zeros()
+
+        return W - W.multiply(mask) + V
+
+    @staticmethod
+    def indexDtype(maxValue):
+        """
+        The smallest of int32 and int64 which can store indices up to maxValue,
+        as used for the indices and indptr arrays of a CSR matrix.
+        """
+        if maxValue <= numpy.iinfo(numpy.int32).max:
+            return numpy.dtype(numpy.int32)
+        else:
+            return numpy.dtype(numpy.int64)
+
+    @staticmethod
+    def defaultChunkSize(numVertices, maxElements=2**22):
+        """
+        The number of BFS sources processed together so that the per-chunk dense
+        state (chunkSize x numVertices) has at most maxElements entries.
+        """
+        return int(max(1, min(numVertices, maxElements//max(numVertices, 1))))
+
+    @staticmethod
+    def bfsChunks(W, sources=None, chunkSize=None):
+        """
+        A generator which computes unweighted shortest path (hop) distances from
+        a set of source vertices using level-synchronous breadth first search
+        over the CSR arrays of W. A chunk of sources is expanded at once: each
+        level multiplies the sparse frontier matrix by the adjacency matrix, so
+        the work per level is proportional to the number of edges leaving the
+        frontier. Edges are followed from row to column, i.e. along out-edges for
+        a directed graph. Only one chunk of distances is held in memory at a time.
+
+        :param W: A square weight matrix in which non-zero entries are edges.
+
+        :param sources: An array of source vertex indices, or None to use all vertices.
+
+        :param chunkSize: The number of sources to expand together, or None to choose automatically.
+
+        :returns: Tuples (chunkSources, D) where D[i, j] is the hop distance from chunkSources[i] to vertex j (inf if unreachable).
+        """
+        A = SparseGraphUtils.adjacencyPattern(W)
+        numVertices = A.shape[0]
+
+        if sources is None:
+            sources = numpy.arange(numVertices)
+        else:
+            sources = numpy.array(sources, numpy.int64).ravel()
+
+        if chunkSize is None:
+            chunkSize = SparseGraphUtils.defaultChunkSize(numVertices)
+
+        for start in range(0, sources.shape[0], chunkSize):
+            chunkSources = sources[start:start+chunkSize]
+            k = chunkSources.shape[0]
+            rows = numpy.arange(k)
+            D = numpy.ones((k, numVertices))*numpy.inf
+
+            visited = numpy.zeros((k, numVertices), numpy.bool_)
+            visited[rows, chunkSources] = True
+            D[rows, chunkSources] = 0
+
+            frontier = scipy.sparse.csr_matrix((numpy.ones(k), (rows, chunkSources)), shape=(k, numVertices))
+            level = 0
+
+            while frontier.nnz != 0:
+                level += 1
+                reached = frontier.dot(A).tocoo()
+                unvisited = numpy.logical_not(visited[reached.row, reached.col])
+                rows2 = reached.row[unvisited]
+                cols2 = reached.col[unvisited]
+
+                visited[rows2, cols2] = True
+                D[rows2, cols2] = level
+
+                #The rows of reached are in order so the CSR arrays can be built without sorting
+                indptr = numpy.r_[0, numpy.cumsum(numpy.bincount(rows2, minlength=k))]
+                frontier = scipy.sparse.csr_matrix((numpy.ones(rows2.shape[0]), cols2, indptr), shape=(k, numVertices))
+
+            yield chunkSources, D
+
+    @staticmethod
+    def dijkstraChunks(W, sources=None, chunkSize=None):
+        """
+        A generator which computes weighted shortest path distances from a set
+        of source vertices in chunks, using Dijkstra's algorithm from
+        scipy.sparse.csgraph. Weights must be non-negative and zero entries of W
+        are not edges.
+
+        :param W: A square weight matrix in which non-zero entries are edges.
+
+        :param sources: An array of source vertex indices, or None to use all vertices.
+
+        :param chunkSize: The number of sources per chunk, or None to choose automatically.
+
+        :returns: Tuples (chunkSources, D) where D[i, j] is the distance from chunkSources[i] to vertex j (inf if unreachable).
+        """
+        W = scipy.sparse.csr_matrix(W, copy=True)
+        W.eliminate_zeros()
+        numVertices = W.shape[0]
+
+        if sources is None:
+            sources = numpy.arange(numVertices)
+        else:
+            sources = numpy.array(sources, numpy.int64).ravel()
+
+        if chunkSize is None:
+            chunkSize = SparseGraphUtils.defaultChunkSize(numVertices)
+
+        for start in range(0, sources.shape[0], chunkSize):
+            chunkSources = sources[start:start+chunkSize]
+            D = scipy.sparse.csgraph.dijkstra(W, directed=True, indices=chunkSources)
+            yield chunkSources, numpy.atleast_2d(D)
+
+    @staticmethod
+    def distanceChunks(W, useWeights=False, sources=None, chunkSize=None):
+        """
+        A generator of chunks of shortest path distances from the given sources,
+        using bfsChunks if useWeights is False and otherwise dijkstraChunks.
+
+        :returns: Tuples (chunkSources, D) where D[i, j] is the distance from chunkSources[i] to vertex j.
+        """
+        if useWeights:
+            return SparseGraphUtils.dijkstraChunks(W, sources, chunkSize)
+        else:
+            return SparseGraphUtils.bfsChunks(W, sources, chunkSize)
+
+    @staticmethod
+    def bfsDistances(W, sources=None, chunkSize=None):
+        """
+        Compute the unweighted shortest path (hop) distances from a set of source
+        vertices using breadth first search over the CSR arrays of W (see bfsChunks).
+
+        :param W: A square weight matrix in which non-zero entries are edges.
+
+        :param sources: An array of source vertex indices, or None to use all vertices.
+
+        :param chunkSize: The number of sources to expand together, or None to choose automatically.
+
+        :returns: An array whose ijth entry is the hop distance from sources[i] to vertex j (inf if unreachable).
+        """
+        numSources = W.shape[0] if sources is None else numpy.array(sources).size
+        P = numpy.zeros((numSources, W.shape[0]))
+        start = 0
+
+        for chunkSources, D in SparseGraphUtils.bfsChunks(W, sources, chunkSize):
+            P[start:start+chunkSources.shape[0], :] = D
+            start += chunkSources.shape[0]
+
+        return P
+
+    @staticmethod
+    def componentLabels(W, connection="weak"):
+        """
+        Label the connected components of the graph with weight matrix W in a
+        single sweep over its CSR arrays (using scipy.sparse.csgraph). Labels
+        are ordered by decreasing component size, with ties broken by the
+        smallest vertex index in each component.
+
+        :param W: A square weight matrix in which non-zero entries are edges.
+
+        :param connection: Either "weak" or "strong", the type of connectivity for directed edges.
+        :type connection: :class:`str`
+
+        :returns: An array of component labels for each vertex and an array of component sizes.
+        """
+        if connection not in ["weak", "strong"]:
+            raise ValueError("Invalid connection: " + str(connection))
+
+        A = SparseGraphUtils.adjacencyPattern(W)
+        if A.shape[0] == 0:
+            return numpy.zeros(0, numpy.int64), numpy.zeros(0, numpy.int64)
+
+        numComponents, labels = scipy.sparse.csgraph.connected_components(A, directed=True, connection=connection)
+        sizes = numpy.bincount(labels, minlength=numComponents)
+        firstVertices = numpy.unique(labels, return_index=True)[1]
+
+        order = numpy.lexsort((firstVertices, -sizes))
+        newLabels = numpy.zeros(numComponents, numpy.int64)
+        newLabels[order] = numpy.arange(numComponents)
+
+        return newLabels[labels], sizes[order]
+
+    @staticmethod
+    def componentLists(labels, sizes):
+        """
+        Convert component labels and sizes, as returned by componentLabels, into
+        a list of sorted lists of vertex indices, one for each label.
+
+        :param labels: An array of component labels for each vertex.
+        :type labels: :class:`numpy.ndarray`
+
+        :param sizes: An array of component sizes.
+        :type sizes: :class:`numpy.ndarray`
+        """
+        inds = numpy.argsort(labels, kind="mergesort")
+        return [x.tolist() for x in numpy.split(inds, numpy.cumsum(sizes)[:-1])] if sizes.shape[0] != 0 else []
+
+    @staticmethod
+    def hyperLogLogSize(relativeError):
+        """
+        The number of registers of a HyperLogLog counter whose relative standard
+        error 1.04/sqrt(m) is at most relativeError. This is a power of 2 between
+        16 and 65536, and each register takes one byte, so a relativeError of
+        0.05 gives 512 bytes per counter and 0.1 gives 128 bytes.
+
+        :param relativeError: The target relative standard error.
+        :type relativeError: :class:`float`
+        """
+        if relativeError <= 0:
+            raise ValueError("relativeError must be positive: " + str(relativeError))
+
+        logNumRegisters = int(numpy.ceil(numpy.log2((1.04/relativeError)**2)))
+        return 2**int(min(max(logNumRegisters, 4), 16))
+
+    @staticmethod
+    def hyperLogLogEstimate(R, blockSize=2**16):
+        """
+        Estimate the cardinality of each HyperLogLog counter (row) of the register
+        array R, using linear counting for small cardinalities.
+
+        :param R: An array of registers with one counter on each row.
+        :type R: :class:`numpy.ndarray`
+
+        :returns: An array of cardinality estimates for each row of R.
+        """
+        numRegisters = R.shape[1]
+        if numRegisters == 16:
+            alpha = 0.673
+        elif numRegisters == 32:
+            alpha = 0.697
+        elif numRegisters == 64:
+            alpha = 0.709
+        else:
+            alpha = 0.7213/(1 + 1.079/numRegisters)
+
+        powers = 2.0**-numpy.arange(256)
+        estimates = numpy.zeros(R.shape[0])
+
+        for start in range(0, R.shape[0], blockSize):
+            block = R[start:start+blockSize, :]
+            E = alpha*numRegisters**2/numpy.sum(powers[block], 1)
+            numZeros = numpy.sum(block == 0, 1)
+
+            smallRange = numpy.logical_and(E <= 2.5*numRegisters, numZeros != 0)
+            E[smallRange] = numRegisters*numpy.log(numRegisters/numZeros[smallRange].astype(numpy.float64))
+            estimates[start:start+blockSize] = E
+
+        return estimates
+
+    @staticmethod
+    def hyperAnf(W, relativeError=0.05, maxIter=None, maxElements=2**24):
+        """
+        A generator for the approximate neighbourhood function of a graph using
+        HyperANF. Each vertex v has a HyperLogLog counter of the ball B(v, t) of
+        vertices within t hops along out-edges. At each iteration the counter of
+        v is replaced by the register-wise maximum over v and its neighbours,
+        which is computed for all vertices at once with a maximum reduction over
+        the CSR arrays of W. The hash of each vertex is salted using
+        numpy.random so results are repeatable with numpy.random.seed.
+
+        The counters of the current and previous iterations are stored in two
+        uint8 arrays of numVertices*hyperLogLogSize(relativeError) bytes, which
+        are swapped at each iteration. With the default relativeError of 0.05
+        this is 1 KB per vertex, i.e. about 1 GB for a graph of 1 million
+        vertices, and a relativeError of 0.1 needs a quarter of that. Other
+        temporary arrays are bounded by about maxElements registers or bytes.
+
+        :param W: A square weight matrix in which non-zero entries are edges.
+
+        :param relativeError: The relative standard error of the counters.
+        :type relativeError: :class:`float`
+
+        :param maxIter: The maximum number of hops, or None to continue until the counters stop changing.
+        :type maxIter: :class:`int`
+
+        :param maxElements: The maximum number of registers gathered at once.
+        :type maxElements: :class:`int`
+
+        :returns: For t = 0, 1, ..., an array of estimates of the sizes of B(v, t) for each vertex v.
+        """
+        A = SparseGraphUtils.adjacencyPattern(W)
+        numVertices = A.shape[0]
+        numRegisters = SparseGraphUtils.hyperLogLogSize(relativeError)
+        logNumRegisters = int(numpy.log2(numRegisters))
+
+        #Hash vertex indices with the splitmix64 finaliser
+        salt = numpy.uint64(numpy.random.randint(0, 2**31))
+        with numpy.errstate(over="ignore"):
+            z = numpy.arange(numVertices, dtype=numpy.uint64) + salt + numpy.uint64(0x9E3779B97F4A7C15)
+            z = (z ^ (z >> numpy.uint64(30))) * numpy.uint64(0xBF58476D1CE4E5B9)
+            z = (z ^ (z >> numpy.uint64(27))) * numpy.uint64(0x94D049BB133111EB)
+            z = z ^ (z >> numpy.uint64(31))
+
+        registerInds = numpy.array(z >> numpy.uint64(64-logNumRegisters), numpy.int64)
+        w = numpy.array(z & numpy.uint64(0xFFFFFFFF), numpy.float64)
+        ranks = numpy.ones(numVertices)*33
+        ranks[w != 0] = 32 - numpy.floor(numpy.log2(w[w != 0]))
+
+        R = numpy.zeros((numVertices, numRegisters), numpy.uint8)
+        R[numpy.arange(numVertices), registerInds] = ranks
+        newR = numpy.empty_like(R)
+        #The estimates use 8 byte floats for each register of a block of rows
+        estimateRows = max(1, maxElements//(8*numRegisters))
+
+        sizes = numpy.ones(numVertices)
+        yield sizes
+
+        degrees = numpy.diff(A.indptr)
+        rowsPerBlock = max(1, maxElements//max(numRegisters*max(A.nnz//max(numVertices, 1), 1), 1))
+        t = 0
+
+        while maxIter is None or t < maxIter:
+            t += 1
+            numpy.copyto(newR, R)
+            changed = False
+
+            for start in range(0, numVertices, rowsPerBlock):
+                rows = numpy.arange(start, min(start+rowsPerBlock, numVertices))
+                rows = rows[degrees[rows] != 0]
+                if rows.shape[0] == 0:
+                    continue
+
+                neighbours = A.indices[A.indptr[rows[0]]:A.indptr[rows[-1]+1]]
+                offsets = A.indptr[rows] - A.indptr[rows[0]]
+                block = R[rows, :]
+                neighbourMax = numpy.maximum.reduceat(R[neighbours, :], offsets, 0)
+                changed = changed or (neighbourMax > block).any()
+                newR[rows, :] = numpy.maximum(block, neighbourMax, block)
+
+            if not changed:
+                break
+
+            R, newR = newR, R
+            sizes = numpy.maximum(sizes, SparseGraphUtils.hyperLogLogEstimate(R, estimateRows))
+            yield sizes
+
+    @staticmethod
+    def __loopFreePattern(W):
+        """
+        The adjacency pattern of W as a canonical csr_matrix without self loops.
+        """
+        A = SparseGraphUtils.adjacencyPattern(W).tocoo()
+        keep = A.row != A.col
+        A = scipy.sparse.csr_matrix((A.data[keep], (A.row[keep], A.col[keep])), shape=A.shape)
+        A.sum_duplicates()
+
+        return A
+
+    @staticmethod
+    def triangleSequence(W, undirected=True, maxElements=2**22):
+        """
+        Compute the diagonal of A^3 for the adjacency matrix A of W without self
+        loops, without forming any matrix products. For an undirected graph this
+        is twice the number of triangles containing each vertex, and for a
+        directed graph the number of directed 3-cycles through each vertex.
+
+        In the undirected case each edge is oriented from the endpoint of lower
+        degree to the higher one (breaking ties by index), so that a triangle
+        is found once from its lowest vertex and each vertex has at most
+        sqrt(2m) out-neighbours. Each oriented edge (u, v) is extended by the
+        out-neighbours w of v, and the wedge is closed if (u, w) is an edge,
+        which is checked by binary search on the sorted CSR keys. In the
+        directed case each edge (u, v) is extended by the out-edges of v and
+        closed by an edge (w, u). Wedges are processed in chunks of about
+        maxElements, so memory is linear in the number of edges.
+
+        :param W: A square weight matrix in which non-zero entries are edges.
+
+        :param undirected: Whether W is symmetric.
+        :type undirected: :class:`bool`
+
+        :param maxElements: The approximate number of wedges processed together.
+        :type maxElements: :class:`int`
+
+        :returns: An integer array of the counts for each vertex.
+        """
+        A = SparseGraphUtils.__loopFreePattern(W)
+        numVertices = A.shape[0]
+        counts = numpy.zeros(numVertices, numpy.int64)
+
+        if A.nnz == 0:
+            return counts
+
+        if undirected:
+            degrees = numpy.diff(A.indptr)
+            ranks = numpy.zeros(numVertices, numpy.int64)
+            ranks[numpy.lexsort((numpy.arange(numVertices), degrees))] = numpy.arange(numVertices)
+
+            A = A.tocoo()
+            keep = ranks[A.row] < ranks[A.col]
+            A = scipy.sparse.csr_matrix((A.data[keep], (A.row[keep], A.col[keep])), shape=A.shape)
+            A.sum_duplicates()
+
+        #Rows are increasing and columns sorted within each row, so the keys are sorted
+        edgeRows = numpy.repeat(numpy.arange(numVertices, dtype=numpy.int64), numpy.diff(A.indptr))
+        edgeCols = numpy.array(A.indices, numpy.int64)
+        keys = edgeRows*numVertices + edgeCols
+
+        #Split the edges so that each chunk extends to about maxElements wedges
+        numWedges = numpy.cumsum(A.indptr[edgeCols+1] - A.indptr[edgeCols])
+        boundaries = numpy.searchsorted(numWedges, numpy.arange(maxElements, numWedges[-1], maxElements))
+        boundaries = numpy.unique(numpy.r_[0, boundaries, edgeRows.shape[0]])
+
+        for start, end in zip(boundaries[:-1], boundaries[1:]):
+            us = edgeRows[start:end]
+            vs = edgeCols[start:end]
+            wedgeVs, ws = SparseGraphUtils.__frontierEdges(A, vs)
+            wedgeUs = numpy.repeat(us, A.indptr[vs+1] - A.indptr[vs])
+            ws = numpy.array(ws, numpy.int64)
+
+            if undirected:
+                closing = wedgeUs*numVertices + ws
+            else:
+                closing = ws*numVertices + wedgeUs
+
+            inds = numpy.minimum(numpy.searchsorted(keys, closing), keys.shape[0]-1)
+            closed = keys[inds] == closing
+
+            counts += numpy.bincount(wedgeUs[closed], minlength=numVertices)
+            if undirected:
+                counts += numpy.bincount(wedgeVs[closed], minlength=numVertices)
+                counts += numpy.bincount(ws[closed], minlength=numVertices)
+
+        if undirected:
+            counts *= 2
+
+        return counts
+
+    @staticmethod
+    def transitivity(W, undirected=True, triangleSequence=None):
+        """
+        Compute the transitivity trace(A^3)/(sum(A^2) - trace(A^2)) of the
+        adjacency matrix A of W without self loops. For an undirected graph this
+        is 3 times the number of triangles over the number of connected triples.
+
+        :param W: A square weight matrix in which non-zero entries are edges.
+
+        :param undirected: Whether W is symmetric.
+        :type undirected: :class:`bool`
+
+        :param triangleSequence: The output of triangleSequence if already computed, otherwise None.
+        :type triangleSequence: :class:`numpy.ndarray`
+
+        :returns: The transitivity, or 0 if there are no paths of length 2.
+        """
+        A = SparseGraphUtils.__loopFreePattern(W)
+
+        if triangleSequence is None:
+            triangleSequence = SparseGraphUtils.triangleSequence(A, undirected)
+
+        outDegrees = numpy.diff(A.indptr)
+        inDegrees = numpy.bincount(A.indices, minlength=A.shape[0])
+        numTriples = numpy.dot(inDegrees, outDegrees) - A.multiply(A.T).sum()
+
+        if numTriples == 0:
+            return 0
+        else:
+            return numpy.sum(triangleSequence)/float(numTriples)
+
+    @staticmethod
+    def localClustering(W, triangleSequence=None):
+        """
+        Compute the local clustering coefficient of each vertex of an undirected
+        graph, which is the number of triangles containing the vertex over the
+        number of pairs of its neighbours. Self loops are ignored and vertices
+        of degree less than 2 have coefficient 0.
+
+        :param W: A symmetric weight matrix in which non-zero entries are edges.
+
+        :param triangleSequence: The output of triangleSequence if already computed, otherwise None.
+        :type triangleSequence: :class:`numpy.ndarray`
+
+        :returns: An array of the local clustering coefficient of each vertex.
+        """
+        A = SparseGraphUtils.__loopFreePattern(W)
+
+        if triangleSequence is None:
+            triangleSequence = SparseGraphUtils.triangleSequence(A)
+
+        degrees = numpy.diff(A.indptr)
+        numPairs = degrees*(degrees-1)
+        coefficients = numpy.zeros(A.shape[0])
+        numpy.divide(triangleSequence, numPairs, out=coefficients, where=numPairs!=0)
+
+        return coefficients
+
+    @staticmethod
+    def wedgeSampleSize(error, confidence):
+        """
+        The number of uniformly sampled wedges needed so that the fraction of
+        closed wedges is within error of the transitivity with probability at
+        least confidence, using Hoeffding's inequality.
+
+        :param error: The additive error of the estimated transitivity.
+        :type error: :class:`float`
+
+        :param confidence: The probability that the error bound holds.
+        :type confidence: :class:`float`
+        """
+        if error <= 0 or not 0 < confidence < 1:
+            raise ValueError("Require error > 0 and 0 < confidence < 1: " + str((error, confidence)))
+
+        return int(numpy.ceil(numpy.log(2/(1-confidence))/(2*error**2)))
+
+    @staticmethod
+    def sampleWedges(W, numSamples):
+        """
+        Sample wedges (paths u-v-w of length 2 with u != w) of an undirected graph
+        uniformly at random and count how many are closed by an edge u-w. The
+        centre v is chosen with probability proportional to its number of wedges
+        and then two distinct neighbours are chosen, and closure is checked by a
+        binary search of the sorted neighbours of u. After forming the loop-free
+        pattern of W, the time is O(numSamples log(maxDegree)).
+
+        :param W: A symmetric weight matrix in which non-zero entries are edges.
+
+        :param numSamples: The number of wedges to sample.
+        :type numSamples: :class:`int`
+
+        :returns: The number of closed sampled wedges and the total number of wedges in the graph.
+        """
+        A = SparseGraphUtils.__loopFreePattern(W)
+        degrees = numpy.diff(A.indptr)
+        cumWedges = numpy.cumsum(degrees*(degrees-1.0)/2)
+        numWedges = cumWedges[-1] if cumWedges.shape[0] != 0 else 0
+
+        if numWedges == 0 or numSamples == 0:
+            return 0, numWedges
+
+        centres = numpy.searchsorted(cumWedges, numpy.random.rand(numSamples)*numWedges, side="right")
+        centres = numpy.minimum(centres, A.shape[0]-1)
+        centreDegrees = degrees[centres]
+        i = (numpy.random.rand(numSamples)*centreDegrees).astype(numpy.int64)
+        j = (numpy.random.rand(numSamples)*(centreDegrees-1)).astype(numpy.int64)
+        j += j >= i
+
+        us = A.indices[A.indptr[centres] + i]
+        ws = A.indices[A.indptr[centres] + j]
+
+        lows = SparseGraphUtils.searchRows(A.indptr, A.indices, us, ws)
+        closed = numpy.logical_and(lows < A.indptr[us+1], A.indices[numpy.minimum(lows, A.nnz-1)] == ws)
+        return int(numpy.sum(closed)), numWedges
+
+    @staticmethod
+    def searchRows(indptr, indices, rows, cols):
+        """
+        A vectorised binary search for column cols[i] in the sorted column indices
+        of row rows[i] of a CSR matrix, taking O(log(maxDegree)) passes over the
+        queries. 
+
+        :param indptr: The row offsets of the CSR matrix.
+
+        :param indices: The column indices of the CSR matrix, sorted within each row.
+
+        :param rows: An array of row indices to search.
+
+        :param cols: An array of the column indices to find.
+
+        :returns: The position in indices of each column, or where it would be inserted to keep its row sorted.
+        """
+        rows = numpy.asarray(rows, numpy.int64)
+        lows = indptr[rows].astype(numpy.int64)
+        highs = indptr[rows+1].astype(numpy.int64)
+        last = max(indices.shape[0]-1, 0)
+
+        while (lows < highs).any():
+            active = lows < highs
+            mids = (lows + highs)//2
+            less = numpy.logical_and(active, indices[numpy.minimum(mids, last)] < cols)
+            lows[less] = mids[less] + 1
+            greater = numpy.logical_and(active, numpy.logical_not(less))
+            highs[greater] = mids[greater]
+
+        return lows
+
+    @staticmethod
+    def __frontierEdges(A, frontier):
+        """
+        Return the rows and columns of the edges of csr_matrix A leaving the
+        vertices in frontier.
+        """
+        degrees = A.indptr[frontier+1] - A.indptr[frontier]
+        rows = numpy.repeat(frontier, degrees)
+        starts = numpy.repeat(A.indptr[frontier] - numpy.r_[0, numpy.cumsum(degrees)[:-1]], degrees)
+        cols = A.indices[starts + numpy.arange(rows.shape[0])]
+
+        return rows, cols
+
+    @staticmethod
+    def __accumulateDependencies(sigma, levelEdges, source):
+        """
+        Accumulate the Brandes dependencies of source given the number of
+        shortest paths sigma and the shortest path DAG edges leaving each level.
+        """
+        delta = numpy.zeros(sigma.shape[0])
+        for rows, cols in reversed(levelEdges):
+            delta += numpy.bincount(rows, sigma[rows]/sigma[cols]*(1+delta[cols]), sigma.shape[0])
+
+        delta[source] = 0
+        return delta
+
+    @staticmethod
+    def __bfsDependencies(A, source):
+        """
+        The Brandes dependencies of source on every vertex for an unweighted
+        graph, found by a breadth first search one level at a time.
+        """
+        numVertices = A.shape[0]
+        distances = numpy.ones(numVertices, numpy.int64)*-1
+        sigma = numpy.zeros(numVertices)
+        distances[source] = 0
+        sigma[source] = 1
+
+        frontier = numpy.array([source])
+        levelEdges = []
+        level = 0
+
+        while frontier.shape[0] != 0:
+            level += 1
+            rows, cols = SparseGraphUtils.__frontierEdges(A, frontier)
+
+            newVertices = cols[distances[cols] == -1]
+            distances[newVertices] = level
+
+            #Edges on shortest paths go to the next level
+            onPath = distances[cols] == level
+            rows, cols = rows[onPath], cols[onPath]
+            sigma += numpy.bincount(cols, sigma[rows], numVertices)
+            levelEdges.append((rows, cols))
+
+            frontier = numpy.unique(newVertices)
+
+        return SparseGraphUtils.__accumulateDependencies(sigma, levelEdges, source)
+
+    @staticmethod
+    def __dijkstraDependencies(Wc, D, source, tol=10**-10):
+        """
+        The Brandes dependencies of source on every vertex for a weighted graph
+        with coo_matrix Wc, given the distances D from the source. Weights are
+        positive so the shortest path DAG is acyclic, and it is split into levels
+        by removing vertices with no remaining predecessors (Kahn's algorithm).
+        """
+        numVertices = Wc.shape[0]
+        finite = numpy.isfinite(D[Wc.row])
+        rows, cols, weights = Wc.row[finite], Wc.col[finite], Wc.data[finite]
+
+        onPath = numpy.abs(D[rows] + weights - D[cols]) <= tol*numpy.maximum(1, D[cols])
+        dag = scipy.sparse.csr_matrix((numpy.ones(numpy.sum(onPath)), (rows[onPath], cols[onPath])), shape=Wc.shape)
+        inDegrees = numpy.bincount(dag.indices, minlength=numVertices)
+
+        sigma = numpy.zeros(numVertices)
+        sigma[source] = 1
+        frontier = numpy.array([source])
+        levelEdges = []
+
+        while frontier.shape[0] != 0:
+            rows, cols = SparseGraphUtils.__frontierEdges(dag, frontier)
+            sigma += numpy.bincount(cols, sigma[rows], numVertices)
+            levelEdges.append((rows, cols))
+
+            inDegrees -= numpy.bincount(cols, minlength=numVertices)
+            frontier = numpy.unique(cols[inDegrees[cols] == 0])
+
+        return SparseGraphUtils.__accumulateDependencies(sigma, levelEdges, source)
+
+    @staticmethod
+    def betweennessSums(W, useWeights=False, sources=None):
+        """
+        Sum the Brandes dependencies of a set of sources on each vertex, i.e. for
+        each vertex v the sum over sources s and targets t (with s, t and v
+        distinct) of the fraction of shortest paths from s to t passing through v.
+        Unweighted shortest paths are found by breadth first search over the CSR
+        arrays of W, and weighted ones with Dijkstra's algorithm in chunks.
+
+        :param W: A square weight matrix in which non-zero entries are edges with positive weights.
+
+        :param useWeights: Whether to use edge weights or adjacencies.
+        :type useWeights: :class:`bool`
+
+        :param sources: An array of source vertex indices, or None to use all vertices.
+
+        :returns: An array of the summed dependencies of each vertex.
+        """
+        numVertices = W.shape[0]
+        if sources is None:
+            sources = numpy.arange(numVertices)
+
+        sums = numpy.zeros(numVertices)
+
+        if useWeights:
+            W = scipy.sparse.csr_matrix(W, copy=True)
+            W.eliminate_zeros()
+            Wc = W.tocoo()
+            for chunkSources, D in SparseGraphUtils.dijkstraChunks(W, sources):
+                for i, source in enumerate(chunkSources):
+                    sums += SparseGraphUtils.__dijkstraDependencies(Wc, D[i, :], source)
+        else:
+            A = SparseGraphUtils.adjacencyPattern(W)
+            for source in sources:
+                sums += SparseGraphUtils.__bfsDependencies(A, source)
+
+        return sums
+
+    @staticmethod
+    def betweenness(W, useWeights=False, numSamples=None, numProcesses=1):
+        """
+        Compute the betweenness centrality of each vertex using Brandes' algorithm,
+        counting ordered pairs of sources and targets (so for a symmetric W each
+        unordered pair contributes twice). If numSamples is given then the
+        dependencies are summed over a uniform sample of sources without
+        replacement and scaled up, giving an unbiased estimate of betweenness.
+        The sources can be split into chunks which are processed by a pool of
+        worker processes.
+
+        :param W: A square weight matrix in which non-zero entries are edges with positive weights.
+
+        :param useWeights: Whether to use edge weights or adjacencies.
+        :type useWeights: :class:`bool`
+
+        :param numSamples: The number of sources to sample, or None to use all vertices.
+        :type numSamples: :class:`int`
+
+        :param numProcesses: The number of processes to use.
+        :type numProcesses: :class:`int`
+
+        :returns: An array of the betweenness of each vertex.
+        """
+        numVertices = W.shape[0]
+
+        if numSamples is None or numSamples >= numVertices:
+            sources = numpy.arange(numVertices)
+        else:
+            sources = numpy.sort(numpy.random.permutation(numVertices)[0:numSamples])
+
+        if numProcesses == 1 or sources.shape[0] <= 1:
+            sums = SparseGraphUtils.betweennessSums(W, useWeights, sources)
+        else:
+            W = scipy.sparse.csr_matrix(W)
+            chunks = numpy.array_split(sources, min(numProcesses*4, sources.shape[0]))
+            pool = multiprocessing.Pool(numProcesses)
+
+            try:
+                results = pool.starmap(SparseGraphUtils.betweennessSums, [(W, useWeights, chunk) for chunk in chunks])
+            finally:
+                pool.close()
+                pool.join()
+
+            sums = numpy.sum(results, 0)
+
+        if sources.shape[0] != 0:
+            sums *= numVertices/float(sources.shape[0])
+
+        return sums
+
+    @staticmethod
+    def topEigenpairs(W, k, symmetric=True, denseSize=500):
+        """
+        Compute the k eigenvalues of W with largest real part and the
+        corresponding eigenvectors. For a matrix with more than denseSize rows
+        ARPACK (scipy.sparse.linalg.eigsh or eigs) is used on the sparse matrix
+        so that only k vectors are stored, and LOBPCG is used if ARPACK does not
+        converge for a symmetric matrix. Smaller matrices are decomposed
+        using numpy.linalg.
+
+        :param W: A square weight matrix.
+
+        :param k: The number of eigenpairs to compute.
+        :type k: :class:`int`
+
+        :param symmetric: Whether W is symmetric.
+        :type symmetric: :class:`bool`
+
+        :param denseSize: The largest number of rows for which the dense decomposition is used.
+        :type denseSize: :class:`int`
+
+        :returns: An array of eigenvalues in decreasing order and a matrix whose columns are the eigenvectors.
+        """
+        numVertices = W.shape[0]
+        k = min(k, numVertices)
+
+        if k == 0:
+            return numpy.zeros(0), numpy.zeros((numVertices, 0))
+
+        #ARPACK requires k < n for eigsh and k < n-1 for eigs
+        if numVertices <= denseSize or k >= numVertices-1:
+            A = W.toarray() if scipy.sparse.issparse(W) else numpy.array(W)
+
+            if symmetric:
+                lmbda, V = numpy.linalg.eigh(A)
+            else:
+                lmbda, V = numpy.linalg.eig(A)
+        else:
+            W = scipy.sparse.csr_matrix(W, dtype=numpy.float64)
+
+            if symmetric:
+                try:
+                    lmbda, V = scipy.sparse.linalg.eigsh(W, k, which="LA")
+                except scipy.sparse.linalg.ArpackNoConvergence:
+                    X = numpy.random.rand(numVertices, k)
+                    lmbda, V = scipy.sparse.linalg.lobpcg(W, X, largest=True, maxiter=numVertices)
+            else:
+                lmbda, V = scipy.sparse.linalg.eigs(W, k, which="LR")
+
+                if (lmbda.imag == 0).all() and (V.imag == 0).all():
+                    lmbda, V = lmbda.real, V.real
+
+        inds = numpy.argsort(-lmbda.real, kind="mergesort")[0:k]
+        return lmbda[inds], V[:, inds]
@@ -31,9 +31,7 @@ class SparseUtils(object):
         Find the diagonal of a sparse matrix and return as a numpy array. 
         """
         d = numpy.zeros(X.shape[0])
-
-        for i in range(X.shape[0]):
-            d[i] = X[i, i]
+        d[:] = X.diagonal()
 
         return d
 
@@ -734,3 +734,52 @@ class Util(object):
             tempA[idx] = minA
             
         return b 
+
+    @staticmethod
+    def blockedClosure(P, combine=numpy.add, select=numpy.minimum, blockSize=None):
+        """
+        Compute the closure of a square array P in place using a cache-blocked
+        Floyd-Warshall iteration over a semiring. With the default combine=numpy.add
+        and select=numpy.minimum this gives shortest paths (min-plus), and with
+        numpy.multiply and numpy.maximum it gives maximum product paths
+        (max-times). Pivots are taken in blocks: the rows of the pivot block are
+        finalised first and then each tile of blockSize rows is updated with all
+        pivots of the block while it is in cache. All updates use preallocated
+        buffers so no full size matrices are created.
+
+        :param P: A square array which is overwritten with the result.
+        :type P: :class:`numpy.ndarray`
+
+        :param combine: A ufunc to combine path segments e.g. numpy.add.
+
+        :param select: A ufunc to choose between paths e.g. numpy.minimum.
+
+        :param blockSize: The number of pivots and rows in a block, or None to choose automatically.
+        :type blockSize: :class:`int`
+
+        :returns: The array P.
+        """
+        n = P.shape[0]
+        if n == 0:
+            return P
+
+        if blockSize is None:
+            #Aim for a tile of blockSize x n entries of about 1MB
+            blockSize = int(min(n, max(8, 2**20//(n*P.itemsize))))
+
+        buffer = numpy.empty((blockSize, n), P.dtype)
+
+        for pivotStart in range(0, n, blockSize):
+            pivotEnd = min(pivotStart+blockSize, n)
+            tileStarts = [pivotStart] + [i for i in range(0, n, blockSize) if i != pivotStart]
+
+            for tileStart in tileStarts:
+                tileEnd = min(tileStart+blockSize, n)
+                tile = P[tileStart:tileEnd, :]
+                tileBuffer = buffer[0:tileEnd-tileStart, :]
+
+                for k in range(pivotStart, pivotEnd):
+                    combine(tile[:, k:k+1], P[k, :], out=tileBuffer)
+                    select(tile, tileBuffer, out=tile)
+
+        return P
@@ -0,0 +1,76 @@
+import unittest
+import numpy
+import scipy.sparse
+from apgl.util.MatrixCache import MatrixCache
+
+class MatrixCacheTest(unittest.TestCase):
+    def testSize(self):
+        self.assertEquals(MatrixCache.size(numpy.zeros(10)), 80)
+
+        A = scipy.sparse.csr_matrix(numpy.eye(5))
+        self.assertEquals(MatrixCache.size(A), A.data.nbytes + A.indices.nbytes + A.indptr.nbytes)
+        self.assertTrue(MatrixCache.size((numpy.zeros(10), [numpy.zeros(5)])) > 120)
+
+    def testView(self):
+        A = scipy.sparse.csr_matrix(numpy.eye(3))
+        value = ([numpy.zeros(2)], A, 3)
+        MatrixCache.setReadOnly(value)
+        value2 = MatrixCache.view(value)
+
+        self.assertRaises(ValueError, value2[0][0].__setitem__, 0, 1)
+        self.assertRaises(ValueError, value2[1].data.__setitem__, 0, 2)
+        self.assertTrue(numpy.may_share_memory(value[0][0], value2[0][0]))
+        self.assertTrue(value2[1].data is A.data)
+
+        self.assertRaises(ValueError, value2[1].__setitem__, (0, 1), 2)
+        self.assertFalse(value2[1] is A)
+
+        value2[0][0] = numpy.ones(2)
+        self.assertEquals(value[0][0][0], 0)
+        self.assertEquals(type(value2), tuple)
+        self.assertEquals(value2[2], 3)
+
+    def testPutGet(self):
+        cache = MatrixCache(190)
+        cache.put("a", numpy.zeros(10))
+        cache.put("b", numpy.zeros(10))
+
+        self.assertEquals(cache.get("c"), None)
+        self.assertEquals(cache.get("a").shape[0], 10)
+        self.assertEquals((cache.hits, cache.misses), (1, 1))
+        self.assertEquals(cache.numBytes, 160)
+
+        #The least recently used entry b is evicted
+        cache.put("c", numpy.zeros(5))
+        self.assertEquals(len(cache), 2)
+        self.assertEquals(cache.get("b"), None)
+        self.assertTrue(cache.get("a") is not None)
+
+        #Values larger than the budget are not stored
+        cache.put("d", numpy.zeros(100))
+        self.assertEquals(cache.get("d"), None)
+
+        cache.setMaxBytes(100)
+        self.assertEquals(len(cache), 1)
+        self.assertTrue(cache.get("a") is not None)
+
+        self.assertRaises(ValueError, MatrixCache, -1)
+
+    def testValidate(self):
+        cache = MatrixCache()
+        W = numpy.zeros(5)
+        cache.validate(0, W)
+        cache.put("a", 1)
+
+        cache.validate(0, W)
+        self.assertEquals(cache.get("a"), 1)
+
+        cache.validate(1, W)
+        self.assertEquals(cache.get("a"), None)
+
+        cache.put("a", 1)
+        cache.validate(1, numpy.zeros(5))
+        self.assertEquals(len(cache), 0)
+
+if __name__ == '__main__':
+    unittest.main()
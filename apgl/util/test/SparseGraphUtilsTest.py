@@ -0,0 +1,198 @@
+import unittest
+import numpy
+import scipy.sparse
+import numpy.testing as nptst
+from apgl.util.SparseGraphUtils import SparseGraphUtils
+
+class SparseGraphUtilsTest(unittest.TestCase):
+    def setUp(self):
+        numpy.random.seed(21)
+
+        #A path 0-1-2-3, an isolated vertex 4 and a directed edge 5->4
+        self.W = scipy.sparse.lil_matrix((6, 6))
+        self.W[0, 1] = 1
+        self.W[1, 0] = 1
+        self.W[1, 2] = 0.5
+        self.W[2, 1] = 0.5
+        self.W[2, 3] = 2
+        self.W[3, 2] = 2
+        self.W[5, 4] = 1
+
+    def testAdjacencyPattern(self):
+        W = self.W.tocsr()
+        W[0, 1] = 0
+        A = SparseGraphUtils.adjacencyPattern(W)
+
+        self.assertEquals(A.nnz, 6)
+        nptst.assert_array_equal(A.toarray(), (W.toarray()!=0).astype(numpy.float64))
+
+    def testBfsDistances(self):
+        inf = numpy.inf
+        P = SparseGraphUtils.bfsDistances(self.W)
+
+        P2 = numpy.array([[0, 1, 2, 3, inf, inf],
+                          [1, 0, 1, 2, inf, inf],
+                          [2, 1, 0, 1, inf, inf],
+                          [3, 2, 1, 0, inf, inf],
+                          [inf, inf, inf, inf, 0, inf],
+                          [inf, inf, inf, inf, 1, 0]])
+        nptst.assert_array_equal(P, P2)
+
+        #Results are the same with small chunks and a subset of sources
+        P = SparseGraphUtils.bfsDistances(self.W, numpy.array([5, 2, 0]), chunkSize=2)
+        nptst.assert_array_equal(P, P2[[5, 2, 0], :])
+
+        #Compare against a dense computation on a random directed graph
+        numVertices = 40
+        W = scipy.sparse.rand(numVertices, numVertices, 0.05, format="csr")
+        P = SparseGraphUtils.bfsDistances(W, chunkSize=7)
+
+        A = (W.toarray() != 0)
+        P2 = numpy.ones((numVertices, numVertices))*inf
+        P2[numpy.diag_indices(numVertices)] = 0
+        reached = numpy.eye(numVertices, dtype=numpy.bool_)
+        for level in range(1, numVertices):
+            reached2 = numpy.dot(reached, A) | reached
+            P2[reached2 & numpy.logical_not(reached)] = level
+            reached = reached2
+
+        nptst.assert_array_equal(P, P2)
+
+    def testComponentLabels(self):
+        labels, sizes = SparseGraphUtils.componentLabels(self.W)
+        nptst.assert_array_equal(labels, numpy.array([0, 0, 0, 0, 1, 1]))
+        nptst.assert_array_equal(sizes, numpy.array([4, 2]))
+
+        labels, sizes = SparseGraphUtils.componentLabels(self.W, "strong")
+        nptst.assert_array_equal(labels, numpy.array([0, 0, 0, 0, 1, 2]))
+        nptst.assert_array_equal(sizes, numpy.array([4, 1, 1]))
+        self.assertEquals(SparseGraphUtils.componentLists(labels, sizes), [[0, 1, 2, 3], [4], [5]])
+
+        #Compare against a dense reachability computation
+        numVertices = 100
+        W = scipy.sparse.rand(numVertices, numVertices, 0.01, format="csr")
+        W = W + W.T
+        labels, sizes = SparseGraphUtils.componentLabels(W)
+        P = SparseGraphUtils.bfsDistances(W)
+
+        nptst.assert_array_equal(numpy.isfinite(P), labels[:, numpy.newaxis] == labels[numpy.newaxis, :])
+        nptst.assert_array_equal(sizes, numpy.bincount(labels))
+        self.assertTrue((numpy.diff(sizes) <= 0).all())
+
+        labels, sizes = SparseGraphUtils.componentLabels(scipy.sparse.csr_matrix((0, 0)))
+        self.assertEquals(SparseGraphUtils.componentLists(labels, sizes), [])
+        self.assertRaises(ValueError, SparseGraphUtils.componentLabels, W, "medium")
+
+    def testHyperLogLogSize(self):
+        self.assertEquals(SparseGraphUtils.hyperLogLogSize(0.05), 512)
+        self.assertEquals(SparseGraphUtils.hyperLogLogSize(0.9), 16)
+        self.assertRaises(ValueError, SparseGraphUtils.hyperLogLogSize, 0)
+
+    def testHyperAnf(self):
+        #Small balls are estimated almost exactly by linear counting
+        sizes = list(SparseGraphUtils.hyperAnf(self.W, 0.05))
+        P = SparseGraphUtils.bfsDistances(self.W)
+
+        self.assertEquals(len(sizes), 4)
+        for t in range(len(sizes)):
+            nptst.assert_array_almost_equal(sizes[t], numpy.sum(P<=t, 1), 1)
+
+        sizes = list(SparseGraphUtils.hyperAnf(self.W, 0.05, maxIter=1))
+        self.assertEquals(len(sizes), 2)
+
+        numVertices = 2000
+        W = scipy.sparse.rand(numVertices, numVertices, 2.0/numVertices, format="csr")
+        P = SparseGraphUtils.bfsDistances(W)
+
+        for t, size in enumerate(SparseGraphUtils.hyperAnf(W, 0.05)):
+            exact = numpy.sum(P<=t)
+            self.assertTrue(abs(numpy.sum(size) - exact) <= 0.05*exact)
+
+    def testBetweenness(self):
+        #Only the inner vertices of the path 0-1-2-3 lie on shortest paths
+        b = SparseGraphUtils.betweenness(self.W)
+        nptst.assert_array_almost_equal(b, numpy.array([0, 4, 4, 0, 0, 0]))
+        nptst.assert_array_almost_equal(SparseGraphUtils.betweenness(self.W, True), b)
+
+        #Adding a long edge 0-3 gives a cycle, but weighted shortest paths are unchanged
+        W = self.W.copy()
+        W[0, 3] = 10
+        W[3, 0] = 10
+        nptst.assert_array_almost_equal(SparseGraphUtils.betweenness(W), numpy.array([1, 1, 1, 1, 0, 0]))
+        nptst.assert_array_almost_equal(SparseGraphUtils.betweenness(W, True), b)
+
+        #Sampling gives an unbiased estimate
+        numVertices = 50
+        W = scipy.sparse.rand(numVertices, numVertices, 0.05, format="csr")
+        b = SparseGraphUtils.betweenness(W, True)
+        b2 = numpy.mean([SparseGraphUtils.betweenness(W, True, numSamples=25) for i in range(100)], 0)
+        self.assertTrue(numpy.linalg.norm(b - b2) <= 0.15*numpy.linalg.norm(b))
+
+        nptst.assert_array_almost_equal(SparseGraphUtils.betweenness(W, True, numProcesses=2), b)
+
+    def testTriangleSequence(self):
+        numVertices = 40
+
+        for undirected in [True, False]:
+            W = scipy.sparse.rand(numVertices, numVertices, 0.1, format="csr")
+            if undirected:
+                W = W + W.T
+
+            A = (W.toarray() != 0).astype(numpy.int64)
+            A[numpy.diag_indices(numVertices)] = 0
+            A2 = A.dot(A)
+            seq = numpy.diag(A2.dot(A))
+
+            for maxElements in [1, 10, 2**22]:
+                nptst.assert_array_equal(SparseGraphUtils.triangleSequence(W, undirected, maxElements), seq)
+
+            transitivity = numpy.sum(seq)/float(numpy.sum(A2) - numpy.trace(A2))
+            self.assertAlmostEquals(SparseGraphUtils.transitivity(W, undirected), transitivity)
+
+            if undirected:
+                degrees = numpy.sum(A, 0)
+                coefficients = SparseGraphUtils.localClustering(W)
+                nptst.assert_array_almost_equal(coefficients[degrees>=2], (seq/(degrees*(degrees-1.0)))[degrees>=2])
+                nptst.assert_array_equal(coefficients[degrees<2], 0)
+
+        self.assertEquals(SparseGraphUtils.transitivity(scipy.sparse.csr_matrix((5, 5))), 0)
+
+    def testSampleWedges(self):
+        self.assertEquals(SparseGraphUtils.wedgeSampleSize(0.1, 0.95), 185)
+        self.assertRaises(ValueError, SparseGraphUtils.wedgeSampleSize, 0.1, 1)
+
+        numVertices = 100
+        W = scipy.sparse.rand(numVertices, numVertices, 0.1, format="csr")
+        W = W + W.T
+        W.setdiag(1)
+
+        numSamples = 20000
+        numClosed, numWedges = SparseGraphUtils.sampleWedges(W, numSamples)
+        degrees = numpy.array((W != 0).sum(0)).ravel() - 1
+        self.assertEquals(numWedges, numpy.sum(degrees*(degrees-1)/2))
+        self.assertAlmostEquals(numClosed/float(numSamples), SparseGraphUtils.transitivity(W), places=1)
+
+        self.assertEquals(SparseGraphUtils.sampleWedges(scipy.sparse.csr_matrix((5, 5)), 10), (0, 0))
+
+    def testTopEigenpairs(self):
+        numVertices = 300
+        W = scipy.sparse.rand(numVertices, numVertices, 0.02, format="csr")
+        W = W + W.T
+        lmbda, V = numpy.linalg.eigh(W.toarray())
+        lmbda = numpy.flipud(lmbda)
+
+        for denseSize in [0, numVertices]:
+            lmbda2, V2 = SparseGraphUtils.topEigenpairs(W, 5, True, denseSize)
+            nptst.assert_array_almost_equal(lmbda2, lmbda[0:5])
+            nptst.assert_array_almost_equal(W.dot(V2), V2*lmbda2)
+
+        W = scipy.sparse.rand(numVertices, numVertices, 0.02, format="csr")
+        lmbda2, V2 = SparseGraphUtils.topEigenpairs(W, 3, False, 0)
+        lmbda = numpy.linalg.eigvals(W.toarray())
+        nptst.assert_array_almost_equal(lmbda2[0], lmbda[numpy.argmax(lmbda.real)])
+        nptst.assert_array_almost_equal(W.dot(V2), V2*lmbda2)
+
+        self.assertEquals(SparseGraphUtils.topEigenpairs(W[0:0, 0:0], 3)[0].shape[0], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -401,6 +401,34 @@ class UtilTest(unittest.TestCase):
                 nptst.assert_array_almost_equal(V[:, 0], v, 2)
             except AssertionError: 
                 nptst.assert_array_almost_equal(V[:, 0], -v, 2)
+
+    def testBlockedClosure(self): 
+        n = 30 
+        
+        for blockSize in [None, 1, 4, 7, 30]: 
+            W = numpy.random.rand(n, n)*(numpy.random.rand(n, n) < 0.1)
+            
+            #Compare against the standard Floyd-Warshall iteration 
+            P = W.copy()
+            P[P==0] = numpy.inf
+            P2 = P.copy()
+            for k in range(n): 
+                P2 = numpy.minimum(P2, numpy.add.outer(P2[:, k], P2[k, :]))
+            
+            P3 = Util.blockedClosure(P, blockSize=blockSize)
+            self.assertTrue(P3 is P)
+            nptst.assert_array_almost_equal(P, P2)
+            
+            P = W.copy()
+            P2 = W.copy()
+            for k in range(n): 
+                P2 = numpy.maximum(P2, numpy.multiply.outer(P2[:, k], P2[k, :]))
+            
+            Util.blockedClosure(P, numpy.multiply, numpy.maximum, blockSize)
+            nptst.assert_array_almost_equal(P, P2)
+            
+        P = numpy.zeros((0, 0))
+        self.assertEquals(Util.blockedClosure(P).shape, (0, 0))
         
     
 if __name__ == "__main__":